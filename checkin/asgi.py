@@ -12,5 +12,13 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'checkin.settings')
+# Marca el proceso como ASGI: es el valor por defecto de CHECKIN_ASYNC en settings.py, así la ruta de
+# pasajeros usa la vista asíncrona salvo que CHECKIN_ASYNC (en el entorno o en .env) diga lo contrario
+os.environ['CHECKIN_ASGI'] = 'True'
 
 application = get_asgi_application()
+
+# Carga las rutas y resuelve la redirección de "/" al iniciar el worker y no en la primera solicitud
+from .service import route_redirection  # noqa: E402
+
+route_redirection()
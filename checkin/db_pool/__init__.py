@@ -0,0 +1,89 @@
+"""
+Backends de base de datos con pool de conexiones (django-db-connection-pool) que además
+registran estadísticas de obtención de conexiones por alias.
+
+Cada backend (mysql, postgresql, oracle) extiende el de dj_db_conn_pool con PoolStatsMixin.
+Las estadísticas son por proceso, como los pools.
+"""
+
+from typing import Dict
+import threading
+import time
+
+
+class PoolStatistics:
+    """Clase que acumula, por alias de base de datos, las conexiones obtenidas del pool y el tiempo de espera."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._aliases: Dict[str, Dict] = {}
+
+    def _alias(self, alias: str) -> Dict:
+        return self._aliases.setdefault(
+            alias,
+            {
+                "checkouts": 0,
+                "checkoutWaitSeconds": 0.0,
+                "maxCheckoutWaitSeconds": 0.0,
+                "connects": 0,
+                "connectSeconds": 0.0,
+            },
+        )
+
+    def record_checkout(self, alias: str, seconds: float) -> None:
+        with self._lock:
+            stats = self._alias(alias)
+            stats["checkouts"] += 1
+            stats["checkoutWaitSeconds"] += seconds
+            stats["maxCheckoutWaitSeconds"] = max(stats["maxCheckoutWaitSeconds"], seconds)
+
+    def record_connect(self, alias: str, seconds: float) -> None:
+        with self._lock:
+            stats = self._alias(alias)
+            stats["connects"] += 1
+            stats["connectSeconds"] += seconds
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {alias: dict(stats) for alias, stats in self._aliases.items()}
+
+
+pool_statistics = PoolStatistics()
+
+
+class PoolStatsMixin:
+    """Mixin para los DatabaseWrapper de dj_db_conn_pool que mide la obtención de conexiones del pool."""
+
+    def get_new_connection(self, conn_params):
+        # Tiempo de espera por una conexión del pool (incluye crear la conexión si el pool no tiene libres)
+        start = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        pool_statistics.record_checkout(self.alias, time.perf_counter() - start)
+        return connection
+
+    def _get_new_connection(self, conn_params):
+        # Conexión física nueva hacia la base de datos
+        start = time.perf_counter()
+        connection = super()._get_new_connection(conn_params)
+        pool_statistics.record_connect(self.alias, time.perf_counter() - start)
+        return connection
+
+
+def pool_stats() -> Dict[str, Dict]:
+    """Función que retorna, por alias, el estado de los pools del proceso y las estadísticas de obtención de conexiones."""
+    stats = pool_statistics.snapshot()
+    try:
+        from dj_db_conn_pool.core import pool_container
+    except ImportError:
+        return stats
+
+    for alias, pool in list(pool_container.items()):
+        stats.setdefault(alias, {}).update(
+            {
+                "poolSize": pool.size(),
+                "checkedIn": pool.checkedin(),
+                "checkedOut": pool.checkedout(),
+                "overflow": pool.overflow(),
+            }
+        )
+    return stats
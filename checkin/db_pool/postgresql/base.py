@@ -0,0 +1,6 @@
+from dj_db_conn_pool.backends.postgresql import base
+from checkin.db_pool import PoolStatsMixin
+
+
+class DatabaseWrapper(PoolStatsMixin, base.DatabaseWrapper):
+    pass
@@ -1,19 +1,14 @@
-from django.conf import settings
-from django.urls import reverse
-from django.utils.module_loading import import_module
+from django.urls import NoReverseMatch, get_script_prefix, reverse
+import functools
 
 
+@functools.lru_cache(maxsize=None)
 def route_redirection() -> str:
-    "Función que retorna la ruta flights/1/passengers"
-    url_with_id = "/"
-    for app_name in settings.INSTALLED_APPS:
-
-        if app_name == "flight":
-            app_urls = import_module(f"{app_name}.urls")
-            if app_urls:
-                for url in app_urls.urlpatterns:
-                    if url.name == "flight-passengers":
-
-                        url_with_id = reverse("flight-passengers", kwargs={"id": 1})
-
-    return url_with_id
+    """Función que retorna la ruta flights/1/passengers sin el prefijo del despliegue (SCRIPT_NAME), o "" si la app flight no tiene la ruta.
+
+    Se resuelve una sola vez por proceso; checkin/wsgi.py y checkin/asgi.py la llaman al iniciar el worker.
+    """
+    try:
+        return reverse("flight-passengers", kwargs={"id": 1})[len(get_script_prefix()) :]
+    except NoReverseMatch:
+        return ""
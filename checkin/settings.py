@@ -40,6 +40,13 @@ CSRF_TRUSTED_ORIGINS = ["https://airline-check-in-production.up.railway.app"]
 
 # Application definition
 
+# Perfil del despliegue: "full" sirve la API, el admin, los archivos estáticos y Swagger; "api" solo la API
+# JSON de vuelos, con menos apps, middleware y clases de DRF en cada solicitud. Con "api" el admin y los
+# estáticos se sirven desde otro despliegue con el perfil "full".
+CHECKIN_PROFILE = env("CHECKIN_PROFILE", default="full")
+if CHECKIN_PROFILE not in ("full", "api"):
+    raise ValueError(f"Perfil de despliegue desconocido: {CHECKIN_PROFILE}")
+
 INSTALLED_APPS = [
     "django.contrib.admin",
     "django.contrib.auth",
@@ -48,13 +55,14 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "whitenoise.runserver_nostatic",
-    "drf_yasg",
     "rest_framework",
     "corsheaders",
     "flight",
 ]
 
 MIDDLEWARE = [
+    # Primero, para que el total de Server-Timing incluya a los demás middleware y la codificación
+    "flight.instrumentation.timing_middleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -66,6 +74,37 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Valores por defecto de DRF: autenticación por sesión y básica, y la API navegable además de JSON
+REST_FRAMEWORK = {}
+
+if CHECKIN_PROFILE == "api":
+    # La API es anónima y sin sesiones: sin admin, sesiones, mensajes ni archivos estáticos. El POST que
+    # guarda asientos no se sirve (flight/urls.py); se usa un despliegue "full" con usuarios del personal
+    INSTALLED_APPS = [
+        "rest_framework",
+        "corsheaders",
+        "flight",
+    ]
+    MIDDLEWARE = [
+        "flight.instrumentation.timing_middleware",
+        "django.middleware.security.SecurityMiddleware",
+        "corsheaders.middleware.CorsMiddleware",
+        "django.middleware.common.CommonMiddleware",
+    ]
+    # Sin autenticación (request.user es None), sin permisos que revisar y solo respuestas y cuerpos JSON
+    REST_FRAMEWORK = {
+        "DEFAULT_AUTHENTICATION_CLASSES": [],
+        "DEFAULT_PERMISSION_CLASSES": [],
+        "DEFAULT_RENDERER_CLASSES": ["flight.renderers.FastJSONRenderer"],
+        "DEFAULT_PARSER_CLASSES": ["rest_framework.parsers.JSONParser"],
+        "UNAUTHENTICATED_USER": None,
+    }
+
+# Documentación Swagger en /swagger/ (flight/docs.py); en los despliegues solo de API se puede dejar fuera
+CHECKIN_API_DOCS = env.bool("CHECKIN_API_DOCS", default=CHECKIN_PROFILE == "full")
+if CHECKIN_API_DOCS:
+    INSTALLED_APPS.insert(INSTALLED_APPS.index("rest_framework"), "drf_yasg")
+
 ROOT_URLCONF = "checkin.urls"
 
 TEMPLATES = [
@@ -92,15 +131,43 @@ WSGI_APPLICATION = "checkin.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.mysql",
+        "ENGINE": env("DB_ENGINE", default="django.db.backends.mysql"),
         "NAME": env("DB_NAME"),
-        "USER": env("DB_USER"),
-        "PASSWORD": env("DB_PASSWORD"),
-        "HOST": env("DB_HOST"),
-        "PORT": env("DB_PORT"),
+        "USER": env("DB_USER", default=""),
+        "PASSWORD": env("DB_PASSWORD", default=""),
+        "HOST": env("DB_HOST", default=""),
+        "PORT": env("DB_PORT", default=""),
     },
 }
 
+# Pool de conexiones persistentes (django-db-connection-pool) para MySQL, PostgreSQL y Oracle.
+# Django devuelve la conexión al pool al terminar cada solicitud en lugar de cerrarla. PRE_PING
+# descarta las conexiones que el servidor cortó por inactividad antes de entregarlas.
+POOLED_DB_ENGINES = {
+    "django.db.backends.mysql": "checkin.db_pool.mysql",
+    "django.db.backends.postgresql": "checkin.db_pool.postgresql",
+    "django.db.backends.oracle": "checkin.db_pool.oracle",
+}
+
+if env.bool("DB_POOL", default=True) and DATABASES["default"]["ENGINE"] in POOLED_DB_ENGINES:
+    DATABASES["default"]["ENGINE"] = POOLED_DB_ENGINES[DATABASES["default"]["ENGINE"]]
+    DATABASES["default"]["POOL_OPTIONS"] = {
+        "POOL_SIZE": env.int("DB_POOL_SIZE", default=10),
+        "MAX_OVERFLOW": env.int("DB_POOL_MAX_OVERFLOW", default=10),
+        "RECYCLE": env.int("DB_POOL_RECYCLE", default=900),  # segundos
+        "PRE_PING": env.bool("DB_POOL_PRE_PING", default=True),
+        "TIMEOUT": env.int("DB_POOL_TIMEOUT", default=30),  # segundos de espera por una conexión libre
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = env.int("DB_CONN_MAX_AGE", default=0)
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Expone GET /stats/db-pool con el estado del pool de conexiones de cada worker
+DB_POOL_STATS = env.bool("DB_POOL_STATS", default=False)
+
+# Las tablas son de solo lectura (managed = False); el runner las crea en la base de datos de pruebas
+TEST_RUNNER = "checkin.test_runner.UnmanagedModelTestRunner"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -146,3 +213,73 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 CORS_ALLOW_ALL_ORIGINS = True
+
+# Cache de Django (locmem por defecto; por ejemplo filecache:///var/tmp/checkin o redis://host:6379/1)
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
+# Cache de mapas de asientos por avión en cada worker
+SEAT_MAP_CACHE_SIZE = env.int("SEAT_MAP_CACHE_SIZE", default=128)
+SEAT_MAP_CACHE_TTL = env.int("SEAT_MAP_CACHE_TTL", default=0)  # segundos, 0 = sin expiración
+SEAT_MAP_CACHE_ALIAS = "default"  # cache de Django donde se guardan las marcas de invalidación
+# Directorio de los archivos de marca con que manage.py invalidate_seat_maps avisa a los workers del
+# servidor aunque el cache de Django sea del proceso (locmem), "" = solo marcas en el cache
+SEAT_MAP_GENERATION_DIR = env("SEAT_MAP_GENERATION_DIR", default=str(BASE_DIR / ".seat-map-generation"))
+# Segundos entre lecturas de las marcas de invalidación de cada avión en un worker
+SEAT_MAP_GENERATION_CHECK_INTERVAL = env.float("SEAT_MAP_GENERATION_CHECK_INTERVAL", default=1.0)
+# Archivo binario con los mapas de asientos de la flota (manage.py build_seat_map_store), "" = desde la base de datos
+SEAT_MAP_STORE = env("SEAT_MAP_STORE", default="")
+
+# Estrategia de asignación de asientos: "reference" (la original) o "block" (grupos en tramos contiguos)
+SEAT_ASSIGNMENT_ENGINE = env("SEAT_ASSIGNMENT_ENGINE", default="reference")
+
+# Cantidad máxima de vuelos por llamada a POST /flights/passengers:batch
+CHECKIN_BATCH_MAX_FLIGHTS = env.int("CHECKIN_BATCH_MAX_FLIGHTS", default=500)
+
+# Procesos para repartir la asignación de asientos en las simulaciones de varios vuelos (1 = sin pool)
+CHECKIN_WORKERS = env.int("CHECKIN_WORKERS", default=1)
+# Máximo de procesos que se puede pedir en POST /flights/passengers:batch ("workers")
+CHECKIN_MAX_WORKERS = env.int("CHECKIN_MAX_WORKERS", default=os.cpu_count() or 1)
+
+# Política de reintentos compartida por las consultas de cada solicitud y circuit breaker de la base de datos
+DB_RETRY_ATTEMPTS = env.int("DB_RETRY_ATTEMPTS", default=5)  # intentos fallidos por solicitud
+DB_RETRY_DEADLINE = env.float("DB_RETRY_DEADLINE", default=5.0)  # segundos desde el primer error
+DB_RETRY_INITIAL_WAIT = env.float("DB_RETRY_INITIAL_WAIT", default=0.1)
+DB_RETRY_MAX_WAIT = env.float("DB_RETRY_MAX_WAIT", default=1.0)
+DB_CIRCUIT_FAILURE_THRESHOLD = env.int("DB_CIRCUIT_FAILURE_THRESHOLD", default=5)
+DB_CIRCUIT_RESET_TIMEOUT = env.float("DB_CIRCUIT_RESET_TIMEOUT", default=30.0)
+
+# Despliegue ASGI: vista asíncrona de pasajeros y executor de la asignación. Por defecto la vista
+# asíncrona se usa solo al cargar checkin/asgi.py (CHECKIN_ASGI)
+CHECKIN_ASYNC = env.bool("CHECKIN_ASYNC", default=env.bool("CHECKIN_ASGI", default=False))
+ASYNC_ASSIGNMENT_EXECUTOR = env("ASYNC_ASSIGNMENT_EXECUTOR", default="thread")  # "thread" o "process"
+ASYNC_ASSIGNMENT_WORKERS = env.int("ASYNC_ASSIGNMENT_WORKERS", default=os.cpu_count() or 1)
+
+# Cache de las simulaciones de GET /flights/<id>/passengers, por vuelo y versión de sus datos
+RESPONSE_CACHE = env.bool("RESPONSE_CACHE", default=True)
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = env.int("RESPONSE_CACHE_TIMEOUT", default=300)  # segundos
+
+# Medición por fases de cada solicitud de check-in (flight/instrumentation.py)
+CHECKIN_SERVER_TIMING = env.bool("CHECKIN_SERVER_TIMING", default=True)  # cabecera Server-Timing
+CHECKIN_TIMING_LOG = env.bool("CHECKIN_TIMING_LOG", default=True)  # una línea JSON por solicitud en "flight.timing"
+CHECKIN_METRICS = env.bool("CHECKIN_METRICS", default=False)  # GET /metrics en formato Prometheus
+
+# Las solicitudes simultáneas de la simulación de un mismo vuelo comparten un solo cálculo en cada worker
+CHECKIN_COALESCE = env.bool("CHECKIN_COALESCE", default=True)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "plain": {"format": "%(asctime)s %(levelname)s %(name)s %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "plain"},
+    },
+    "loggers": {
+        "flight": {
+            "handlers": ["console"],
+            "level": env("CHECKIN_LOG_LEVEL", default="INFO"),
+        },
+    },
+}
@@ -0,0 +1,35 @@
+from django.apps import apps
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+import logging
+
+
+class UnmanagedModelTestRunner(DiscoverRunner):
+    """Runner de pruebas que marca los modelos no administrados como administrados para crear sus tablas en la base de datos de pruebas."""
+
+    def setup_test_environment(self, *args, **kwargs):
+        self.unmanaged_models = [
+            model for model in apps.get_models() if not model._meta.managed
+        ]
+        for model in self.unmanaged_models:
+            model._meta.managed = True
+        # Las líneas de medición de cada solicitud solo se muestran con --verbosity 2 o más
+        self.timing_logger = logging.getLogger("flight.timing")
+        self.timing_log_level = self.timing_logger.level
+        if self.verbosity < 2:
+            self.timing_logger.setLevel(logging.WARNING)
+        super().setup_test_environment(*args, **kwargs)
+
+    def setup_databases(self, *args, **kwargs):
+        # Sin migraciones, las tablas de las apps se crean directamente desde los modelos
+        migration_modules = {
+            model._meta.app_label: None for model in self.unmanaged_models
+        }
+        with override_settings(MIGRATION_MODULES=migration_modules):
+            return super().setup_databases(*args, **kwargs)
+
+    def teardown_test_environment(self, *args, **kwargs):
+        super().teardown_test_environment(*args, **kwargs)
+        self.timing_logger.setLevel(self.timing_log_level)
+        for model in self.unmanaged_models:
+            model._meta.managed = False
@@ -13,34 +13,31 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
 from django.urls import path, include
-from .views import ApiRootView
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-from rest_framework import permissions
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Airline Check-In Simulation API",
-        default_version="v1",
-        description="API to perform an automatic check-in simulation for Andes Airlines passengers.",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="gefferson.casasola@gmail.com"),
-        license=openapi.License(name="MIT License"),
-    ),
-    public=True,
-    permission_classes=[permissions.AllowAny],
-)
+from django.conf import settings
+from flight.docs import swagger_view
+from .views import ApiRootView, DatabasePoolStatsView, MetricsView
 
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
     path("flights/", include("flight.urls")),
     path("", ApiRootView.as_view(), name="api-root"),
-    path(
-        "swagger/",
-        schema_view.with_ui("swagger", cache_timeout=0),
-        name="schema-swagger-ui",
-    ),
 ]
+
+# El perfil "api" no instala el admin; se sirve desde un despliegue con el perfil "full"
+if settings.CHECKIN_PROFILE == "full":
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path("admin/", admin.site.urls))
+
+# drf_yasg se importa y el esquema se genera recién en la primera solicitud a /swagger/
+if settings.CHECKIN_API_DOCS:
+    urlpatterns.append(path("swagger/", swagger_view, name="schema-swagger-ui"))
+
+if settings.DB_POOL_STATS:
+    urlpatterns.append(
+        path("stats/db-pool", DatabasePoolStatsView.as_view(), name="db-pool-stats")
+    )
+
+if settings.CHECKIN_METRICS:
+    urlpatterns.append(path("metrics", MetricsView.as_view(), name="metrics"))
@@ -1,8 +1,15 @@
 from rest_framework.views import APIView
-from drf_yasg.utils import swagger_auto_schema
+from rest_framework.response import Response
 
+from django.http import HttpResponse
 from django.shortcuts import redirect
+from django.urls import get_script_prefix
+from django.views import View
+from flight.coalescing import coalescing_stats
+from flight.docs import swagger_auto_schema
+from flight.instrumentation import phase_metrics
 from .service import route_redirection
+from .db_pool import pool_stats
 
 
 class ApiRootView(APIView):
@@ -13,9 +20,27 @@ class ApiRootView(APIView):
         },
     )
     def get(self, request, format=None):
-        try:
-            url_with_id = route_redirection()
+        return redirect(get_script_prefix() + route_redirection())
 
-        except ModuleNotFoundError:
-            pass
-        return redirect(url_with_id)
+
+class DatabasePoolStatsView(APIView):
+    @swagger_auto_schema(
+        operation_description="Connection pool state and checkout statistics of the worker that serves the request",
+        responses={
+            200: "Successful response",
+        },
+    )
+    def get(self, request, format=None):
+        return Response({"code": 200, "data": pool_stats()})
+
+
+class MetricsView(View):
+    """Métricas por fase de las solicitudes de check-in y contadores de simulaciones agrupadas del worker que atiende la solicitud, en formato Prometheus."""
+
+    http_method_names = ["get"]
+
+    def get(self, request):
+        return HttpResponse(
+            phase_metrics.exposition() + coalescing_stats.exposition(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'checkin.settings')
 
 application = get_wsgi_application()
+
+# Carga las rutas y resuelve la redirección de "/" al iniciar el worker y no en la primera solicitud
+from .service import route_redirection  # noqa: E402
+
+route_redirection()
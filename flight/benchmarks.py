@@ -0,0 +1,487 @@
+"""Benchmarks de la simulación de check-in sobre aviones y vuelos sintéticos en SQLite.
+
+No se ejecutan con el resto de las pruebas; se piden por nombre:
+
+    DB_ENGINE=django.db.backends.sqlite3 DB_NAME=benchmark.sqlite3 python manage.py test flight.benchmarks
+
+Cada medición guarda la cantidad de consultas, el mejor tiempo de varias ejecuciones y el pico de
+memoria (tracemalloc), y falla si las consultas o la memoria empeoran respecto de
+benchmarks_baseline.json más allá de la tolerancia. Los tiempos de la línea base son de una máquina
+en particular, por eso solo se comparan con BENCHMARK_CHECK_TIME=1 (en la misma máquina donde se
+guardó la línea base); si no, solo se informan. Con BENCHMARK_UPDATE_BASELINE=1 se reescribe la
+línea base con los resultados actuales.
+
+StartupBenchmark mide el arranque de un worker en procesos nuevos, con y sin la documentación Swagger
+(CHECKIN_API_DOCS), y RequestOverheadBenchmark el costo de cada solicitud con los perfiles "full" y "api"
+(CHECKIN_PROFILE); ambos solo informan los tiempos.
+"""
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from django.core.cache import cache
+from django.db import connection
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from .models import Airplane, BoardingPass, Flight, Passenger, Purchase, Seat, SeatType
+from .service import (
+    flight_data,
+    list_of_available_seat_type_ids,
+    seat_map_cache,
+    seats_distribution,
+)
+
+BASELINE_PATH = Path(__file__).with_name("benchmarks_baseline.json")
+# Aumento permitido sobre la línea base: tiempo +100 % (y al menos 2 ms), memoria +25 %
+TIME_TOLERANCE = float(os.environ.get("BENCHMARK_TIME_TOLERANCE", 1.0))
+# Los tiempos absolutos dependen de la máquina; solo se comparan si se pide
+CHECK_TIME = os.environ.get("BENCHMARK_CHECK_TIME", "") not in ("", "0", "False", "false")
+TIME_FLOOR = 0.002
+MEMORY_TOLERANCE = float(os.environ.get("BENCHMARK_MEMORY_TOLERANCE", 0.25))
+REPEAT = int(os.environ.get("BENCHMARK_REPEAT", 5))
+
+# Distribución de cada avión: (tipo de asiento, filas, columnas); una letra que falta es un pasillo
+AIRPLANE_LAYOUTS = {
+    "narrow-body": [(1, 3, "ACEG"), (2, 5, "ABCEFG"), (3, 22, "ABCEFG")],  # 174 asientos
+    "wide-body": [(1, 5, "ABFGJK"), (2, 8, "ABCEFGHJK"), (3, 40, "ABCEFGHJK")],  # 462 asientos
+    "jumbo": [(1, 8, "ABFGJK"), (2, 14, "ABCEFGHJK"), (3, 110, "ABCEFGHJK")],  # 1164 asientos
+}
+
+# (nombre, avión, ocupación, fracción de pasajeros que viajan en familia, fracción de menores en las familias)
+SCENARIOS = [
+    ("narrow-families", "narrow-body", 0.95, 0.6, 0.3),
+    ("wide-mixed", "wide-body", 0.9, 0.4, 0.25),
+    ("jumbo-solo", "jumbo", 0.9, 0.1, 0.1),
+    ("jumbo-families", "jumbo", 0.95, 0.7, 0.4),
+]
+
+
+class SyntheticData:
+    """Clase que crea aviones, vuelos y tarjetas de embarque sintéticos con ids consecutivos y una semilla fija."""
+
+    def __init__(self, seed: int = 7) -> None:
+        self.random = random.Random(seed)
+        self.seat_id = 0
+        self.passenger_id = 0
+        self.purchase_id = 0
+
+    def create_airplane(self, airplane_id: int, layout: str) -> dict:
+        """Método que crea el avión y sus asientos y retorna los ids de asientos por tipo de asiento."""
+        Airplane.objects.create(airplane_id=airplane_id, name=f"{layout}-{airplane_id}")
+        seats = []
+        seat_ids_by_type = {}
+        seat_row = 0
+        for seat_type_id, rows, columns in AIRPLANE_LAYOUTS[layout]:
+            for _ in range(rows):
+                seat_row += 1
+                for seat_column in columns:
+                    self.seat_id += 1
+                    seats.append(
+                        Seat(
+                            seat_id=self.seat_id,
+                            seat_column=seat_column,
+                            seat_row=seat_row,
+                            seat_type_id=seat_type_id,
+                            airplane_id=airplane_id,
+                        )
+                    )
+                    seat_ids_by_type.setdefault(seat_type_id, []).append(self.seat_id)
+        Seat.objects.bulk_create(seats)
+        return seat_ids_by_type
+
+    def create_flight(
+        self,
+        flight_id: int,
+        layout: str,
+        occupancy: float,
+        family_ratio: float,
+        minor_ratio: float,
+        seated_ratio: float = 0.1,
+    ) -> int:
+        """Método que crea un avión, un vuelo y sus pasajeros y retorna la cantidad de pasajeros.
+
+        Cada clase se llena hasta ``occupancy``; ``family_ratio`` de los pasajeros compra en grupos
+        de 2 a 5 y ``minor_ratio`` de los acompañantes son menores. ``seated_ratio`` de los pasajeros
+        ya tiene asiento.
+        """
+        seat_ids_by_type = self.create_airplane(flight_id, layout)
+        Flight.objects.create(
+            flight_id=flight_id,
+            takeoff_date_time=1688207580,
+            takeoff_airport="Aeropuerto Internacional Arturo Merino Benitez, Chile",
+            landing_date_time=1688221980,
+            landing_airport="Aeropuerto Internacional Jorge Cháve, Perú",
+            airplane_id=flight_id,
+        )
+
+        purchases, passengers, boarding_passes = [], [], []
+        for seat_type_id, seat_ids in seat_ids_by_type.items():
+            free_seat_ids = list(seat_ids)
+            self.random.shuffle(free_seat_ids)
+            remaining = int(len(seat_ids) * occupancy)
+            while remaining:
+                size = self.random.randint(2, 5) if self.random.random() < family_ratio else 1
+                size = min(size, remaining)
+                remaining -= size
+                self.purchase_id += 1
+                purchases.append(Purchase(purchase_id=self.purchase_id, purchase_date=1688000000))
+                for member in range(size):
+                    self.passenger_id += 1
+                    minor = member > 0 and self.random.random() < minor_ratio
+                    passengers.append(
+                        Passenger(
+                            passenger_id=self.passenger_id,
+                            dni=str(10000000 + self.passenger_id),
+                            name=f"Pasajero {self.passenger_id}",
+                            age=self.random.randint(1, 17) if minor else self.random.randint(18, 80),
+                            country="Chile",
+                        )
+                    )
+                    seated = self.random.random() < seated_ratio
+                    boarding_passes.append(
+                        BoardingPass(
+                            boarding_pass_id=self.passenger_id,
+                            purchase_id=self.purchase_id,
+                            passenger_id=self.passenger_id,
+                            seat_type_id=seat_type_id,
+                            seat_id=free_seat_ids.pop() if seated else None,
+                            flight_id=flight_id,
+                        )
+                    )
+
+        Purchase.objects.bulk_create(purchases)
+        Passenger.objects.bulk_create(passengers)
+        BoardingPass.objects.bulk_create(boarding_passes)
+        return len(boarding_passes)
+
+
+class QueryCounter:
+    """Clase que cuenta las consultas ejecutadas en la conexión; a diferencia de CaptureQueriesContext no se reinicia
+    con la señal request_started de cada solicitud del cliente de pruebas.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(function, repeat: int = REPEAT) -> dict:
+    """Función que ejecuta la función y retorna sus consultas, su mejor tiempo de ``repeat`` ejecuciones y su pico de memoria.
+
+    La primera ejecución es de calentamiento (mapas de asientos en cache), como en un worker que ya
+    atendió solicitudes.
+    """
+    function()
+    queries = QueryCounter()
+    with connection.execute_wrapper(queries):
+        function()
+
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "queries": queries.count,
+        "seconds": round(min(seconds), 6),
+        "peakKiB": round(peak / 1024, 1),
+    }
+
+
+def regressions(result: dict, baseline: dict, check_time: bool = CHECK_TIME) -> list:
+    """Función que compara una medición con su línea base y retorna la descripción de lo que empeoró; el tiempo solo se compara con ``check_time``."""
+    problems = []
+    if result["queries"] > baseline["queries"]:
+        problems.append(f"consultas {baseline['queries']} -> {result['queries']}")
+    allowed_seconds = max(
+        baseline["seconds"] * (1 + TIME_TOLERANCE), baseline["seconds"] + TIME_FLOOR
+    )
+    if check_time and result["seconds"] > allowed_seconds:
+        problems.append(f"tiempo {baseline['seconds']:.6f} s -> {result['seconds']:.6f} s")
+    if result["peakKiB"] > baseline["peakKiB"] * (1 + MEMORY_TOLERANCE):
+        problems.append(f"memoria {baseline['peakKiB']} KiB -> {result['peakKiB']} KiB")
+    return problems
+
+
+@override_settings(RESPONSE_CACHE=False)
+class CheckInBenchmark(TestCase):
+    """Mide el camino principal de la simulación en cada escenario sintético y lo compara con la línea base."""
+
+    results = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        for seat_type_id, name in [(1, "first"), (2, "premium"), (3, "economy")]:
+            SeatType.objects.create(seat_type_id=seat_type_id, name=name)
+        synthetic_data = SyntheticData()
+        cls.flights = {}
+        for flight_id, (name, layout, occupancy, family_ratio, minor_ratio) in enumerate(
+            SCENARIOS, start=1
+        ):
+            passengers = synthetic_data.create_flight(
+                flight_id, layout, occupancy, family_ratio, minor_ratio
+            )
+            cls.flights[name] = (flight_id, passengers)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if not cls.results:
+            return
+        sys.stderr.write("\n{:<40} {:>8} {:>12} {:>12}\n".format("benchmark", "queries", "ms", "peak KiB"))
+        for name, result in sorted(cls.results.items()):
+            sys.stderr.write(
+                f"{name:<40} {result['queries']:>8} {result['seconds'] * 1000:>12.3f} {result['peakKiB']:>12}\n"
+            )
+        if os.environ.get("BENCHMARK_UPDATE_BASELINE"):
+            BASELINE_PATH.write_text(json.dumps(cls.results, indent=2, sort_keys=True) + "\n")
+            sys.stderr.write(f"Línea base guardada en {BASELINE_PATH}\n")
+
+    def setUp(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Los benchmarks se ejecutan sobre SQLite (DB_ENGINE=django.db.backends.sqlite3)")
+        seat_map_cache.invalidate()
+        cache.clear()
+        self.baseline = (
+            json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        )
+
+    def check(self, name: str, function) -> None:
+        result = measure(function)
+        self.results[name] = result
+        if os.environ.get("BENCHMARK_UPDATE_BASELINE") or name not in self.baseline:
+            return
+        with self.subTest(name):
+            problems = regressions(result, self.baseline[name])
+            self.assertFalse(problems, f"{name} empeoró: {', '.join(problems)}")
+
+    def run_scenario(self, scenario: str) -> None:
+        flight_id, _ = self.flights[scenario]
+        data = flight_data(flight_id)
+        url = reverse("flight-passengers", kwargs={"id": flight_id})
+        self.assertEqual(self.client.get(url).json()["code"], 200)
+
+        self.check(f"{scenario}:flight_data", lambda: flight_data(flight_id))
+        self.check(
+            f"{scenario}:list_of_available_seat_type_ids",
+            lambda: [list_of_available_seat_type_ids(seat_type_id, data) for seat_type_id in (1, 2, 3)],
+        )
+        self.check(f"{scenario}:seats_distribution", lambda: seats_distribution(flight_id))
+        self.check(f"{scenario}:AirlineCheckInView", lambda: self.client.get(url))
+
+    def test_narrow_families(self):
+        self.run_scenario("narrow-families")
+
+    def test_wide_mixed(self):
+        self.run_scenario("wide-mixed")
+
+    def test_jumbo_solo(self):
+        self.run_scenario("jumbo-solo")
+
+    def test_jumbo_families(self):
+        self.run_scenario("jumbo-families")
+
+
+# Se ejecuta en un proceso nuevo: imprime en JSON los tiempos del arranque del worker WSGI
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter()
+from checkin.wsgi import application
+boot = time.perf_counter()
+result = {
+    "importMs": (setup - start) * 1000,
+    "bootMs": (boot - setup) * 1000,
+    "modules": len(sys.modules),
+    "docsLoaded": "drf_yasg.views" in sys.modules,
+}
+from django.conf import settings
+if settings.CHECKIN_API_DOCS:
+    from django.test import Client
+    client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+    for name in ("firstSwaggerMs", "swaggerMs"):
+        start = time.perf_counter()
+        assert client.get("/swagger/", {"format": "openapi"}).status_code == 200
+        result[name] = (time.perf_counter() - start) * 1000
+print(json.dumps(result))
+"""
+
+
+class StartupBenchmark(SimpleTestCase):
+    """Mide el arranque de un worker: import de Django y de las apps, carga de las rutas y la primera solicitud a /swagger/."""
+
+    def run_worker(self, api_docs: bool) -> dict:
+        """Método que arranca ``REPEAT`` procesos y retorna el mejor tiempo de cada medición."""
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE="checkin.settings", CHECKIN_API_DOCS=str(api_docs))
+        runs = []
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            output = subprocess.run(
+                [sys.executable, "-W", "ignore", "-c", STARTUP_SCRIPT],
+                cwd=settings.BASE_DIR,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            result = json.loads(output)
+            result["processMs"] = (time.perf_counter() - start) * 1000
+            runs.append(result)
+        return {
+            name: min(run[name] for run in runs) if isinstance(runs[0][name], float) else runs[0][name]
+            for name in runs[0]
+        }
+
+    def test_startup(self):
+        results = {"docs": self.run_worker(True), "api-only": self.run_worker(False)}
+        columns = ["processMs", "importMs", "bootMs", "modules", "firstSwaggerMs", "swaggerMs"]
+        sys.stderr.write("\n{:<12}".format("startup") + "".join(f"{column:>16}" for column in columns) + "\n")
+        for name, result in results.items():
+            sys.stderr.write(
+                f"{name:<12}"
+                + "".join(
+                    f"{result.get(column, '-'):>16}" if not isinstance(result.get(column), float)
+                    else f"{result[column]:>16.1f}"
+                    for column in columns
+                )
+                + "\n"
+            )
+
+        # drf_yasg se carga recién con la primera solicitud a /swagger/, y nunca sin CHECKIN_API_DOCS
+        self.assertFalse(results["docs"]["docsLoaded"])
+        self.assertFalse(results["api-only"]["docsLoaded"])
+        self.assertLess(results["api-only"]["modules"], results["docs"]["modules"])
+
+
+# Se ejecuta en un proceso nuevo con cada perfil: "build" crea las tablas y un vuelo sintético en la base
+# de datos SQLite de DB_NAME; "measure" mide solicitudes llamando directamente a la aplicación WSGI
+REQUEST_OVERHEAD_SCRIPT = """
+import hashlib, json, sys, time
+from wsgiref.util import setup_testing_defaults
+from checkin.wsgi import application
+from django.conf import settings
+
+if sys.argv[1] == "build":
+    from django.apps import apps
+    from django.db import connection
+    from flight.benchmarks import SyntheticData
+    from flight.models import SeatType
+
+    with connection.schema_editor() as editor:
+        for model in apps.get_app_config("flight").get_models():
+            editor.create_model(model)
+    for seat_type_id, name in [(1, "first"), (2, "premium"), (3, "economy")]:
+        SeatType.objects.create(seat_type_id=seat_type_id, name=name)
+    SyntheticData().create_flight(1, "narrow-body", 0.9, 0.4, 0.25)
+    sys.exit()
+
+def request(path):
+    environ = {"PATH_INFO": path, "HTTP_HOST": settings.ALLOWED_HOSTS[0]}
+    setup_testing_defaults(environ)
+    statuses = []
+    response = application(environ, lambda status, headers: statuses.append(status))
+    body = b"".join(response)
+    response.close()
+    return statuses[0], body
+
+rounds, requests = int(sys.argv[2]), int(sys.argv[3])
+result = {"middleware": len(settings.MIDDLEWARE), "modules": len(sys.modules)}
+for name, path in (("rootUs", "/"), ("passengersUs", "/flights/1/passengers")):
+    status, body = request(path)  # calentamiento: mapa de asientos y cache de respuestas
+    result[name.replace("Us", "Status")] = status
+    result[name.replace("Us", "Sha")] = hashlib.sha256(body).hexdigest()
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(requests):
+            request(path)
+        seconds = (time.perf_counter() - start) / requests
+        best = seconds if best is None else min(best, seconds)
+    result[name] = best * 1e6
+print(json.dumps(result))
+"""
+
+
+class RequestOverheadBenchmark(SimpleTestCase):
+    """Mide el costo de cada solicitud con el perfil completo y con el perfil solo de API (CHECKIN_PROFILE).
+
+    Se miden GET / (vista de DRF sin consultas) y GET /flights/1/passengers con la respuesta en cache (una
+    consulta), donde casi todo el tiempo es de middleware, DRF y Django.
+    """
+
+    REQUESTS = int(os.environ.get("BENCHMARK_REQUESTS", 200))
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp(prefix="checkin-overhead-")
+        cls.env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE="checkin.settings",
+            DB_ENGINE="django.db.backends.sqlite3",
+            DB_NAME=os.path.join(cls.directory, "overhead.sqlite3"),
+            CACHE_URL="locmemcache://",
+            RESPONSE_CACHE="True",
+            CHECKIN_TIMING_LOG="False",
+            CHECKIN_METRICS="False",
+        )
+        cls.run_script("full", "build")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def run_script(cls, profile: str, *args) -> str:
+        return subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", REQUEST_OVERHEAD_SCRIPT, *args],
+            cwd=settings.BASE_DIR,
+            env=dict(cls.env, CHECKIN_PROFILE=profile),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+
+    def test_request_overhead(self):
+        results = {
+            profile: json.loads(self.run_script(profile, "measure", str(REPEAT), str(self.REQUESTS)))
+            for profile in ("full", "api")
+        }
+        columns = ["middleware", "modules", "rootUs", "passengersUs"]
+        sys.stderr.write("\n{:<12}".format("profile") + "".join(f"{column:>16}" for column in columns) + "\n")
+        for name, result in results.items():
+            sys.stderr.write(
+                f"{name:<12}"
+                + "".join(
+                    f"{result[column]:>16.1f}" if isinstance(result[column], float) else f"{result[column]:>16}"
+                    for column in columns
+                )
+                + "\n"
+            )
+
+        # El perfil no cambia las respuestas de la API
+        for key in ("rootStatus", "passengersStatus", "passengersSha"):
+            self.assertEqual(results["full"][key], results["api"][key], key)
+        self.assertTrue(results["api"]["passengersStatus"].startswith("200"))
+        self.assertLess(results["api"]["middleware"], results["full"]["middleware"])
@@ -0,0 +1,137 @@
+"""
+Agrupación de solicitudes simultáneas de la misma simulación (single-flight) en cada worker.
+
+Cuando llegan varias solicitudes del mismo vuelo al mismo tiempo, solo la primera calcula la simulación
+y las demás esperan ese cálculo y reciben el mismo resultado. Hay una versión para hilos (workers con
+threads de gunicorn) y otra para el event loop (vista asíncrona). El resultado es compartido entre las
+solicitudes agrupadas, por lo que no se debe modificar.
+"""
+
+from typing import Callable, Dict, Hashable
+from .instrumentation import phase
+import asyncio
+import threading
+
+
+class CoalescingStats:
+    """Clase que cuenta, por proceso, las simulaciones calculadas y las solicitudes que esperaron un cálculo en curso."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.computed = 0
+        self.coalesced = 0
+
+    def record(self, coalesced: bool) -> None:
+        with self._lock:
+            if coalesced:
+                self.coalesced += 1
+            else:
+                self.computed += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"computed": self.computed, "coalesced": self.coalesced}
+
+    def exposition(self) -> str:
+        """Método que retorna los contadores en el formato de texto de Prometheus."""
+        stats = self.snapshot()
+        return (
+            "# HELP checkin_simulations_computed_total Simulations computed by this worker.\n"
+            "# TYPE checkin_simulations_computed_total counter\n"
+            f"checkin_simulations_computed_total {stats['computed']}\n"
+            "# HELP checkin_simulations_coalesced_total Requests that shared a simulation already in progress.\n"
+            "# TYPE checkin_simulations_coalesced_total counter\n"
+            f"checkin_simulations_coalesced_total {stats['coalesced']}\n"
+        )
+
+    def reset(self) -> None:
+        with self._lock:
+            self.computed = 0
+            self.coalesced = 0
+
+
+class InFlightCall:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Clase que ejecuta una sola vez las llamadas simultáneas con la misma clave, desde varios hilos."""
+
+    def __init__(self, stats: CoalescingStats) -> None:
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, InFlightCall] = {}
+
+    def call(self, key: Hashable, function: Callable, *args):
+        """Método que retorna el resultado de ``function(*args)``; si hay una llamada en curso con la misma clave espera su resultado (o su error)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = InFlightCall()
+        self.stats.record(coalesced=not leader)
+
+        if not leader:
+            with phase("coalesced"):
+                call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function(*args)
+            return call.result
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """Clase equivalente a SingleFlight para corrutinas; las llamadas se agrupan por event loop."""
+
+    def __init__(self, stats: CoalescingStats) -> None:
+        self.stats = stats
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def call(self, key: Hashable, function: Callable, *args):
+        """Método que retorna el resultado de ``await function(*args)``; si hay una llamada en curso con la misma clave espera su resultado (o su error)."""
+        loop = asyncio.get_running_loop()
+        key = (loop, key)
+        future = self._calls.get(key)
+        self.stats.record(coalesced=future is not None)
+
+        if future is not None:
+            with phase("coalesced"):
+                # shield: si se cancela esta solicitud no se cancela el cálculo de las demás
+                return await asyncio.shield(future)
+
+        future = self._calls[key] = loop.create_future()
+        try:
+            result = await function(*args)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            # Evita el aviso de excepción no leída cuando nadie más esperaba el resultado
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+
+coalescing_stats = CoalescingStats()
+simulation_calls = SingleFlight(coalescing_stats)
+async_simulation_calls = AsyncSingleFlight(coalescing_stats)
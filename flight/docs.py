@@ -0,0 +1,106 @@
+"""
+Documentación Swagger de la API con drf_yasg, cargada recién cuando se pide /swagger/.
+
+Las vistas se documentan con ``swagger_auto_schema`` de este módulo, que solo guarda los argumentos:
+drf_yasg (y con él ruamel, uritemplate y los renderers del esquema) no se importa al iniciar el worker.
+La primera solicitud a /swagger/ arma la vista de drf_yasg, registra la documentación guardada y
+genera el esquema, que queda en memoria para las siguientes. Con CHECKIN_API_DOCS=False la ruta no
+existe y drf_yasg no se importa nunca.
+"""
+
+from typing import Callable, Dict, List, Tuple
+import functools
+import inspect
+import threading
+
+# (método de la vista, argumentos de swagger_auto_schema) en el orden en que se definieron
+documented_views: List[Tuple[Callable, Dict]] = []
+
+API_INFO = {
+    "title": "Airline Check-In Simulation API",
+    "default_version": "v1",
+    "description": "API to perform an automatic check-in simulation for Andes Airlines passengers.",
+    "terms_of_service": "https://www.google.com/policies/terms/",
+}
+API_CONTACT_EMAIL = "gefferson.casasola@gmail.com"
+API_LICENSE = "MIT License"
+
+
+def swagger_auto_schema(**kwargs):
+    """Decorador que guarda la documentación de un método de una vista con los argumentos de drf_yasg.utils.swagger_auto_schema.
+
+    Los argumentos que usan objetos de drf_yasg.openapi se pasan como funciones que reciben el módulo
+    openapi, por ejemplo ``manual_parameters=lambda openapi: [openapi.Parameter(...)]``.
+    """
+
+    def decorator(view_method):
+        documented_views.append((view_method, kwargs))
+        return view_method
+
+    return decorator
+
+
+def register_documented_views() -> None:
+    """Función que aplica el swagger_auto_schema de drf_yasg a los métodos guardados por el decorador de este módulo."""
+    from drf_yasg import openapi
+    from drf_yasg.utils import swagger_auto_schema as yasg_swagger_auto_schema
+
+    for view_method, kwargs in documented_views:
+        yasg_swagger_auto_schema(
+            **{
+                name: value(openapi) if inspect.isfunction(value) else value
+                for name, value in kwargs.items()
+            }
+        )(view_method)
+
+
+@functools.lru_cache(maxsize=None)
+def schema_ui_view() -> Callable:
+    """Función que arma una sola vez, en la primera solicitud, la vista de Swagger de drf_yasg."""
+    from drf_yasg import openapi
+    from drf_yasg.generators import OpenAPISchemaGenerator
+    from drf_yasg.views import get_schema_view
+    from rest_framework import permissions
+
+    register_documented_views()
+
+    class CachedSchemaGenerator(OpenAPISchemaGenerator):
+        """Generador que guarda el esquema por host y versión; el esquema es público y no depende del usuario."""
+
+        schemas: Dict[Tuple, object] = {}
+        lock = threading.Lock()
+
+        def get_schema(self, request=None, public=False):
+            key = (
+                request.build_absolute_uri("/") if request is not None else None,
+                self.version,
+                public,
+            )
+            schema = self.schemas.get(key)
+            if schema is None:
+                with self.lock:
+                    schema = self.schemas.get(key)
+                    if schema is None:
+                        schema = self.schemas[key] = super().get_schema(request, public)
+            return schema
+
+    schema_view = get_schema_view(
+        openapi.Info(
+            contact=openapi.Contact(email=API_CONTACT_EMAIL),
+            license=openapi.License(name=API_LICENSE),
+            **API_INFO,
+        ),
+        public=True,
+        permission_classes=[permissions.AllowAny],
+        generator_class=CachedSchemaGenerator,
+    )
+    return schema_view.with_ui("swagger", cache_timeout=0)
+
+
+def swagger_view(request, *args, **kwargs):
+    """Vista de /swagger/ que delega en la vista de drf_yasg armada en la primera solicitud."""
+    return schema_ui_view()(request, *args, **kwargs)
+
+
+# Igual que las vistas de DRF: el esquema solo se lee con GET
+swagger_view.csrf_exempt = True
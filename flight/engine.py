@@ -0,0 +1,336 @@
+from itertools import islice
+from typing import Dict, List, Tuple
+from django.conf import settings
+from .instrumentation import phase
+from .records import PassengerRecord
+from .seat_map import FreeSeatPool, SeatMap, LEFT, RIGHT, NEIGHBOR_OFFSETS
+
+
+class PassengerGroups:
+    """Clase que agrupa las posiciones de los pasajeros de un vuelo por id de compra."""
+
+    __slots__ = ("passengers", "by_purchase", "adults_by_purchase")
+
+    def __init__(self, passengers: List[PassengerRecord]) -> None:
+        self.passengers = passengers
+        # id de compra -> posiciones de todos sus pasajeros, en el orden del vuelo
+        self.by_purchase: Dict[int, List[int]] = {}
+        # id de compra -> posiciones de sus pasajeros mayores de edad
+        self.adults_by_purchase: Dict[int, List[int]] = {}
+        for position, passenger in enumerate(passengers):
+            self.by_purchase.setdefault(passenger.purchase_id, []).append(position)
+            if passenger.age >= 18:
+                self.adults_by_purchase.setdefault(passenger.purchase_id, []).append(
+                    position
+                )
+
+
+class SeatAssignmentEngine:
+    """Clase base de las estrategias de asignación de asientos.
+
+    ``assign`` recibe el mapa de asientos del avión, los asientos libres por tipo de asiento y los
+    pasajeros agrupados por compra, y completa el ``seat_id`` de los pasajeros que no tienen asiento.
+    """
+
+    name = None
+
+    def assign(
+        self,
+        seat_map: SeatMap,
+        available_seats: Dict[int, FreeSeatPool],
+        groups: PassengerGroups,
+    ) -> None:
+        raise NotImplementedError
+
+    def fill_remaining(
+        self, available_seats: Dict[int, FreeSeatPool], groups: PassengerGroups
+    ) -> None:
+        """Método que asigna el primer asiento libre de su clase a los pasajeros restantes."""
+        for passenger in groups.passengers:
+            if passenger.seat_id == None:
+                empty_seats = available_seats[passenger.seat_type_id]
+                passenger.seat_id = empty_seats.first()
+                empty_seats.remove(passenger.seat_id)
+
+
+class ReferenceEngine(SeatAssignmentEngine):
+    """Estrategia original: recorre los asientos libres y prueba los vecinos de cada uno en un orden fijo.
+
+    Primero se sienta a los menores junto a un adulto de su compra (izquierda o derecha), luego a los
+    adultos junto a sus acompañantes (en las ocho direcciones) y al final a los pasajeros restantes.
+    """
+
+    name = "reference"
+
+    # Direcciones que se prueban para sentar a un menor y a un adulto junto a su acompañante
+    MINOR_DIRECTIONS = (LEFT, RIGHT)
+    ADULT_DIRECTIONS = tuple(range(len(NEIGHBOR_OFFSETS)))
+    # Mínimo de asientos libres en el pool para buscar con SeatGrid (con pocos es más rápido en Python)
+    GRID_MIN_FREE_SEATS = 256
+
+    def assign(self, seat_map, available_seats, groups):
+        passengers = groups.passengers
+
+        # Distribución de asientos para los menores de edad
+        with phase("minors"):
+            for passenger in passengers:
+                if passenger.age < 18 and passenger.seat_id == None:
+                    # Acompañantes mayores de edad sin asiento que tiene el menor de edad
+                    companions = [
+                        passengers[position]
+                        for position in groups.adults_by_purchase.get(passenger.purchase_id, [])
+                        if passengers[position].seat_id == None
+                        and passengers[position].passenger_id != passenger.passenger_id
+                    ]
+                    self.seat_with_companions(
+                        passenger,
+                        companions,
+                        available_seats[passenger.seat_type_id],
+                        seat_map,
+                        self.MINOR_DIRECTIONS,
+                    )
+
+        # Distribución de asientos para adultos que tienen el mismo purchase id
+        with phase("adults"):
+            for passenger in passengers:
+                if passenger.age >= 18 and passenger.seat_id == None:
+                    companions = [
+                        passengers[position]
+                        for position in groups.by_purchase[passenger.purchase_id]
+                        if passengers[position].seat_id == None
+                        and passengers[position].passenger_id != passenger.passenger_id
+                    ]
+                    self.seat_with_companions(
+                        passenger,
+                        companions,
+                        available_seats[passenger.seat_type_id],
+                        seat_map,
+                        self.ADULT_DIRECTIONS,
+                    )
+
+        # Distribución de asientos para los pasajeros restantes
+        with phase("fill"):
+            self.fill_remaining(available_seats, groups)
+
+    def seat_with_companions(
+        self,
+        passenger: PassengerRecord,
+        companions: List[PassengerRecord],
+        empty_seats: FreeSeatPool,
+        seat_map: SeatMap,
+        directions: tuple,
+    ) -> None:
+        """Método que sienta al pasajero en el primer asiento libre que tenga un vecino libre para cada acompañante."""
+        # Como en la versión original, una vez sentado el primer acompañante solo se prueba
+        # el primer asiento libre para los siguientes, lo que mantiene los resultados anteriores
+        assigned = False
+        for companion in companions:
+            if companion.seat_id != None:
+                continue
+            pair = self.free_pair(empty_seats, seat_map, directions, first_only=assigned)
+            if pair:
+                seat_id, neighbor_seat_id = pair
+                if passenger.seat_id == None:
+                    passenger.seat_id = seat_id
+                    empty_seats.remove(seat_id)
+                companion.seat_id = neighbor_seat_id
+                empty_seats.remove(neighbor_seat_id)
+                assigned = True
+
+    def free_pair(
+        self,
+        empty_seats: FreeSeatPool,
+        seat_map: SeatMap,
+        directions: tuple,
+        first_only: bool = False,
+    ) -> Tuple[int, int]:
+        """Método que retorna el primer asiento libre con un vecino libre en alguna de las direcciones y ese vecino, o None.
+
+        Si el avión tiene SeatGrid y quedan muchos asientos libres, después del primer asiento libre
+        el resto del pool se revisa con NumPy en lugar de recorrerlo asiento por asiento.
+        """
+        use_grid = (
+            not first_only
+            and seat_map.grid is not None
+            and len(empty_seats) >= self.GRID_MIN_FREE_SEATS
+        )
+
+        for seat_id in islice(empty_seats, 1 if first_only or use_grid else None):
+            neighbors = seat_map.neighbors[seat_id]
+            for direction in directions:
+                neighbor_seat_id = neighbors[direction]
+                if neighbor_seat_id and neighbor_seat_id in empty_seats:
+                    return seat_id, neighbor_seat_id
+
+        if not use_grid:
+            return None
+        return seat_map.grid.free_pair(empty_seats, directions, empty_seats.head)
+
+
+class RowRuns:
+    """Clase que guarda, para una clase de asientos, los tramos de asientos contiguos de cada fila y el largo del mayor tramo libre.
+
+    Un tramo es una secuencia de asientos de la misma fila y clase sin pasillo entre ellos. Las filas
+    se guardan en cubetas según el largo de su mayor tramo libre, así encontrar un lugar para un grupo
+    solo revisa tantas cubetas como asientos tiene la fila más ancha.
+    """
+
+    def __init__(self, seat_map: SeatMap, seat_type_id: int, empty_seats: FreeSeatPool) -> None:
+        self.empty_seats = empty_seats
+        self.segments: List[List[int]] = []
+        rows: Dict[int, List] = {}
+        for (seat_row, seat_column), seat_id in seat_map.type_positions(seat_type_id):
+            rows.setdefault(seat_row, []).append((seat_column, seat_id))
+
+        for seat_row in sorted(rows):
+            segment = []
+            for _, seat_id in sorted(rows[seat_row]):
+                if segment and seat_map.left(seat_id) != segment[-1]:
+                    self.segments.append(segment)
+                    segment = []
+                segment.append(seat_id)
+            self.segments.append(segment)
+
+        # Largo del mayor tramo libre de cada segmento, con NumPy si el avión tiene SeatGrid
+        if seat_map.grid is not None:
+            self.longest = seat_map.grid.longest_free_runs(empty_seats, self.segments)
+        else:
+            self.longest = [self.longest_run(index) for index in range(len(self.segments))]
+
+        # largo del mayor tramo libre -> índices de los segmentos con ese largo
+        self.buckets: Dict[int, Dict[int, None]] = {}
+        for index, longest in enumerate(self.longest):
+            if longest:
+                self.buckets.setdefault(longest, {})[index] = None
+
+    def free_runs(self, index: int) -> List[List[int]]:
+        """Método que retorna los tramos de asientos libres del segmento."""
+        runs = []
+        run = []
+        for seat_id in self.segments[index]:
+            if seat_id in self.empty_seats:
+                run.append(seat_id)
+            elif run:
+                runs.append(run)
+                run = []
+        if run:
+            runs.append(run)
+        return runs
+
+    def longest_run(self, index: int) -> int:
+        return max((len(run) for run in self.free_runs(index)), default=0)
+
+    def update(self, index: int) -> None:
+        """Método que recalcula el mayor tramo libre del segmento y lo cambia de cubeta."""
+        previous = self.longest[index]
+        if previous:
+            del self.buckets[previous][index]
+        longest = self.longest_run(index)
+        self.longest[index] = longest
+        if longest:
+            self.buckets.setdefault(longest, {})[index] = None
+
+    def take(self, size: int) -> List[int]:
+        """Método que reserva ``size`` asientos contiguos en el tramo libre más ajustado; retorna None si no hay."""
+        for length in sorted(self.buckets):
+            if length >= size and self.buckets[length]:
+                index = next(iter(self.buckets[length]))
+                run = min(
+                    (run for run in self.free_runs(index) if len(run) >= size), key=len
+                )
+                seat_ids = run[:size]
+                for seat_id in seat_ids:
+                    self.empty_seats.remove(seat_id)
+                self.update(index)
+                return seat_ids
+        return None
+
+
+class BlockEngine(SeatAssignmentEngine):
+    """Estrategia que ubica cada grupo de compra completo en un tramo de asientos libres contiguos de una fila.
+
+    Los menores se intercalan con los adultos de su compra para que cada uno quede al lado de al menos
+    un adulto. Si el grupo no cabe en un solo tramo se ubica por partes (un adulto con hasta dos menores)
+    y lo que no cabe recibe el primer asiento libre de su clase.
+    """
+
+    name = "block"
+
+    def assign(self, seat_map, available_seats, groups):
+        passengers = groups.passengers
+        with phase("blocks"):
+            row_runs = {
+                seat_type_id: RowRuns(seat_map, seat_type_id, empty_seats)
+                for seat_type_id, empty_seats in available_seats.items()
+            }
+
+            # Pasajeros sin asiento por compra y tipo de asiento, en el orden del vuelo
+            blocks = []
+            for positions in groups.by_purchase.values():
+                members_by_type = {}
+                for position in positions:
+                    passenger = passengers[position]
+                    if passenger.seat_id == None:
+                        members_by_type.setdefault(passenger.seat_type_id, []).append(
+                            passenger
+                        )
+                blocks.extend(members_by_type.items())
+
+            # Los grupos más grandes se ubican primero para no fragmentar las filas
+            blocks.sort(key=lambda block: len(block[1]), reverse=True)
+
+            for seat_type_id, members in blocks:
+                runs = row_runs[seat_type_id]
+                units = self.units(members)
+                arrangement = [passenger for unit in units for passenger in unit]
+                seat_ids = runs.take(len(arrangement))
+                if seat_ids:
+                    self.seat(arrangement, seat_ids)
+                    continue
+
+                for unit in units:
+                    seat_ids = runs.take(len(unit))
+                    if seat_ids:
+                        self.seat(unit, seat_ids)
+                    elif len(unit) > 2:
+                        # Al menos el primer menor queda junto a su adulto
+                        seat_ids = runs.take(2)
+                        if seat_ids:
+                            self.seat(unit[:2], seat_ids)
+
+        with phase("fill"):
+            self.fill_remaining(available_seats, groups)
+
+    def units(self, members: List[PassengerRecord]) -> List[List[PassengerRecord]]:
+        """Método que divide un grupo en unidades de un adulto con hasta dos menores a sus lados."""
+        adults = [passenger for passenger in members if passenger.age >= 18]
+        minors = [passenger for passenger in members if passenger.age < 18]
+
+        units = []
+        for adult in adults:
+            unit = []
+            if minors and not units:
+                unit.append(minors.pop(0))
+            unit.append(adult)
+            if minors:
+                unit.append(minors.pop(0))
+            units.append(unit)
+        # Menores sin adulto disponible en su clase
+        units.extend([minor] for minor in minors)
+        return units
+
+    def seat(self, passengers: List[PassengerRecord], seat_ids: List[int]) -> None:
+        for passenger, seat_id in zip(passengers, seat_ids):
+            passenger.seat_id = seat_id
+
+
+ENGINES = {engine.name: engine for engine in (ReferenceEngine, BlockEngine)}
+
+
+def get_engine(name: str = None) -> SeatAssignmentEngine:
+    """Función que recibe el nombre de una estrategia de asignación y retorna una instancia; por defecto usa SEAT_ASSIGNMENT_ENGINE."""
+    name = name or settings.SEAT_ASSIGNMENT_ENGINE
+    try:
+        return ENGINES[name]()
+    except KeyError:
+        raise ValueError(f"Estrategia de asignación de asientos desconocida: {name}")
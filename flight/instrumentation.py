@@ -0,0 +1,286 @@
+"""
+Medición por fases de la simulación de check-in en cada solicitud.
+
+Las funciones del camino principal (carga del vuelo, del mapa de asientos, disponibilidad, pasadas de
+asignación y codificación) abren una fase con ``phase(nombre)``. Cada fase acumula su duración, las
+consultas ejecutadas en la conexión del hilo y los reintentos de la política de la base de datos.
+timing_middleware crea la traza de la solicitud y al terminar la entrega como cabecera Server-Timing,
+como una línea de log JSON (logger "flight.timing") y, con CHECKIN_METRICS, en las métricas del proceso
+que expone GET /metrics en formato Prometheus.
+
+Fuera de una solicitud (comandos, procesos del pool) no hay traza y ``phase`` no mide nada.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List
+from django.conf import settings
+from django.db import connection
+from django.utils.decorators import sync_and_async_middleware
+import asyncio
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger("flight.timing")
+
+# Fase a la que se atribuyen los reintentos que ocurren fuera de una fase
+UNKNOWN_PHASE = "db"
+
+
+class PhaseTiming:
+    """Clase que acumula la duración, las consultas y los reintentos de una fase."""
+
+    __slots__ = ("seconds", "queries", "retries")
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+        self.queries = 0
+        self.retries = 0
+
+    def as_dict(self) -> Dict:
+        return {
+            "ms": round(self.seconds * 1000, 3),
+            "queries": self.queries,
+            "retries": self.retries,
+        }
+
+
+class RequestTrace:
+    """Clase que guarda las fases medidas durante una solicitud, en el orden en que se abrieron por primera vez."""
+
+    __slots__ = ("phases", "failed_phase", "start")
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, PhaseTiming] = {}
+        # Última fase que terminó con una excepción; ahí se cuentan los reintentos
+        self.failed_phase = None
+        self.start = time.perf_counter()
+
+    def timing(self, name: str) -> PhaseTiming:
+        timing = self.phases.get(name)
+        if timing is None:
+            timing = self.phases[name] = PhaseTiming()
+        return timing
+
+    def count_query(self, name: str):
+        """Método que retorna un execute_wrapper que cuenta las consultas de la fase."""
+        timing = self.timing(name)
+
+        def wrapper(execute, sql, params, many, context):
+            timing.queries += 1
+            return execute(sql, params, many, context)
+
+        return wrapper
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def server_timing(self) -> str:
+        """Método que retorna el valor de la cabecera Server-Timing con cada fase y el total."""
+        entries = [
+            f'{name};dur={timing.seconds * 1000:.3f};desc="queries={timing.queries} retries={timing.retries}"'
+            for name, timing in self.phases.items()
+        ]
+        entries.append(f"total;dur={self.elapsed() * 1000:.3f}")
+        return ", ".join(entries)
+
+    def as_dict(self) -> Dict:
+        return {name: timing.as_dict() for name, timing in self.phases.items()}
+
+
+current_trace: ContextVar = ContextVar("checkin_request_trace", default=None)
+
+
+@contextmanager
+def measure_phase(trace: RequestTrace, name: str):
+    timing = trace.timing(name)
+    start = time.perf_counter()
+    try:
+        with connection.execute_wrapper(trace.count_query(name)):
+            yield
+    except Exception:
+        trace.failed_phase = name
+        raise
+    finally:
+        timing.seconds += time.perf_counter() - start
+
+
+@contextmanager
+def no_phase():
+    yield
+
+
+def phase(name: str):
+    """Función que retorna un context manager que mide una fase de la solicitud en curso; sin solicitud no mide nada.
+
+    Las fases con el mismo nombre se suman (por ejemplo la codificación de varias partes).
+    """
+    trace = current_trace.get()
+    if trace is None:
+        return no_phase()
+    return measure_phase(trace, name)
+
+
+def record_phase(name: str, seconds: float) -> None:
+    """Función que suma a la solicitud en curso una fase medida en otro proceso."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.timing(name).seconds += seconds
+
+
+def record_retry() -> None:
+    """Función que cuenta un reintento de la base de datos en la fase que falló de la solicitud en curso."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.timing(trace.failed_phase or UNKNOWN_PHASE).retries += 1
+
+
+class PhaseMetrics:
+    """Clase que acumula, por proceso, histogramas de duración y contadores de consultas y reintentos por fase."""
+
+    # Límites superiores de los buckets de los histogramas, en segundos
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.phases: Dict[str, Dict] = {}
+        self.requests: Dict[str, Dict] = {}
+
+    def _histogram(self) -> Dict:
+        return {"buckets": [0] * len(self.BUCKETS), "sum": 0.0, "count": 0}
+
+    def _observe(self, histogram: Dict, seconds: float) -> None:
+        for index, bound in enumerate(self.BUCKETS):
+            if seconds <= bound:
+                histogram["buckets"][index] += 1
+        histogram["sum"] += seconds
+        histogram["count"] += 1
+
+    def observe(self, trace: RequestTrace, status: int, seconds: float) -> None:
+        """Método que agrega las fases de una solicitud terminada."""
+        with self._lock:
+            self._observe(
+                self.requests.setdefault(str(status), self._histogram()), seconds
+            )
+            for name, timing in trace.phases.items():
+                metrics = self.phases.get(name)
+                if metrics is None:
+                    metrics = self.phases[name] = {
+                        "duration": self._histogram(),
+                        "queries": 0,
+                        "retries": 0,
+                    }
+                self._observe(metrics["duration"], timing.seconds)
+                metrics["queries"] += timing.queries
+                metrics["retries"] += timing.retries
+
+    def _histogram_lines(self, metric: str, label: str, histograms: Dict) -> List[str]:
+        lines = []
+        for value, histogram in sorted(histograms.items()):
+            for bound, count in zip(self.BUCKETS, histogram["buckets"]):
+                lines.append(f'{metric}_bucket{{{label}="{value}",le="{bound}"}} {count}')
+            lines.append(f'{metric}_bucket{{{label}="{value}",le="+Inf"}} {histogram["count"]}')
+            lines.append(f'{metric}_sum{{{label}="{value}"}} {histogram["sum"]:.6f}')
+            lines.append(f'{metric}_count{{{label}="{value}"}} {histogram["count"]}')
+        return lines
+
+    def exposition(self) -> str:
+        """Método que retorna las métricas en el formato de texto de Prometheus."""
+        with self._lock:
+            lines = [
+                "# HELP checkin_request_duration_seconds Duration of the requests with check-in phases.",
+                "# TYPE checkin_request_duration_seconds histogram",
+                *self._histogram_lines(
+                    "checkin_request_duration_seconds", "status", self.requests
+                ),
+                "# HELP checkin_phase_duration_seconds Duration of each check-in phase per request.",
+                "# TYPE checkin_phase_duration_seconds histogram",
+                *self._histogram_lines(
+                    "checkin_phase_duration_seconds",
+                    "phase",
+                    {name: metrics["duration"] for name, metrics in self.phases.items()},
+                ),
+                "# HELP checkin_phase_queries_total Database queries executed in each check-in phase.",
+                "# TYPE checkin_phase_queries_total counter",
+            ]
+            for name, metrics in sorted(self.phases.items()):
+                lines.append(f'checkin_phase_queries_total{{phase="{name}"}} {metrics["queries"]}')
+            lines.extend(
+                [
+                    "# HELP checkin_phase_retries_total Database retries in each check-in phase.",
+                    "# TYPE checkin_phase_retries_total counter",
+                ]
+            )
+            for name, metrics in sorted(self.phases.items()):
+                lines.append(f'checkin_phase_retries_total{{phase="{name}"}} {metrics["retries"]}')
+            return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self.phases.clear()
+            self.requests.clear()
+
+
+phase_metrics = PhaseMetrics()
+
+
+def finish_trace(trace: RequestTrace, request, response) -> None:
+    """Función que entrega la traza de una solicitud terminada: cabecera Server-Timing, log y métricas."""
+    if not trace.phases:
+        return
+    seconds = trace.elapsed()
+    if settings.CHECKIN_SERVER_TIMING:
+        response["Server-Timing"] = trace.server_timing()
+    if settings.CHECKIN_TIMING_LOG and logger.isEnabledFor(logging.INFO):
+        logger.info(
+            json.dumps(
+                {
+                    "event": "checkin.timing",
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "totalMs": round(seconds * 1000, 3),
+                    "queries": sum(timing.queries for timing in trace.phases.values()),
+                    "retries": sum(timing.retries for timing in trace.phases.values()),
+                    "phases": trace.as_dict(),
+                },
+                separators=(",", ":"),
+            )
+        )
+    if settings.CHECKIN_METRICS:
+        phase_metrics.observe(trace, response.status_code, seconds)
+
+
+@sync_and_async_middleware
+def timing_middleware(get_response):
+    """Middleware que mide las fases de cada solicitud; las solicitudes sin fases (admin, swagger, estáticos) no se reportan.
+
+    Con ``?stream=1`` solo se reportan las fases anteriores al primer byte.
+    """
+    if asyncio.iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            trace = RequestTrace()
+            token = current_trace.set(trace)
+            try:
+                response = await get_response(request)
+            finally:
+                current_trace.reset(token)
+            finish_trace(trace, request, response)
+            return response
+
+    else:
+
+        def middleware(request):
+            trace = RequestTrace()
+            token = current_trace.set(trace)
+            try:
+                response = get_response(request)
+            finally:
+                current_trace.reset(token)
+            finish_trace(trace, request, response)
+            return response
+
+    return middleware
@@ -0,0 +1,81 @@
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from flight.renderers import FastJSONRenderer, dumps
+
+
+def synthetic_simulation(passengers: int) -> dict:
+    """Función que retorna el cuerpo de una simulación con la forma de la API y la cantidad de pasajeros indicada."""
+    return {
+        "code": 200,
+        "data": {
+            "flightId": 1,
+            "takeoffDateTime": 1688207580,
+            "takeoffAirport": "Aeropuerto Internacional Arturo Merino Benitez, Chile",
+            "landingDateTime": 1688221980,
+            "landingAirport": "Aeropuerto Internacional Jorge Cháve, Perú",
+            "airplaneId": 2,
+            "passengers": [
+                {
+                    "passengerId": index,
+                    "dni": 10000000 + index,
+                    "name": f"Pasajero {index}",
+                    "age": 5 + index % 70,
+                    "country": "Perú" if index % 3 else "Chile",
+                    "boardingPassId": index,
+                    "purchaseId": index // 3,
+                    "seatTypeId": 1 + index % 3,
+                    "seatId": index,
+                }
+                for index in range(1, passengers + 1)
+            ],
+        },
+    }
+
+
+def stdlib_dumps(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara los bytes por segundo al renderizar una simulación con el JSONRenderer de DRF, "
+        "con FastJSONRenderer y con un cuerpo ya codificado (acierto del cache de respuestas)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--passengers",
+            type=int,
+            nargs="+",
+            default=[500, 5000],
+            help="Cantidades de pasajeros a medir.",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=50, help="Veces que se renderiza cada cuerpo."
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat debe ser mayor o igual a 1.")
+
+        fast = FastJSONRenderer()
+        renderers = [
+            ("DRF JSONRenderer", JSONRenderer().render),
+            ("json (fallback)", stdlib_dumps),
+            ("FastJSONRenderer", fast.render),
+        ]
+
+        for passengers in options["passengers"]:
+            body = synthetic_simulation(passengers)
+            encoded = dumps(body)
+            self.stdout.write(f"{passengers} pasajeros ({len(encoded)} bytes)")
+            for name, render in renderers + [("pre-encoded bytes", lambda _: fast.render(encoded))]:
+                start = time.perf_counter()
+                for _ in range(options["repeat"]):
+                    size = len(render(body))
+                seconds = (time.perf_counter() - start) / options["repeat"]
+                self.stdout.write(
+                    f"  {name:<20} {seconds * 1000:9.3f} ms  {size / seconds / 1e6:10.1f} MB/s"
+                )
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from flight.models import Airplane
+from flight.seat_map_store import write_seat_map_store
+from flight.service import (
+    BULK_QUERY_CHUNK_SIZE,
+    airplanes_seats,
+    invalidate_seat_maps,
+    iter_chunks,
+    shared_seat_map_invalidation,
+)
+import os
+
+
+def fleet_seats(chunk_size: int):
+    """Función que retorna tuplas (id del avión, asientos) de todos los aviones, cargando los asientos de ``chunk_size`` aviones por consulta."""
+    airplane_ids = Airplane.objects.order_by("airplane_id").values_list("airplane_id", flat=True)
+    for airplane_ids_chunk in iter_chunks(airplane_ids.iterator(), chunk_size):
+        yield from airplanes_seats(airplane_ids_chunk).items()
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera el archivo binario con los mapas de asientos de todos los aviones que los workers "
+        "leen con mmap (SEAT_MAP_STORE). El archivo se reemplaza de forma atómica."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=settings.SEAT_MAP_STORE,
+            help="Ruta del archivo (por defecto SEAT_MAP_STORE).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=BULK_QUERY_CHUNK_SIZE,
+            help="Aviones cuyos asientos se cargan por consulta.",
+        )
+        parser.add_argument(
+            "--no-invalidate",
+            action="store_true",
+            help="No cambia las marcas de invalidación de los mapas de asientos en el cache de Django.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["output"]:
+            raise CommandError("Indique la ruta con --output o con SEAT_MAP_STORE.")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size debe ser mayor o igual a 1.")
+
+        airplanes, seats = write_seat_map_store(
+            options["output"], fleet_seats(options["chunk_size"])
+        )
+        if not options["no_invalidate"] and shared_seat_map_invalidation():
+            # Los workers notan el archivo nuevo por su identidad (seat_map_generation); las marcas
+            # además descartan los mapas de los aviones que se cargaron desde la base de datos
+            invalidate_seat_maps()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{airplanes} aviones y {seats} asientos guardados en {options['output']} "
+                f"({os.path.getsize(options['output']) / 1024:.1f} KiB)."
+            )
+        )
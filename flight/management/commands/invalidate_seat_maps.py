@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from flight.service import invalidate_seat_maps, shared_seat_map_invalidation
+
+
+class Command(BaseCommand):
+    help = "Invalida los mapas de asientos en cache de uno o más aviones, o de todos con --all."
+
+    def add_arguments(self, parser):
+        parser.add_argument("airplane_ids", nargs="*", type=int)
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Invalida los mapas de asientos de todos los aviones.",
+        )
+
+    def handle(self, *args, **options):
+        airplane_ids = options["airplane_ids"]
+
+        if options["all"] == bool(airplane_ids):
+            raise CommandError("Indique los ids de los aviones o use --all.")
+        if not settings.SEAT_MAP_GENERATION_DIR and not shared_seat_map_invalidation():
+            # Sin archivos de marca y con un cache del proceso los workers no se enterarían
+            raise CommandError(
+                "SEAT_MAP_GENERATION_DIR está vacío y SEAT_MAP_CACHE_ALIAS usa un cache del proceso "
+                "(locmem o dummy), así que los workers no verían la invalidación; configure "
+                "SEAT_MAP_GENERATION_DIR o CACHE_URL con un cache compartido (archivo, Redis, ...)."
+            )
+
+        if options["all"]:
+            invalidate_seat_maps()
+            self.stdout.write(self.style.SUCCESS("Mapas de asientos invalidados."))
+            return
+
+        invalidate_seat_maps(airplane_ids)
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Mapas de asientos invalidados: "
+                + ", ".join(str(airplane_id) for airplane_id in airplane_ids)
+            )
+        )
@@ -0,0 +1,258 @@
+import sys
+import time
+from datetime import date, datetime, time as day_time, timedelta, timezone
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from flight.engine import ENGINES
+from flight.models import Flight
+from flight.renderers import dumps
+from flight.service import (
+    BULK_QUERY_CHUNK_SIZE,
+    SeatConflictError,
+    iter_seats_distributions,
+    persist_seats_distribution,
+)
+
+
+def parse_range(value: str) -> range:
+    """Función que recibe un rango de ids con el formato INICIO-FIN (ambos incluidos) y retorna el range."""
+    try:
+        start, end = (int(part) for part in value.split("-", 1))
+    except ValueError:
+        raise CommandError(f"Rango inválido: {value}. Use el formato INICIO-FIN.")
+    if start > end:
+        raise CommandError(f"Rango inválido: {value}. INICIO debe ser menor o igual a FIN.")
+    return range(start, end + 1)
+
+
+def parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Fecha inválida: {value}. Use el formato AAAA-MM-DD.")
+
+
+def read_ids_file(path: str):
+    """Función que recibe la ruta de un archivo (o - para la entrada estándar) y retorna sus ids, uno por línea, sin leerlo completo."""
+    ids_file = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line_number, line in enumerate(ids_file, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                yield int(line)
+            except ValueError:
+                raise CommandError(f"{path}:{line_number}: id de vuelo inválido: {line}")
+    finally:
+        if ids_file is not sys.stdin:
+            ids_file.close()
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta la simulación de check-in de varios vuelos y escribe una línea JSON por vuelo "
+        "a medida que termina cada uno."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("flight_ids", nargs="*", type=int)
+        parser.add_argument(
+            "--range",
+            dest="flight_range",
+            help="Rango de ids de vuelos INICIO-FIN, ambos incluidos.",
+        )
+        parser.add_argument(
+            "--from-date",
+            help="Simula los vuelos que despegan desde esta fecha (AAAA-MM-DD, UTC).",
+        )
+        parser.add_argument(
+            "--to-date",
+            help="Simula los vuelos que despegan hasta esta fecha incluida (AAAA-MM-DD, UTC).",
+        )
+        parser.add_argument(
+            "--ids-file",
+            help="Archivo con un id de vuelo por línea; use - para leer de la entrada estándar.",
+        )
+        parser.add_argument(
+            "--output",
+            help="Archivo donde escribir las líneas JSON (por defecto la salida estándar).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.CHECKIN_WORKERS,
+            help="Procesos para repartir la asignación de asientos (por defecto CHECKIN_WORKERS).",
+        )
+        parser.add_argument(
+            "--engine",
+            choices=sorted(ENGINES),
+            help="Estrategia de asignación de asientos (por defecto SEAT_ASSIGNMENT_ENGINE).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=BULK_QUERY_CHUNK_SIZE,
+            help="Vuelos que se cargan de la base de datos por consulta.",
+        )
+        parser.add_argument(
+            "--progress-every",
+            type=int,
+            default=100,
+            help="Cada cuántos vuelos se informa el avance por la salida de errores (0 para no informar).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="No escribe las simulaciones; imprime la latencia de asignación de cada vuelo y un resumen.",
+        )
+        parser.add_argument(
+            "--persist",
+            action="store_true",
+            help=(
+                "Guarda los asientos asignados en boarding_pass, vuelo por vuelo y en una transacción por vuelo. "
+                "Solo se asignan los pasajeros sin asiento y cada línea incluye solo a los que recibieron asiento."
+            ),
+        )
+
+    def flight_ids(self, options):
+        """Método que retorna los ids de vuelos pedidos y su cantidad total (None si no se conoce de antemano)."""
+        sources = [
+            bool(options["flight_ids"]),
+            bool(options["flight_range"]),
+            bool(options["from_date"] or options["to_date"]),
+            bool(options["ids_file"]),
+        ]
+        if sum(sources) != 1:
+            raise CommandError(
+                "Indique los vuelos con ids, --range, --from-date/--to-date o --ids-file (solo una opción)."
+            )
+
+        if options["flight_ids"]:
+            return options["flight_ids"], len(options["flight_ids"])
+
+        if options["flight_range"]:
+            flight_range = parse_range(options["flight_range"])
+            return flight_range, len(flight_range)
+
+        if options["ids_file"]:
+            return read_ids_file(options["ids_file"]), None
+
+        flights = Flight.objects.order_by("flight_id")
+        if options["from_date"]:
+            start = datetime.combine(
+                parse_date(options["from_date"]), day_time(), tzinfo=timezone.utc
+            )
+            flights = flights.filter(takeoff_date_time__gte=int(start.timestamp()))
+        if options["to_date"]:
+            end = datetime.combine(
+                parse_date(options["to_date"]) + timedelta(days=1),
+                day_time(),
+                tzinfo=timezone.utc,
+            )
+            flights = flights.filter(takeoff_date_time__lt=int(end.timestamp()))
+        flight_ids = list(flights.values_list("flight_id", flat=True))
+        return flight_ids, len(flight_ids)
+
+    def persisted_distributions(self, flight_ids, engine: str):
+        """Método que guarda los asientos de cada vuelo y retorna tuplas (id, pasajeros asignados, segundos); los vuelos con conflicto se anotan en ``self.conflicts``."""
+        for flight_id in flight_ids:
+            start = time.perf_counter()
+            try:
+                data = persist_seats_distribution(flight_id, engine)
+            except SeatConflictError as error:
+                self.conflicts.add(flight_id)
+                self.stderr.write(f"Vuelo {flight_id}: {error}")
+                data = None
+            yield flight_id, data, time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        if options["persist"] and options["dry_run"]:
+            raise CommandError("--persist y --dry-run no se pueden usar juntos.")
+        if options["workers"] < 1:
+            raise CommandError("--workers debe ser mayor o igual a 1.")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size debe ser mayor o igual a 1.")
+
+        flight_ids, total = self.flight_ids(options)
+        output = (
+            open(options["output"], "w", encoding="utf-8")
+            if options["output"]
+            else self.stdout
+        )
+        progress_every = options["progress_every"]
+        latencies = []
+        processed = 0
+        not_found = 0
+        self.conflicts = set()
+        start = time.perf_counter()
+
+        if options["persist"]:
+            distributions = self.persisted_distributions(flight_ids, options["engine"])
+        else:
+            distributions = iter_seats_distributions(
+                flight_ids,
+                engine=options["engine"],
+                workers=options["workers"],
+                chunk_size=options["chunk_size"],
+            )
+
+        try:
+            for flight_id, simulation_data, seconds in distributions:
+                processed += 1
+                conflict = flight_id in self.conflicts
+                if simulation_data is None and not conflict:
+                    not_found += 1
+
+                if options["dry_run"]:
+                    if simulation_data is not None:
+                        latencies.append(seconds)
+                        output.write(
+                            f"{flight_id}\t{len(simulation_data['passengers'])}\t{seconds * 1000:.3f} ms\n"
+                        )
+                else:
+                    output.write(
+                        dumps(
+                            {
+                                "flightId": flight_id,
+                                "code": 409 if conflict else 200 if simulation_data else 404,
+                                "data": simulation_data or {},
+                            }
+                        ).decode("utf-8")
+                        + "\n"
+                    )
+                output.flush()
+
+                if progress_every and processed % progress_every == 0:
+                    self.report_progress(processed, total, start)
+        finally:
+            if output is not self.stdout:
+                output.close()
+
+        if progress_every:
+            self.report_progress(processed, total, start)
+        if not_found:
+            self.stderr.write(f"{not_found} vuelos no encontrados.")
+        if self.conflicts:
+            self.stderr.write(f"{len(self.conflicts)} vuelos con conflictos al guardar; vuelva a ejecutarlos.")
+        if options["dry_run"] and latencies:
+            self.stderr.write(
+                "Latencia de asignación: p50 {:.3f} ms, p95 {:.3f} ms, máx {:.3f} ms".format(
+                    percentile(latencies, 0.5) * 1000,
+                    percentile(latencies, 0.95) * 1000,
+                    max(latencies) * 1000,
+                )
+            )
+
+    def report_progress(self, processed: int, total: int, start: float) -> None:
+        elapsed = time.perf_counter() - start
+        rate = processed / elapsed if elapsed else 0.0
+        of_total = f"/{total}" if total is not None else ""
+        self.stderr.write(
+            f"{processed}{of_total} vuelos procesados en {elapsed:.1f} s ({rate:.1f} vuelos/s)"
+        )
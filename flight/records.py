@@ -0,0 +1,105 @@
+from typing import Dict, Iterable, List
+
+
+class PassengerRecord:
+    """Clase que guarda los datos de un pasajero y de su tarjeta de embarque con __slots__ en lugar de un diccionario.
+
+    Es la representación interna de los pasajeros en la carga y en la asignación de asientos; el
+    diccionario en formato CamelCase solo se construye al serializar la respuesta (``as_dict``).
+    """
+
+    __slots__ = (
+        "passenger_id",
+        "dni",
+        "name",
+        "age",
+        "country",
+        "boarding_pass_id",
+        "purchase_id",
+        "seat_type_id",
+        "seat_id",
+    )
+
+    def __init__(
+        self,
+        passenger_id: int,
+        dni: int,
+        name: str,
+        age: int,
+        country: str,
+        boarding_pass_id: int,
+        purchase_id: int,
+        seat_type_id: int,
+        seat_id: int,
+    ) -> None:
+        self.passenger_id = passenger_id
+        self.dni = dni
+        self.name = name
+        self.age = age
+        self.country = country
+        self.boarding_pass_id = boarding_pass_id
+        self.purchase_id = purchase_id
+        self.seat_type_id = seat_type_id
+        self.seat_id = seat_id
+
+    def __reduce__(self):
+        # Se envía como tupla a los procesos del pool, sin un diccionario por pasajero
+        return (
+            PassengerRecord,
+            (
+                self.passenger_id,
+                self.dni,
+                self.name,
+                self.age,
+                self.country,
+                self.boarding_pass_id,
+                self.purchase_id,
+                self.seat_type_id,
+                self.seat_id,
+            ),
+        )
+
+    def __repr__(self) -> str:
+        return f"PassengerRecord(passenger_id={self.passenger_id}, seat_id={self.seat_id})"
+
+    def as_dict(self) -> Dict:
+        """Método que retorna los datos del pasajero en formato CamelCase, como en la respuesta de la API."""
+        return {
+            "passengerId": self.passenger_id,
+            "dni": self.dni,
+            "name": self.name,
+            "age": self.age,
+            "country": self.country,
+            "boardingPassId": self.boarding_pass_id,
+            "purchaseId": self.purchase_id,
+            "seatTypeId": self.seat_type_id,
+            "seatId": self.seat_id,
+        }
+
+
+def passenger_dicts(passengers: Iterable[PassengerRecord]) -> List[Dict]:
+    """Función que convierte una lista de PassengerRecord a diccionarios CamelCase en una sola comprensión de listas, sin llamar a ``as_dict`` por pasajero."""
+    return [
+        {
+            "passengerId": passenger.passenger_id,
+            "dni": passenger.dni,
+            "name": passenger.name,
+            "age": passenger.age,
+            "country": passenger.country,
+            "boardingPassId": passenger.boarding_pass_id,
+            "purchaseId": passenger.purchase_id,
+            "seatTypeId": passenger.seat_type_id,
+            "seatId": passenger.seat_id,
+        }
+        for passenger in passengers
+    ]
+
+
+def simulation_dict(data: Dict) -> Dict:
+    """Función que recibe los datos de un vuelo con sus pasajeros como PassengerRecord y retorna el diccionario en formato CamelCase."""
+    if data is None:
+        return None
+    return {
+        **data,
+        "passengers": passenger_dicts(data["passengers"]),
+    }
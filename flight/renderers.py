@@ -0,0 +1,61 @@
+import json
+from rest_framework.renderers import JSONRenderer
+from .instrumentation import phase
+from .records import PassengerRecord, passenger_dicts
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - se usa el módulo json de la biblioteca estándar
+    orjson = None
+
+
+def encode_record(value):
+    """Función que el codificador llama con los valores que no sabe serializar; los PassengerRecord se convierten al formato CamelCase."""
+    if isinstance(value, PassengerRecord):
+        return value.as_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def plain(data):
+    """Función que retorna los datos con los PassengerRecord convertidos a diccionarios CamelCase.
+
+    Las listas de pasajeros se convierten en una sola pasada (``passenger_dicts``) antes de llamar
+    al codificador, así orjson no vuelve a llamar a Python por cada pasajero. Solo se copian los
+    diccionarios y listas; el resto de valores se retorna tal cual.
+    """
+    if isinstance(data, dict):
+        return {key: plain(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        if data and isinstance(data[0], PassengerRecord):
+            # Las listas de pasajeros solo contienen PassengerRecord
+            return passenger_dicts(data)
+        return [plain(value) for value in data]
+    if isinstance(data, PassengerRecord):
+        return data.as_dict()
+    return data
+
+
+def dumps(data) -> bytes:
+    """Función que recibe datos y retorna su JSON en bytes (UTF-8, sin espacios), con orjson si está instalado."""
+    data = plain(data)
+    if orjson is not None:
+        return orjson.dumps(data, default=encode_record, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        data, default=encode_record, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Clase que renderiza las respuestas de la API de vuelos con ``dumps``.
+
+    Si los datos de la respuesta ya son bytes (un cuerpo JSON guardado en el cache de respuestas)
+    se envían tal cual, sin volver a serializarlos.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            return bytes(data)
+        with phase("render"):
+            return dumps(data)
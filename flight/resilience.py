@@ -0,0 +1,211 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable
+from django.conf import settings
+from django.db import connections
+from django.db.utils import InterfaceError, OperationalError
+from tenacity import (
+    Retrying,
+    retry_if_exception_type,
+    wait_random_exponential,
+)
+from .instrumentation import record_retry
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Error que indica que el circuito de la base de datos está abierto y no se intenta la consulta."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__("database circuit is open")
+        # Segundos que faltan para volver a probar la base de datos
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Clase que corta las llamadas a la base de datos después de varios errores seguidos.
+
+    Con ``failure_threshold`` errores seguidos el circuito se abre y las llamadas fallan de inmediato
+    con CircuitOpenError durante ``reset_timeout`` segundos. Luego se deja pasar una sola llamada de
+    prueba: si funciona el circuito se cierra y si falla se vuelve a abrir.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        clock: Callable = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Método que lanza CircuitOpenError si el circuito está abierto."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            remaining = self.opened_at + self.reset_timeout - self.clock()
+            if self.state == self.OPEN and remaining <= 0:
+                # Se deja pasar una llamada de prueba
+                self.state = self.HALF_OPEN
+                return
+            raise CircuitOpenError(max(remaining, 0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+    def release_probe(self) -> None:
+        """Método que libera la llamada de prueba que terminó sin resultado (por ejemplo cancelada); la siguiente llamada vuelve a probar."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self.opened_at = self.clock() - self.reset_timeout
+
+
+class RetryBudget:
+    """Clase con los intentos fallidos y el inicio del plazo que comparten las llamadas a la base de datos de una solicitud.
+
+    Las consultas que funcionan no gastan intentos y el plazo empieza con el primer error, así una
+    solicitud que ya hizo varias consultas o usó tiempo de CPU conserva sus reintentos.
+    """
+
+    __slots__ = ("failures", "first_failure")
+
+    def __init__(self) -> None:
+        self.failures = 0
+        self.first_failure = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.first_failure is None:
+            self.first_failure = time.monotonic()
+
+    def elapsed(self) -> float:
+        """Método que retorna los segundos desde el primer error, o 0 si no hubo errores."""
+        if self.first_failure is None:
+            return 0.0
+        return time.monotonic() - self.first_failure
+
+
+current_budget: ContextVar = ContextVar("database_retry_budget", default=None)
+
+
+class RetryPolicy:
+    """Clase que reintenta una función ante errores de conexión con esperas exponenciales aleatorias.
+
+    Se permiten ``max_attempts`` intentos fallidos dentro de un plazo de ``deadline`` segundos que
+    empieza con el primer error, y ninguna espera sobrepasa el plazo. Dentro de ``request_budget()`` el
+    plazo y los intentos fallidos son de toda la solicitud, aunque haga varias llamadas; fuera, de cada
+    llamada. Cada intento pasa por
+    el circuit breaker, así cuando la base de datos está caída se falla de inmediato en lugar de dejar
+    dormido al worker.
+    """
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        max_attempts: int = 5,
+        deadline: float = 5,
+        initial_wait: float = 0.1,
+        max_wait: float = 1,
+    ) -> None:
+        self.breaker = breaker
+        self.max_attempts = max_attempts
+        self.deadline = deadline
+        self.initial_wait = initial_wait
+        self.max_wait = max_wait
+        self.backoff = wait_random_exponential(multiplier=initial_wait, max=max_wait)
+
+    @contextmanager
+    def request_budget(self):
+        """Método que retorna un context manager en el que todas las llamadas comparten el plazo y los intentos fallidos."""
+        if current_budget.get() is not None:
+            yield
+            return
+        token = current_budget.set(RetryBudget())
+        try:
+            yield
+        finally:
+            current_budget.reset(token)
+
+    def before_sleep(self, retry_state) -> None:
+        record_retry()
+        # La conexión que falló no se reutiliza en el siguiente intento
+        for connection in connections.all():
+            if not connection.in_atomic_block:
+                connection.close_if_unusable_or_obsolete()
+
+    def call(self, function: Callable, *args, **kwargs):
+        """Método que ejecuta la función aplicando la política de reintentos y el circuit breaker."""
+
+        budget = current_budget.get() or RetryBudget()
+
+        def stop(retry_state) -> bool:
+            return budget.failures >= self.max_attempts or budget.elapsed() >= self.deadline
+
+        def wait(retry_state) -> float:
+            # La espera no se pasa del plazo total
+            remaining = self.deadline - budget.elapsed()
+            return max(0, min(self.backoff(retry_state), remaining))
+
+        def attempt():
+            self.breaker.before_call()
+            try:
+                result = function(*args, **kwargs)
+            except (OperationalError, InterfaceError):
+                budget.record_failure()
+                self.breaker.record_failure()
+                raise
+            except Exception:
+                # Otros errores (por ejemplo SeatConflictError) no indican que la base de datos esté caída
+                self.breaker.record_success()
+                raise
+            except BaseException:
+                self.breaker.release_probe()
+                raise
+            self.breaker.record_success()
+            return result
+
+        retrying = Retrying(
+            stop=stop,
+            wait=wait,
+            retry=retry_if_exception_type(OperationalError),
+            before_sleep=self.before_sleep,
+            reraise=True,
+        )
+        return retrying(attempt)
+
+
+database_breaker = CircuitBreaker(
+    failure_threshold=settings.DB_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=settings.DB_CIRCUIT_RESET_TIMEOUT,
+)
+
+# Política compartida para las cargas desde la base de datos de cada solicitud
+database_policy = RetryPolicy(
+    database_breaker,
+    max_attempts=settings.DB_RETRY_ATTEMPTS,
+    deadline=settings.DB_RETRY_DEADLINE,
+    initial_wait=settings.DB_RETRY_INITIAL_WAIT,
+    max_wait=settings.DB_RETRY_MAX_WAIT,
+)
@@ -0,0 +1,118 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max, Sum
+from django.utils.http import parse_etags
+from .instrumentation import phase
+from .models import BoardingPass
+from .renderers import dumps
+from .service import (
+    aseats_distribution,
+    call_in_thread,
+    seat_map_generation,
+    seats_distribution,
+)
+import hashlib
+
+
+def flight_version(flight_id: int) -> str:
+    """Función que recibe el id de un vuelo y retorna una huella de sus datos, o None si el vuelo no tiene pasajeros.
+
+    La huella combina, en una sola consulta, la cantidad de tarjetas de embarque, el mayor id, la cantidad
+    y la suma de los asientos ya asignados y el avión del vuelo, junto con las marcas de invalidación de su
+    mapa de asientos y la estrategia de asignación. Cambia cuando se agregan tarjetas o se asignan asientos.
+    """
+    with phase("version"):
+        version = BoardingPass.objects.filter(flight_id=flight_id).aggregate(
+            count=Count("boarding_pass_id"),
+            max_id=Max("boarding_pass_id"),
+            seated=Count("seat_id"),
+            seat_sum=Sum("seat_id"),
+            airplane_id=Max("flight__airplane_id"),
+        )
+    if not version["count"]:
+        return None
+
+    fingerprint = (
+        flight_id,
+        version["count"],
+        version["max_id"],
+        version["seated"],
+        version["seat_sum"],
+        version["airplane_id"],
+        seat_map_generation(version["airplane_id"]),
+        settings.SEAT_ASSIGNMENT_ENGINE,
+    )
+    return hashlib.sha1(repr(fingerprint).encode()).hexdigest()
+
+
+def simulation_cache_key(flight_id: int, version: str) -> str:
+    return f"checkin:simulation:{flight_id}:{version}"
+
+
+def stored_simulation_body(flight_id: int, version: str) -> bytes:
+    """Función que retorna el cuerpo JSON de la simulación del vuelo si ya está en el cache de respuestas con la
+    versión indicada, o None; a diferencia de cached_simulation_body no lo calcula.
+    """
+    return caches[settings.RESPONSE_CACHE_ALIAS].get(simulation_cache_key(flight_id, version))
+
+
+def cached_simulation_body(flight_id: int, version: str) -> bytes:
+    """Función que retorna el cuerpo JSON ya codificado de la simulación del vuelo, desde el cache de respuestas o
+    calculándolo y guardándolo con la versión indicada; retorna None si el vuelo no tiene pasajeros.
+    """
+    response_cache = caches[settings.RESPONSE_CACHE_ALIAS]
+    key = simulation_cache_key(flight_id, version)
+
+    body = response_cache.get(key)
+    if body is None:
+        simulation_data = seats_distribution(flight_id, version=version)
+        if simulation_data is None:
+            return None
+        with phase("render"):
+            body = dumps({"code": 200, "data": simulation_data})
+        response_cache.set(key, body, settings.RESPONSE_CACHE_TIMEOUT)
+    return body
+
+
+async def aflight_version(flight_id: int) -> str:
+    """Función asíncrona equivalente a flight_version, con la política de reintentos."""
+    return await sync_to_async(call_in_thread, thread_sensitive=False)(
+        flight_version, flight_id
+    )
+
+
+async def astored_simulation_body(flight_id: int, version: str) -> bytes:
+    """Función asíncrona equivalente a stored_simulation_body."""
+    return await sync_to_async(stored_simulation_body, thread_sensitive=False)(flight_id, version)
+
+
+async def acached_simulation_body(flight_id: int, version: str) -> bytes:
+    """Función asíncrona equivalente a cached_simulation_body."""
+    response_cache = caches[settings.RESPONSE_CACHE_ALIAS]
+    key = simulation_cache_key(flight_id, version)
+
+    body = await sync_to_async(response_cache.get, thread_sensitive=False)(key)
+    if body is None:
+        simulation_data = await aseats_distribution(flight_id, version=version)
+        if simulation_data is None:
+            return None
+        with phase("render"):
+            body = dumps({"code": 200, "data": simulation_data})
+        await sync_to_async(response_cache.set, thread_sensitive=False)(
+            key, body, settings.RESPONSE_CACHE_TIMEOUT
+        )
+    return body
+
+
+def etag(version: str) -> str:
+    return f'"{version}"'
+
+
+def not_modified(request, version: str) -> bool:
+    """Función que retorna True si el ETag de la versión está en el encabezado If-None-Match de la solicitud."""
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return "*" in etags or etag(version) in etags
@@ -0,0 +1,407 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Tuple
+import threading
+import time
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - sin NumPy se usan solo las estructuras de Python
+    numpy = None
+
+# Desplazamientos (fila, columna) de los ocho vecinos, en el orden en que se prueban
+NEIGHBOR_OFFSETS = (
+    (0, -1),  # izquierdo
+    (0, 1),  # derecho
+    (-1, 0),  # frontal
+    (1, 0),  # trasero
+    (-1, 1),  # noreste
+    (1, 1),  # sureste
+    (-1, -1),  # noroeste
+    (1, -1),  # suroeste
+)
+
+LEFT, RIGHT, FRONT, BACK, NORTHEAST, SOUTHEAST, NORTHWEST, SOUTHWEST = range(8)
+
+
+class SeatRecord:
+    """Clase que guarda solo las columnas de un asiento necesarias para la simulación."""
+
+    __slots__ = ("seat_id", "seat_row", "seat_column", "seat_type_id")
+
+    def __init__(
+        self, seat_id: int, seat_row: int, seat_column: str, seat_type_id: int
+    ) -> None:
+        self.seat_id = seat_id
+        self.seat_row = seat_row
+        self.seat_column = seat_column
+        self.seat_type_id = seat_type_id
+
+    def __iter__(self):
+        return iter((self.seat_id, self.seat_row, self.seat_column, self.seat_type_id))
+
+    def __repr__(self) -> str:
+        return "SeatRecord(%r, %r, %r, %r)" % tuple(self)
+
+
+class SeatMap:
+    """Clase que indexa los asientos de un avión por (fila, columna) y guarda los ocho vecinos precalculados de cada asiento."""
+
+    __slots__ = ("airplane_id", "positions", "seat_types", "seat_ids_by_type", "neighbors", "grid")
+
+    def __init__(
+        self, airplane_id: int, seats: Iterable[SeatRecord], neighbors: Dict[int, Tuple] = None
+    ) -> None:
+        self.airplane_id = airplane_id
+        # (fila, columna) -> id del asiento
+        self.positions: Dict[Tuple[int, str], int] = {}
+        # id del asiento -> id del tipo de asiento
+        self.seat_types: Dict[int, int] = {}
+        # id del tipo de asiento -> ids de los asientos de esa clase ordenados por id
+        self.seat_ids_by_type: Dict[int, List[int]] = {}
+        # id del asiento -> tupla con los ids de sus ocho vecinos (None si no existe)
+        self.neighbors: Dict[int, Tuple] = {}
+
+        seats = sorted(tuple(seat) for seat in seats)
+        for seat_id, seat_row, seat_column, seat_type_id in seats:
+            # Los asientos con una columna de más de una letra no tienen posición ni vecinos:
+            # se asignan solos, sin que el resto del avión deje de funcionar
+            if len(seat_column) == 1:
+                self.positions.setdefault((seat_row, seat_column), seat_id)
+            self.seat_types[seat_id] = seat_type_id
+            self.seat_ids_by_type.setdefault(seat_type_id, []).append(seat_id)
+
+        if neighbors is not None:
+            # Vecinos ya calculados, por ejemplo leídos de SeatMapStore
+            self.neighbors = neighbors
+        else:
+            for seat_id, seat_row, seat_column, _ in seats:
+                self.neighbors[seat_id] = (
+                    tuple(
+                        self.positions.get(
+                            (seat_row + row_offset, chr(ord(seat_column) + column_offset))
+                        )
+                        for row_offset, column_offset in NEIGHBOR_OFFSETS
+                    )
+                    if len(seat_column) == 1
+                    else (None,) * len(NEIGHBOR_OFFSETS)
+                )
+
+        # Matrices de NumPy del avión, si está instalado (si dos asientos comparten fila y columna,
+        # o alguno no tiene posición, el mapa no cabe en una matriz y no se usa)
+        self.grid = (
+            SeatGrid(self)
+            if numpy is not None and self.positions and len(self.positions) == len(self.seat_types)
+            else None
+        )
+
+    def __contains__(self, seat_id: int) -> bool:
+        return seat_id in self.neighbors
+
+    def __len__(self) -> int:
+        return len(self.neighbors)
+
+    def seat_id(self, seat_row: int, seat_column: str) -> int:
+        """Método que recibe la fila y la columna y retorna el id del asiento."""
+        return self.positions.get((seat_row, seat_column))
+
+    def type_positions(self, seat_type_id: int) -> List[Tuple[Tuple[int, str], int]]:
+        """Método que recibe un tipo de asiento y retorna ((fila, columna), id) de los asientos con posición de ese tipo."""
+        return [
+            (position, seat_id)
+            for position, seat_id in self.positions.items()
+            if self.seat_types[seat_id] == seat_type_id
+        ]
+
+    def neighbor(self, seat_id: int, direction: int) -> int:
+        """Método que recibe el id de un asiento y una dirección y retorna el id del asiento vecino."""
+        return self.neighbors[seat_id][direction]
+
+    def left(self, seat_id: int) -> int:
+        return self.neighbors[seat_id][LEFT]
+
+    def right(self, seat_id: int) -> int:
+        return self.neighbors[seat_id][RIGHT]
+
+    def front(self, seat_id: int) -> int:
+        return self.neighbors[seat_id][FRONT]
+
+    def back(self, seat_id: int) -> int:
+        return self.neighbors[seat_id][BACK]
+
+    def northeast(self, seat_id: int) -> int:
+        return self.neighbors[seat_id][NORTHEAST]
+
+    def southeast(self, seat_id: int) -> int:
+        return self.neighbors[seat_id][SOUTHEAST]
+
+    def northwest(self, seat_id: int) -> int:
+        return self.neighbors[seat_id][NORTHWEST]
+
+    def southwest(self, seat_id: int) -> int:
+        return self.neighbors[seat_id][SOUTHWEST]
+
+
+class SeatGrid:
+    """Clase que guarda los asientos de un avión en matrices de NumPy de filas por columnas.
+
+    ``seat_ids`` tiene el id del asiento de cada celda (0 si no hay asiento); la ocupación se lee del
+    arreglo ``free`` de cada FreeSeatPool, que solo tiene los asientos de una clase.
+    Las columnas se indexan por letra, así un pasillo (una letra que falta) es una columna vacía,
+    y las matrices tienen un borde vacío para que los vecinos de cualquier celda estén dentro de
+    ellas. Con esto la búsqueda de asientos libres con un vecino libre y el largo de los tramos
+    libres de cada fila se calculan con operaciones sobre arreglos.
+    """
+
+    __slots__ = ("seat_ids", "offsets", "sorted_ids", "sorted_cells")
+
+    def __init__(self, seat_map: SeatMap) -> None:
+        rows = [seat_row for seat_row, _ in seat_map.positions]
+        columns = [ord(seat_column) for _, seat_column in seat_map.positions]
+        first_row = min(rows) - 1
+        first_column = min(columns) - 1
+        shape = (max(rows) - first_row + 2, max(columns) - first_column + 2)
+
+        self.seat_ids = numpy.zeros(shape, dtype=numpy.int64)
+        for (seat_row, seat_column), seat_id in seat_map.positions.items():
+            self.seat_ids[seat_row - first_row, ord(seat_column) - first_column] = seat_id
+
+        # Desplazamiento de cada vecino en la matriz aplanada, en el orden de NEIGHBOR_OFFSETS
+        self.offsets = numpy.array(
+            [row_offset * shape[1] + column_offset for row_offset, column_offset in NEIGHBOR_OFFSETS]
+        )
+        # Ids de los asientos ordenados y su celda en la matriz aplanada, para ubicarlos con searchsorted
+        cells = numpy.flatnonzero(self.seat_ids)
+        ids = self.seat_ids.ravel()[cells]
+        order = numpy.argsort(ids, kind="stable")
+        self.sorted_ids = ids[order]
+        self.sorted_cells = cells[order]
+
+    def cells(self, seat_ids) -> "numpy.ndarray":
+        """Método que recibe ids de asientos del avión y retorna sus celdas en la matriz aplanada."""
+        return self.sorted_cells[numpy.searchsorted(self.sorted_ids, seat_ids)]
+
+    def pool_neighbors(self, pool: "FreeSeatPool", directions: Tuple) -> "numpy.ndarray":
+        """Método que retorna, para cada asiento del pool, la posición en el pool de sus vecinos en las direcciones indicadas.
+
+        Los vecinos que no existen o no son del pool apuntan a la posición centinela del final de
+        ``free``, que siempre está ocupada. Se calcula una vez por pool y grupo de direcciones.
+        """
+        positions = pool.grid_neighbors.get(directions)
+        if positions is None:
+            cells = self.cells(pool.seat_ids)
+            # celda -> posición del asiento en el pool (la centinela si la celda no es del pool)
+            pool_positions = numpy.full(self.seat_ids.size, len(cells), dtype=numpy.intp)
+            pool_positions[cells] = numpy.arange(len(cells))
+            positions = pool_positions[cells[:, None] + self.offsets[list(directions)]]
+            pool.grid_neighbors[directions] = positions
+        return positions
+
+    def free_pair(self, pool: "FreeSeatPool", directions: Tuple, start: int = 0) -> Tuple[int, int]:
+        """Método que retorna el primer asiento libre del pool (en su orden, desde la posición ``start``) con un vecino libre
+        del pool en alguna de las direcciones, junto con ese vecino en la primera dirección que sirve; retorna None si no hay.
+
+        El pool se revisa en bloques cada vez más grandes, así el costo depende de dónde está el par.
+        """
+        neighbors = self.pool_neighbors(pool, directions)
+        free = numpy.frombuffer(pool.free, dtype=numpy.bool_)
+        block = 256
+        while start < len(pool.seat_ids):
+            end = min(start + block, len(pool.seat_ids))
+            candidates = free[neighbors[start:end]]
+            with_pair = self.any_row(candidates) & free[start:end]
+            position = int(with_pair.argmax())
+            if with_pair[position]:
+                direction = int(candidates[position].argmax())
+                return (
+                    pool.seat_ids[start + position],
+                    pool.seat_ids[neighbors[start + position, direction]],
+                )
+            start = end
+            block *= 4
+        return None
+
+    # Enteros sin signo del mismo tamaño que una fila de 1, 2, 4 u 8 direcciones
+    ROW_VIEWS = {1: "u1", 2: "u2", 4: "u4", 8: "u8"}
+
+    def any_row(self, candidates: "numpy.ndarray") -> "numpy.ndarray":
+        """Método que retorna si cada fila de una matriz booleana tiene algún True.
+
+        Con 1, 2, 4 u 8 columnas cada fila se lee como un solo entero, que es mucho más rápido que ``any(axis=1)``.
+        """
+        row_view = self.ROW_VIEWS.get(candidates.shape[1])
+        if row_view is None:
+            return candidates.any(axis=1)
+        return candidates.view(row_view).ravel() != 0
+
+    def free_run_lengths(self, free_cells: "numpy.ndarray") -> "numpy.ndarray":
+        """Método que recibe la matriz de celdas libres y retorna, para cada celda, el largo del tramo libre de su fila que termina en ella."""
+        counts = numpy.cumsum(free_cells, axis=1)
+        resets = numpy.maximum.accumulate(numpy.where(free_cells, 0, counts), axis=1)
+        return counts - resets
+
+    def longest_free_runs(self, pool: "FreeSeatPool", segments: List[List[int]]) -> List[int]:
+        """Método que recibe un pool y tramos de asientos contiguos de una fila y retorna el largo del mayor tramo libre de cada uno."""
+        if not segments:
+            return []
+        free_cells = numpy.zeros(self.seat_ids.size, dtype=numpy.bool_)
+        free_cells[self.cells(pool.seat_ids)] = numpy.frombuffer(pool.free, dtype=numpy.bool_)[:-1]
+        run_lengths = self.free_run_lengths(free_cells.reshape(self.seat_ids.shape)).ravel()
+
+        segment_cells = self.cells([seat_id for segment in segments for seat_id in segment])
+        starts = numpy.cumsum([0] + [len(segment) for segment in segments[:-1]])
+        return numpy.maximum.reduceat(run_lengths[segment_cells], starts).tolist()
+
+
+class FreeSeatPool:
+    """Clase que guarda los asientos libres de una clase en su orden original, con consulta y eliminación en O(1).
+
+    Los asientos se marcan como ocupados en un arreglo de bytes en lugar de sacarlos de una lista,
+    por lo que se puede eliminar un asiento mientras se recorre el pool sin alterar el orden.
+    """
+
+    __slots__ = ("seat_ids", "positions", "free", "head", "size", "grid_neighbors")
+
+    def __init__(self, seat_ids: Iterable[int]) -> None:
+        self.seat_ids = list(seat_ids)
+        # id del asiento -> posición en seat_ids
+        self.positions = {seat_id: position for position, seat_id in enumerate(self.seat_ids)}
+        # Un byte por asiento (1 = libre) y uno centinela al final que siempre está ocupado
+        self.free = bytearray(b"\x01") * len(self.seat_ids) + b"\x00"
+        # Posición del primer asiento libre
+        self.head = 0
+        self.size = len(self.seat_ids)
+        # direcciones -> posiciones de los vecinos de cada asiento en el pool, las calcula SeatGrid
+        self.grid_neighbors = {}
+
+    def __contains__(self, seat_id: int) -> bool:
+        position = self.positions.get(seat_id)
+        return position is not None and self.free[position] == 1
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        seat_ids = self.seat_ids
+        free = self.free
+        for position in range(self.head, len(seat_ids)):
+            if free[position]:
+                yield seat_ids[position]
+
+    def remove(self, seat_id: int) -> None:
+        """Método que marca el asiento como ocupado."""
+        position = self.positions[seat_id]
+        if not self.free[position]:
+            raise KeyError(seat_id)
+        self.free[position] = 0
+        self.size -= 1
+        while self.head < len(self.seat_ids) and not self.free[self.head]:
+            self.head += 1
+
+    def first(self) -> int:
+        """Método que retorna el primer asiento libre."""
+        if not self.size:
+            raise IndexError("no hay asientos libres")
+        return self.seat_ids[self.head]
+
+
+class SeatMapCache:
+    """Clase que guarda los mapas de asientos por id de avión en la memoria del proceso, con desalojo LRU y TTL opcional.
+
+    Si se entrega ``generation``, se llama en cada consulta con el id del avión y la entrada
+    se descarta cuando el valor retornado cambia; así otro proceso puede invalidar los mapas.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 128,
+        ttl: float = None,
+        generation: Callable = None,
+        clock: Callable = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.generation = generation
+        self.clock = clock
+        # id del avión -> (mapa de asientos, instante de carga, generación)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, airplane_id: int, generation=None, now: float = None) -> SeatMap:
+        """Método que retorna el mapa de asientos guardado del avión, o None si no está, expiró o fue invalidado."""
+        now = self.clock() if now is None else now
+        with self._lock:
+            entry = self._entries.get(airplane_id)
+            if entry is not None:
+                seat_map, loaded_at, entry_generation = entry
+                expired = self.ttl and now - loaded_at >= self.ttl
+                if not expired and entry_generation == generation:
+                    self._entries.move_to_end(airplane_id)
+                    self.hits += 1
+                    return seat_map
+                del self._entries[airplane_id]
+            self.misses += 1
+        return None
+
+    def store(self, airplane_id: int, seat_map: SeatMap, generation=None, now: float = None) -> None:
+        """Método que guarda el mapa de asientos del avión, desalojando los menos usados si se supera max_size."""
+        now = self.clock() if now is None else now
+        with self._lock:
+            self._entries[airplane_id] = (seat_map, now, generation)
+            self._entries.move_to_end(airplane_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, airplane_id: int, loader: Callable) -> SeatMap:
+        """Método que retorna el mapa de asientos del avión, cargándolo con ``loader`` si no está o expiró."""
+        generation = self.generation(airplane_id) if self.generation else None
+        now = self.clock()
+
+        seat_map = self.lookup(airplane_id, generation, now)
+        if seat_map is None:
+            # La carga se hace fuera del candado para no bloquear a los demás hilos
+            seat_map = loader(airplane_id)
+            self.store(airplane_id, seat_map, generation, now)
+        return seat_map
+
+    def get_many(self, airplane_ids: Iterable[int], loader: Callable) -> Dict[int, SeatMap]:
+        """Método que retorna los mapas de asientos de varios aviones; ``loader`` recibe la lista de ids que faltan y los carga juntos."""
+        now = self.clock()
+        seat_maps = {}
+        generations = {}
+        for airplane_id in airplane_ids:
+            generations[airplane_id] = (
+                self.generation(airplane_id) if self.generation else None
+            )
+            seat_map = self.lookup(airplane_id, generations[airplane_id], now)
+            if seat_map is not None:
+                seat_maps[airplane_id] = seat_map
+
+        missing = [airplane_id for airplane_id in generations if airplane_id not in seat_maps]
+        if missing:
+            for airplane_id, seat_map in loader(missing).items():
+                self.store(airplane_id, seat_map, generations[airplane_id], now)
+                seat_maps[airplane_id] = seat_map
+        return seat_maps
+
+    def invalidate(self, airplane_id: int = None) -> None:
+        """Método que descarta el mapa de un avión, o todos si no se entrega el id."""
+        with self._lock:
+            if airplane_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(airplane_id, None)
+
+    def stats(self) -> Dict:
+        """Método que retorna los contadores del cache."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxSize": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,304 @@
+"""
+Archivo binario con los mapas de asientos de toda la flota, compartido por los workers con mmap.
+
+El archivo se genera con ``python manage.py build_seat_map_store`` y cada worker lo abre en modo de
+solo lectura: las páginas quedan en el cache del sistema operativo una sola vez para todos los
+procesos. Los mapas no se decodifican: StoredSeatMap responde los vecinos y el tipo de cada asiento
+leyendo sus registros con una búsqueda binaria por id, así ningún worker guarda su propia copia de
+los asientos de la flota.
+
+Formato (little-endian):
+
+- Cabecera: ``b"CKSM"``, versión (H), reservado (H), cantidad de aviones (I) y posición de la tabla (Q).
+- Registros de 40 bytes, uno por asiento: id (I), fila (H), columna (B, código del carácter), tipo de
+  asiento (B) y los ids de sus ocho vecinos en el orden de NEIGHBOR_OFFSETS (8I, 0 si no existe).
+  Los asientos de cada avión son consecutivos y están ordenados por id.
+- Tabla al final del archivo, una entrada por avión ordenada por id: id del avión (I), primer
+  registro (I) y cantidad de registros (I).
+"""
+
+from collections.abc import Mapping
+from typing import Dict, Iterable, List, Tuple
+from .seat_map import SeatGrid, SeatMap, SeatRecord, numpy
+import bisect
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+
+MAGIC = b"CKSM"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIQ")
+RECORD = struct.Struct("<IHBB8I")
+TABLE_ENTRY = struct.Struct("<III")
+# Enteros de 4 bytes por registro: id, (fila, columna, tipo) y los ocho vecinos
+RECORD_WORDS = RECORD.size // 4
+# Posición de la fila, la columna y el tipo de asiento dentro del registro
+SEAT_ROW_OFFSET, SEAT_COLUMN_OFFSET, SEAT_TYPE_OFFSET = 4, 6, 7
+
+
+def fits_record(seat_id: int, seat_row: int, seat_column: str, seat_type_id: int) -> bool:
+    """Función que retorna True si el asiento cabe en un registro del archivo (RECORD)."""
+    return (
+        0 < seat_id <= 0xFFFFFFFF
+        and 0 <= seat_row <= 0xFFFF
+        and len(seat_column) == 1
+        and ord(seat_column) <= 0xFF
+        and 0 <= seat_type_id <= 0xFF
+    )
+
+
+def write_seat_map_store(
+    path: str, airplanes: Iterable[Tuple[int, List[SeatRecord]]]
+) -> Tuple[int, int]:
+    """Función que recibe tuplas (id del avión, asientos), escribe sus mapas de asientos en el archivo y retorna la cantidad de aviones y de asientos.
+
+    Los vecinos se calculan con SeatMap, así los mapas leídos del archivo son iguales a los cargados
+    desde la base de datos. Se escribe un archivo temporal en el mismo directorio que luego reemplaza
+    al anterior con os.replace, así los workers nunca ven un archivo a medio escribir. Los aviones se
+    escriben a medida que se leen de ``airplanes``; los que tienen algún asiento que no cabe en un
+    registro (por ejemplo una columna de más de un carácter, una fila mayor a 65535 o un tipo de
+    asiento mayor a 255) no se escriben y se cargan desde la base de datos.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary_path = tempfile.mkstemp(prefix=".seat-maps-", dir=directory)
+    table = []
+    records = 0
+    try:
+        with os.fdopen(descriptor, "wb") as store_file:
+            store_file.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+            for airplane_id, seats in airplanes:
+                seats = sorted(tuple(seat) for seat in seats)
+                if not all(fits_record(*seat) for seat in seats):
+                    # Algún valor no cabe en su campo; el avión se sigue cargando desde la base de datos
+                    continue
+                neighbors = SeatMap(airplane_id, seats).neighbors
+                table.append((airplane_id, records, len(seats)))
+                records += len(seats)
+                store_file.write(
+                    b"".join(
+                        RECORD.pack(
+                            seat_id,
+                            seat_row,
+                            ord(seat_column),
+                            seat_type_id,
+                            *(neighbor or 0 for neighbor in neighbors[seat_id]),
+                        )
+                        for seat_id, seat_row, seat_column, seat_type_id in seats
+                    )
+                )
+
+            table_offset = store_file.tell()
+            table.sort()
+            store_file.write(b"".join(TABLE_ENTRY.pack(*entry) for entry in table))
+            store_file.seek(0)
+            store_file.write(HEADER.pack(MAGIC, VERSION, 0, len(table), table_offset))
+            store_file.flush()
+            os.fsync(store_file.fileno())
+        os.chmod(temporary_path, 0o644)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+    return len(table), records
+
+
+class SeatMapStore:
+    """Clase que lee los mapas de asientos del archivo generado por write_seat_map_store, abierto con mmap.
+
+    Si el archivo se reemplaza (por ejemplo al regenerarlo) se vuelve a abrir en la siguiente lectura;
+    el anterior se libera cuando nadie lo está leyendo. Si el archivo no existe, ``seat_map`` retorna
+    None y los mapas se cargan desde la base de datos.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._file_id = None
+        self._view = None
+        # id del avión -> (primer registro, cantidad de registros)
+        self._table: Dict[int, Tuple[int, int]] = {}
+
+    def file_id(self) -> Tuple:
+        """Método que retorna la identidad del archivo (inodo, fecha de modificación y tamaño), o None si no existe; cambia al regenerarlo."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _open(self) -> None:
+        file_id = self.file_id()
+        if file_id is None:
+            self._file_id, self._view, self._table = None, None, {}
+            return
+        if file_id == self._file_id:
+            return
+
+        with open(self.path, "rb") as store_file:
+            view = memoryview(mmap.mmap(store_file.fileno(), 0, access=mmap.ACCESS_READ))
+        magic, version, _, airplanes, table_offset = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} no es un archivo de mapas de asientos (versión {VERSION})")
+        self._table = {
+            airplane_id: (first_record, count)
+            for airplane_id, first_record, count in TABLE_ENTRY.iter_unpack(
+                view[table_offset : table_offset + airplanes * TABLE_ENTRY.size]
+            )
+        }
+        self._view = view
+        self._file_id = file_id
+
+    def seat_map(self, airplane_id: int) -> SeatMap:
+        """Método que retorna el mapa de asientos del avión sobre los registros del archivo (StoredSeatMap), o None si el avión no está."""
+        with self._lock:
+            self._open()
+            view, entry = self._view, self._table.get(airplane_id)
+        if entry is None:
+            return None
+
+        first_record, count = entry
+        start = HEADER.size + first_record * RECORD.size
+        records = view[start : start + count * RECORD.size]
+        if sys.byteorder != "little":
+            # Los registros no se pueden leer como enteros nativos; se decodifica el mapa
+            return decoded_seat_map(airplane_id, records)
+        return StoredSeatMap(airplane_id, records)
+
+    def airplane_ids(self) -> List[int]:
+        with self._lock:
+            self._open()
+            return sorted(self._table)
+
+
+def decoded_seat_map(airplane_id: int, records: memoryview) -> SeatMap:
+    """Función que recibe los registros de un avión y retorna un SeatMap con sus asientos y vecinos copiados en memoria."""
+    seats = []
+    neighbors = {}
+    for seat_id, seat_row, seat_column, seat_type_id, *seat_neighbors in RECORD.iter_unpack(records):
+        seats.append(SeatRecord(seat_id, seat_row, chr(seat_column), seat_type_id))
+        neighbors[seat_id] = tuple(neighbor or None for neighbor in seat_neighbors)
+    return SeatMap(airplane_id, seats, neighbors)
+
+
+class StoredNeighbors(Mapping):
+    """Clase que lee los ocho vecinos de un asiento de su registro; equivale al diccionario ``neighbors`` de SeatMap."""
+
+    __slots__ = ("seat_map",)
+
+    def __init__(self, seat_map: "StoredSeatMap") -> None:
+        self.seat_map = seat_map
+
+    def __getitem__(self, seat_id: int) -> Tuple:
+        start = self.seat_map.index(seat_id) * RECORD_WORDS + 2
+        return tuple(neighbor or None for neighbor in self.seat_map.words[start : start + 8])
+
+    def __iter__(self):
+        return iter(self.seat_map.seat_ids)
+
+    def __len__(self) -> int:
+        return len(self.seat_map.seat_ids)
+
+
+class StoredSeatTypes(Mapping):
+    """Clase que lee el tipo de un asiento de su registro; equivale al diccionario ``seat_types`` de SeatMap."""
+
+    __slots__ = ("seat_map",)
+
+    def __init__(self, seat_map: "StoredSeatMap") -> None:
+        self.seat_map = seat_map
+
+    def __getitem__(self, seat_id: int) -> int:
+        return self.seat_map.records[
+            self.seat_map.index(seat_id) * RECORD.size + SEAT_TYPE_OFFSET
+        ]
+
+    def __iter__(self):
+        return iter(self.seat_map.seat_ids)
+
+    def __len__(self) -> int:
+        return len(self.seat_map.seat_ids)
+
+
+class StoredSeatMap(SeatMap):
+    """Clase con la interfaz de SeatMap que lee los asientos de un avión directamente de sus registros en el archivo.
+
+    Los asientos se ubican con una búsqueda binaria por id sobre los registros, que están ordenados,
+    por lo que el mapa no copia los asientos ni los vecinos: lo que se guarda en el cache del worker
+    es solo una vista de las páginas compartidas. Las posiciones y los asientos por tipo se arman
+    en cada llamada, y la matriz de SeatGrid (arreglos de NumPy, sin objetos por asiento) se arma la
+    primera vez que se usa. Al enviarlo a otro proceso se envía como un SeatMap decodificado.
+    """
+
+    __slots__ = ("records", "words", "seat_ids", "_grid")
+
+    def __init__(self, airplane_id: int, records: memoryview) -> None:
+        self.airplane_id = airplane_id
+        self.records = records
+        self.words = records.cast("I")
+        # Ids de los asientos ordenados, uno por registro
+        self.seat_ids = self.words[::RECORD_WORDS]
+        self.neighbors = StoredNeighbors(self)
+        self.seat_types = StoredSeatTypes(self)
+        self._grid = None
+
+    def __reduce__(self):
+        return decoded_seat_map, (self.airplane_id, self.records.tobytes())
+
+    def index(self, seat_id: int) -> int:
+        """Método que recibe el id de un asiento y retorna la posición de su registro; lanza KeyError si no es del avión."""
+        position = bisect.bisect_left(self.seat_ids, seat_id)
+        if position == len(self.seat_ids) or self.seat_ids[position] != seat_id:
+            raise KeyError(seat_id)
+        return position
+
+    def columns(self) -> Tuple[List[int], List[int], List[int], List[int]]:
+        """Método que retorna los ids, filas, columnas (código del carácter) y tipos de los asientos, leídos por campo de los registros."""
+        return (
+            self.seat_ids.tolist(),
+            self.records.cast("H")[SEAT_ROW_OFFSET // 2 :: RECORD.size // 2].tolist(),
+            self.records[SEAT_COLUMN_OFFSET :: RECORD.size].tolist(),
+            self.records[SEAT_TYPE_OFFSET :: RECORD.size].tolist(),
+        )
+
+    @property
+    def positions(self) -> Dict[Tuple[int, str], int]:
+        seat_ids, seat_rows, seat_columns, _ = self.columns()
+        positions = {}
+        for seat_id, seat_row, seat_column in zip(seat_ids, seat_rows, seat_columns):
+            positions.setdefault((seat_row, chr(seat_column)), seat_id)
+        return positions
+
+    def type_positions(self, seat_type_id: int) -> List[Tuple[Tuple[int, str], int]]:
+        seat_ids, seat_rows, seat_columns, seat_types = self.columns()
+        if len(set(zip(seat_rows, seat_columns))) < len(seat_ids):
+            # Dos asientos en la misma posición: como en SeatMap.positions vale el de menor id
+            return super().type_positions(seat_type_id)
+        return [
+            ((seat_row, chr(seat_column)), seat_id)
+            for seat_id, seat_row, seat_column, seat_type in zip(
+                seat_ids, seat_rows, seat_columns, seat_types
+            )
+            if seat_type == seat_type_id
+        ]
+
+    @property
+    def seat_ids_by_type(self) -> Dict[int, List[int]]:
+        seat_ids, _, _, seat_types = self.columns()
+        seat_ids_by_type = {}
+        for seat_id, seat_type_id in zip(seat_ids, seat_types):
+            seat_ids_by_type.setdefault(seat_type_id, []).append(seat_id)
+        return seat_ids_by_type
+
+    @property
+    def grid(self) -> SeatGrid:
+        if self._grid is None and numpy is not None and self.seat_ids:
+            # Con dos asientos en la misma fila y columna el mapa no cabe en una matriz
+            self._grid = SeatGrid(self) if len(self.positions) == len(self.seat_ids) else False
+        return self._grid or None
+
+    @grid.setter
+    def grid(self, grid: SeatGrid) -> None:
+        self._grid = grid if grid is not None else False
@@ -1,78 +1,286 @@
-from .models import Flight, BoardingPass, Seat
-from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type
-from django.db.utils import OperationalError
-from typing import List, Dict
-
-
-@retry(
-    stop=stop_after_attempt(5),  # Intenta hasta 5 veces
-    wait=wait_fixed(1),  # Espera 1 segundo antes de intentar de nuevo
-    retry=retry_if_exception_type(
-        OperationalError
-    ),  # Solo reintenta si es un error de conexión
+from .models import BoardingPass, Flight, Seat
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+from typing import Callable, Iterable, Iterator, List, Dict, Tuple
+from .records import PassengerRecord
+from .seat_map import FreeSeatPool, SeatMap, SeatMapCache, SeatRecord
+from .seat_map_store import SeatMapStore
+from .engine import PassengerGroups, get_engine
+from .instrumentation import phase, record_phase
+from .coalescing import async_simulation_calls, simulation_calls
+from .resilience import database_policy
+from asgiref.sync import sync_to_async
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from django.db import close_old_connections, transaction
+import asyncio
+import contextvars
+import os
+import tempfile
+import threading
+from itertools import islice
+import django
+import time
+
+# Columnas de la consulta de flight_data, en el orden en que se leen las filas
+FLIGHT_DATA_COLUMNS = (
+    "flight_id",
+    "flight__takeoff_date_time",
+    "flight__takeoff_airport",
+    "flight__landing_date_time",
+    "flight__landing_airport",
+    "flight__airplane_id",
+    "passenger_id",
+    "passenger__dni",
+    "passenger__name",
+    "passenger__age",
+    "passenger__country",
+    "boarding_pass_id",
+    "purchase_id",
+    "seat_type_id",
+    "seat_id",
 )
-def flight_data(flight_id: int) -> Dict:
-    """Función que recibe el id del vuelo y retorna los datos del vuelo en formato CamelCase."""
-    flights = Flight.objects.filter(flight_id=flight_id)
-    if not flights:
-        return None
 
-    flight = flights[0]
 
-    boarding_passes = (
-        BoardingPass.objects.filter(
-            flight_id=flight.flight_id,
-        )
-        .prefetch_related("passenger")
-        .order_by("seat_type_id", "seat_id")
-    )
+# Cantidad máxima de ids por consulta con IN en las cargas masivas
+BULK_QUERY_CHUNK_SIZE = 500
 
-    if not boarding_passes:
-        return None
 
-    # Crear la respuesta en formato JSON de los datos del vuelo
-    data = {
-        "flightId": flight.flight_id,
-        "takeoffDateTime": flight.takeoff_date_time,
-        "takeoffAirport": flight.takeoff_airport,
-        "landingDateTime": flight.landing_date_time,
-        "landingAirport": flight.landing_airport,
-        "airplaneId": flight.airplane_id,
+def iter_chunks(ids: Iterable[int], size: int) -> Iterator[List[int]]:
+    """Función que recibe un iterable de ids y retorna listas de a lo más ``size`` ids sin leer el iterable completo"""
+    ids = iter(ids)
+    while True:
+        chunk = list(islice(ids, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def flight_header(row: Tuple) -> Dict:
+    """Función que recibe una fila que empieza con las columnas del vuelo de FLIGHT_DATA_COLUMNS y retorna los datos del vuelo en formato CamelCase, sin pasajeros."""
+    return {
+        "flightId": row[0],
+        "takeoffDateTime": row[1],
+        "takeoffAirport": row[2],
+        "landingDateTime": row[3],
+        "landingAirport": row[4],
+        "airplaneId": row[5],
         "passengers": [],
     }
-    # Crear los datos del pasajero del vuelo y de su respectiva tarjeta de embarque
-    for boarding_pass in boarding_passes:
-        passenger = boarding_pass.passenger
-        data["passengers"].append(
-            {
-                "passengerId": passenger.passenger_id,
-                "dni": int(passenger.dni),
-                "name": passenger.name,
-                "age": passenger.age,
-                "country": passenger.country,
-                "boardingPassId": boarding_pass.boarding_pass_id,
-                "purchaseId": boarding_pass.purchase_id,
-                "seatTypeId": boarding_pass.seat_type_id,
-                "seatId": boarding_pass.seat_id,
-            }
+
+
+def flights_data(flight_ids: List[int], unassigned_only: bool = False) -> Dict[int, Dict]:
+    """Función que recibe una lista de ids de vuelos y retorna los datos de cada vuelo en formato CamelCase, indexados por id.
+
+    Los datos de los vuelos, de las tarjetas de embarque y de los pasajeros se obtienen en una sola
+    consulta por cada BULK_QUERY_CHUNK_SIZE vuelos. Los vuelos sin pasajeros no se incluyen. Los
+    pasajeros son PassengerRecord; su formato CamelCase se construye al serializar la respuesta.
+    Con ``unassigned_only`` solo se cargan los pasajeros sin asiento.
+    """
+    flights = {}
+    for flight_ids_chunk in iter_chunks(sorted(set(flight_ids)), BULK_QUERY_CHUNK_SIZE):
+        boarding_passes = BoardingPass.objects.filter(flight_id__in=flight_ids_chunk)
+        if unassigned_only:
+            boarding_passes = boarding_passes.filter(seat_id__isnull=True)
+        boarding_passes = boarding_passes.order_by(
+            "flight_id", "seat_type_id", "seat_id", "boarding_pass_id"
+        ).values_list(*FLIGHT_DATA_COLUMNS)
+
+        data = None
+        for row in boarding_passes:
+            if data is None or data["flightId"] != row[0]:
+                # Crear la respuesta en formato JSON de los datos del vuelo
+                data = flight_header(row)
+                flights[row[0]] = data
+            # Crear los datos del pasajero del vuelo y de su respectiva tarjeta de embarque
+            data["passengers"].append(
+                PassengerRecord(
+                    row[6],
+                    int(row[7]),
+                    row[8],
+                    row[9],
+                    row[10],
+                    row[11],
+                    row[12],
+                    row[13],
+                    row[14],
+                )
+            )
+    return flights
+
+
+def flight_data(flight_id: int) -> Dict:
+    """Función que recibe el id del vuelo y retorna los datos del vuelo en formato CamelCase.
+
+    Los datos del vuelo, de las tarjetas de embarque y de los pasajeros se obtienen en una sola consulta.
+    """
+    return flights_data([flight_id]).get(flight_id)
+
+
+def airplanes_seats(airplane_ids: List[int]) -> Dict[int, List[SeatRecord]]:
+    """Función que recibe una lista de ids de aviones y retorna los asientos de cada uno ordenados por id, con solo las columnas necesarias"""
+    seats_by_airplane = {airplane_id: [] for airplane_id in airplane_ids}
+    for airplane_ids_chunk in iter_chunks(sorted(seats_by_airplane), BULK_QUERY_CHUNK_SIZE):
+        seats = (
+            Seat.objects.filter(airplane_id__in=airplane_ids_chunk)
+            .order_by("airplane_id", "seat_id")
+            .values_list(
+                "airplane_id", "seat_id", "seat_row", "seat_column", "seat_type_id"
+            )
         )
-    return data
+        for airplane_id, *seat in seats:
+            seats_by_airplane[airplane_id].append(SeatRecord(*seat))
+    return seats_by_airplane
+
+
+def airplane_seats(airplane_id: int) -> List[SeatRecord]:
+    """Función que recibe el id de un avión y retorna sus asientos ordenados por id con solo las columnas necesarias"""
+    return airplanes_seats([airplane_id])[airplane_id]
+
+
+# Archivo de mapas de asientos compartido por los workers (SEAT_MAP_STORE), si está configurado
+seat_map_store = SeatMapStore(settings.SEAT_MAP_STORE) if settings.SEAT_MAP_STORE else None
+
+
+def build_seat_map(airplane_id: int) -> SeatMap:
+    """Función que recibe el id de un avión y construye su mapa de asientos desde SEAT_MAP_STORE o, si no está ahí, desde la base de datos"""
+    if seat_map_store is not None:
+        seat_map = seat_map_store.seat_map(airplane_id)
+        if seat_map is not None:
+            return seat_map
+    return SeatMap(airplane_id, airplane_seats(airplane_id))
 
 
-@retry(
-    stop=stop_after_attempt(5),  # Intenta hasta 5 veces
-    wait=wait_fixed(1),  # Espera 1 segundo antes de intentar de nuevo
-    retry=retry_if_exception_type(
-        OperationalError
-    ),  # Solo reintenta si es un error de conexión
+SEAT_MAP_GENERATION_KEY = "seat-map-generation"
+# Nombre del archivo de marca que invalida los mapas de todos los aviones en SEAT_MAP_GENERATION_DIR
+ALL_AIRPLANES_MARKER = "all"
+
+
+def marker_stamp(path: str) -> Tuple:
+    """Función que retorna la identidad (inodo y fecha de modificación) de un archivo de marca, o None si no existe."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns)
+
+
+def read_seat_map_generation(airplane_id: int) -> Tuple:
+    """Función que lee las marcas de invalidación del mapa de asientos de un avión: las del cache de Django,
+    las de los archivos de SEAT_MAP_GENERATION_DIR y la identidad del archivo SEAT_MAP_STORE."""
+    keys = [SEAT_MAP_GENERATION_KEY, f"{SEAT_MAP_GENERATION_KEY}:{airplane_id}"]
+    stamps = caches[settings.SEAT_MAP_CACHE_ALIAS].get_many(keys)
+    markers = (
+        tuple(
+            marker_stamp(os.path.join(settings.SEAT_MAP_GENERATION_DIR, name))
+            for name in (ALL_AIRPLANES_MARKER, str(airplane_id))
+        )
+        if settings.SEAT_MAP_GENERATION_DIR
+        else ()
+    )
+    store_id = seat_map_store.file_id() if seat_map_store is not None else None
+    return (*(stamps.get(key) for key in keys), *markers, store_id)
+
+
+# id del avión -> (instante de la lectura, marcas leídas)
+seat_map_generation_checks: Dict[int, Tuple[float, Tuple]] = {}
+
+
+def seat_map_generation(airplane_id: int) -> Tuple:
+    """Función que recibe el id de un avión y retorna las marcas de invalidación compartidas de su mapa de asientos.
+
+    Se usa en cada carga de un mapa y en cada versión de las respuestas guardadas, por eso las marcas
+    se leen como mucho una vez cada SEAT_MAP_GENERATION_CHECK_INTERVAL segundos por avión en cada
+    worker: una invalidación desde otro proceso se nota a más tardar después de ese intervalo.
+    """
+    now = time.monotonic()
+    checked = seat_map_generation_checks.get(airplane_id)
+    if checked is not None and now - checked[0] < settings.SEAT_MAP_GENERATION_CHECK_INTERVAL:
+        return checked[1]
+    generation = read_seat_map_generation(airplane_id)
+    seat_map_generation_checks[airplane_id] = (now, generation)
+    return generation
+
+
+seat_map_cache = SeatMapCache(
+    max_size=settings.SEAT_MAP_CACHE_SIZE,
+    ttl=settings.SEAT_MAP_CACHE_TTL or None,
+    generation=seat_map_generation,
 )
-def seats_list() -> List:
-    """Función que devuelve una lista de todas las sillas ordenadas por id"""
-    seats_list = Seat.objects.all().order_by("seat_id")
-    seats = []
-    for seat in seats_list:
-        seats.append(seat)
-    return seats
+
+
+def build_seat_maps(airplane_ids: List[int]) -> Dict[int, SeatMap]:
+    """Función que recibe una lista de ids de aviones y construye sus mapas de asientos desde SEAT_MAP_STORE; los que no están ahí se cargan de la base de datos en una sola consulta"""
+    seat_maps = {}
+    if seat_map_store is not None:
+        for airplane_id in airplane_ids:
+            seat_map = seat_map_store.seat_map(airplane_id)
+            if seat_map is not None:
+                seat_maps[airplane_id] = seat_map
+
+    missing = [airplane_id for airplane_id in airplane_ids if airplane_id not in seat_maps]
+    if missing:
+        seat_maps.update(
+            (airplane_id, SeatMap(airplane_id, seats))
+            for airplane_id, seats in airplanes_seats(missing).items()
+        )
+    return seat_maps
+
+
+def load_seat_map(airplane_id: int) -> SeatMap:
+    """Función que recibe el id de un avión y retorna su mapa de asientos con los vecinos precalculados, usando el cache del proceso"""
+    return seat_map_cache.get(airplane_id, build_seat_map)
+
+
+def load_seat_maps(airplane_ids: List[int]) -> Dict[int, SeatMap]:
+    """Función que recibe una lista de ids de aviones y retorna sus mapas de asientos; los que no están en cache se cargan en una sola consulta"""
+    return seat_map_cache.get_many(airplane_ids, build_seat_maps)
+
+
+def shared_seat_map_invalidation() -> bool:
+    """Función que retorna True si las marcas de invalidación llegan a los demás procesos, es decir si SEAT_MAP_CACHE_ALIAS no es un cache del proceso (locmem o dummy)."""
+    return not isinstance(caches[settings.SEAT_MAP_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+
+def touch_marker(name: str) -> None:
+    """Función que reemplaza un archivo de marca de SEAT_MAP_GENERATION_DIR por uno nuevo, así cambia su identidad."""
+    os.makedirs(settings.SEAT_MAP_GENERATION_DIR, exist_ok=True)
+    descriptor, temporary_path = tempfile.mkstemp(
+        prefix=f".{name}-", dir=settings.SEAT_MAP_GENERATION_DIR
+    )
+    with os.fdopen(descriptor, "w") as marker_file:
+        marker_file.write(str(time.time_ns()))
+    os.replace(temporary_path, os.path.join(settings.SEAT_MAP_GENERATION_DIR, name))
+
+
+def invalidate_seat_maps(airplane_ids: List[int] = None) -> None:
+    """Función que invalida los mapas de asientos de los aviones indicados, o de todos si no se entregan ids.
+
+    Se reemplazan los archivos de marca de SEAT_MAP_GENERATION_DIR, que ven los workers del mismo
+    servidor, y se guardan marcas en el cache de Django, que ven los demás servidores si
+    ``SEAT_MAP_CACHE_ALIAS`` apunta a un backend compartido (Redis, ...). En este proceso el cambio
+    se nota de inmediato; en los demás, a más tardar en SEAT_MAP_GENERATION_CHECK_INTERVAL segundos.
+    """
+    stamp = time.time_ns()
+    shared_cache = caches[settings.SEAT_MAP_CACHE_ALIAS]
+    if settings.SEAT_MAP_GENERATION_DIR:
+        for name in airplane_ids or [ALL_AIRPLANES_MARKER]:
+            touch_marker(str(name))
+
+    if airplane_ids is None:
+        shared_cache.set(SEAT_MAP_GENERATION_KEY, stamp, timeout=None)
+        seat_map_generation_checks.clear()
+        seat_map_cache.invalidate()
+        return
+    shared_cache.set_many(
+        {f"{SEAT_MAP_GENERATION_KEY}:{airplane_id}": stamp for airplane_id in airplane_ids},
+        timeout=None,
+    )
+    for airplane_id in airplane_ids:
+        seat_map_generation_checks.pop(airplane_id, None)
+        seat_map_cache.invalidate(airplane_id)
 
 
 def occupied_seats_id(passengers_list: List) -> List:
@@ -80,511 +288,368 @@ def occupied_seats_id(passengers_list: List) -> List:
     occupied_seats_id = []
 
     for passenger in passengers_list:
-        if passenger["seatId"] != None:
-            occupied_seats_id.append(passenger["seatId"])
+        if passenger.seat_id != None:
+            occupied_seats_id.append(passenger.seat_id)
 
     return occupied_seats_id
 
 
-@retry(
-    stop=stop_after_attempt(5),  # Intenta hasta 5 veces
-    wait=wait_fixed(1),  # Espera 1 segundo antes de intentar de nuevo
-    retry=retry_if_exception_type(
-        OperationalError
-    ),  # Solo reintenta si es un error de conexión
-)
-def list_of_available_seat_type_ids(seat_type_id: int, flight_data: List) -> List:
-    "Función que recibe el id de tipo de aiento y los datos del vuelo y retorna los id de los asientos disponibles por clase."
-    seats = Seat.objects.filter(
-        airplane_id=flight_data["airplaneId"], seat_type_id=seat_type_id
-    )
-
-    if not seats:
-        return None
+def list_of_available_seat_type_ids(
+    seat_type_id: int,
+    flight_data: List,
+    seat_map: SeatMap = None,
+    occupied_seat_ids: List[int] = None,
+) -> List:
+    "Función que recibe el id de tipo de aiento, los datos del vuelo y opcionalmente el mapa de asientos del avión y los asientos ocupados (por defecto los de los pasajeros del vuelo) y retorna los id de los asientos disponibles por clase."
+    if seat_map is None:
+        seat_map = load_seat_map(flight_data["airplaneId"])
 
-    seat_type_id_list = []
+    seat_type_id_list = seat_map.seat_ids_by_type.get(seat_type_id)
 
-    for seat in seats:
-        seat_type_id_list.append(seat.seat_id)
+    if not seat_type_id_list:
+        return None
 
-    occupied_seat_id_list = occupied_seats_id(flight_data["passengers"])
+    occupied_seat_id_list = (
+        occupied_seats_id(flight_data["passengers"])
+        if occupied_seat_ids is None
+        else occupied_seat_ids
+    )
     seat_available_type_id_list = list(
         set(seat_type_id_list) - set(occupied_seat_id_list)
     )
     return seat_available_type_id_list
 
 
-def left_seat_id(seat_id: int, seats_list: List) -> int:
-    """Función que recibe el id de un asiento y una lista de total de asientos y retorna el id del asiento de la izquierda."""
-    seat_x = seats_list[seat_id - 1]
-
-    left_seat_id = None
-    for seat in seats_list:
-        if (
-            seat.seat_column == chr(ord(seat_x.seat_column) - 1)
-            and seat.seat_row == seat_x.seat_row
-            and seat.airplane_id == seat_x.airplane_id
-        ):
-            left_seat_id = seat.seat_id
-            break
-    return left_seat_id
-
-
-def right_seat_id(seat_id: int, seats_list: List) -> int:
-    """Función que recibe el id de un asiento y una lista de total de asientos y retorna el id del asiento de la derecha."""
-    seat_x = seats_list[seat_id - 1]
-
-    right_seat_id = None
-    for seat in seats_list:
-        if (
-            seat.seat_column == chr(ord(seat_x.seat_column) + 1)
-            and seat.seat_row == seat_x.seat_row
-            and seat.airplane_id == seat_x.airplane_id
-        ):
-            right_seat_id = seat.seat_id
-            break
-    return right_seat_id
-
-
-def front_seat_id(seat_id: int, seats_list: List) -> int:
-    """Función que recibe el id de un asiento y una lista de total de asientos y retorna el id del asiento frontal."""
-    seat_x = seats_list[seat_id - 1]
-
-    front_seat_id = None
-    for seat in seats_list:
-        if (
-            seat.seat_column == seat_x.seat_column
-            and seat.seat_row == seat_x.seat_row - 1
-            and seat.airplane_id == seat_x.airplane_id
-        ):
-            front_seat_id = seat.seat_id
-            break
-    return front_seat_id
-
-
-def back_seat_id(seat_id: int, seats_list: List) -> int:
-    """Función que recibe el id de un asiento y una lista de total de asientos y retorna el id del asiento trasero."""
-    seat_x = seats_list[seat_id - 1]
-
-    back_seat_id = None
-    for seat in seats_list:
-        if (
-            seat.seat_column == seat_x.seat_column
-            and seat.seat_row == seat_x.seat_row + 1
-            and seat.airplane_id == seat_x.airplane_id
-        ):
-            back_seat_id = seat.seat_id
-            break
-    return back_seat_id
-
-
-def northeast_seat_id(seat_id: int, seats_list: List) -> int:
-    """Función que recibe el id de un asiento y una lista de total de asientos y retorna el id del asiento del noreste."""
-    seat_x = seats_list[seat_id - 1]
-
-    northeast_seat_id = None
-    for seat in seats_list:
-        if (
-            seat.seat_column == chr(ord(seat_x.seat_column) + 1)
-            and seat.seat_row == seat_x.seat_row - 1
-            and seat.airplane_id == seat_x.airplane_id
-        ):
-            northeast_seat_id = seat.seat_id
-            break
-    return northeast_seat_id
-
-
-def southeast_seat_id(seat_id: int, seats_list: List) -> int:
-    """Función que recibe el id de un asiento y una lista de total de asientos y retorna el id del asiento del sureste."""
-    seat_x = seats_list[seat_id - 1]
-
-    southeast_seat_id = None
-    for seat in seats_list:
-        if (
-            seat.seat_column == chr(ord(seat_x.seat_column) + 1)
-            and seat.seat_row == seat_x.seat_row + 1
-            and seat.airplane_id == seat_x.airplane_id
-        ):
-            southeast_seat_id = seat.seat_id
-            break
-    return southeast_seat_id
-
-
-def northwest_seat_id(seat_id: int, seats_list: List) -> int:
-    """Función que recibe el id de un asiento y una lista de total de asientos y retorna el id del asiento del noroeste."""
-    seat_x = seats_list[seat_id - 1]
-
-    northwest_seat_id = None
-    for seat in seats_list:
-        if (
-            seat.seat_column == chr(ord(seat_x.seat_column) - 1)
-            and seat.seat_row == seat_x.seat_row - 1
-            and seat.airplane_id == seat_x.airplane_id
-        ):
-            northwest_seat_id = seat.seat_id
-            break
-    return northwest_seat_id
-
-
-def southwest_seat_id(seat_id: int, seats_list: List) -> int:
-    """Función que recibe el id de un asiento y una lista de total de asientos y retorna el id del asiento del suroeste."""
-    seat_x = seats_list[seat_id - 1]
-
-    southwest_seat_id = None
-    for seat in seats_list:
-        if (
-            seat.seat_column == chr(ord(seat_x.seat_column) - 1)
-            and seat.seat_row == seat_x.seat_row + 1
-            and seat.airplane_id == seat_x.airplane_id
-        ):
-            southwest_seat_id = seat.seat_id
-            break
-    return southwest_seat_id
-
-
-def seats_distribution(id: int) -> Dict:
-    """Función que recibe el id de un vuelo y retorna los mismos datos pero con asientos asignados a cada pasajero"""
-    data = flight_data(id)
+def assign_seats(
+    data: Dict, seat_map: SeatMap, engine: str = None, occupied_seat_ids: List[int] = None
+) -> Dict:
+    """Función que recibe los datos de un vuelo y el mapa de asientos de su avión y asigna un asiento a cada pasajero sin asiento.
+
+    No consulta la base de datos. ``engine`` es el nombre de la estrategia de asignación; por defecto
+    se usa SEAT_ASSIGNMENT_ENGINE. ``occupied_seat_ids`` son los asientos ya ocupados cuando ``data``
+    no incluye a los pasajeros que ya tienen asiento.
+    """
+    if occupied_seat_ids is None:
+        occupied_seat_ids = occupied_seats_id(data["passengers"])
+
+    with phase("availability"):
+        first_class = list_of_available_seat_type_ids(
+            1, data, seat_map, occupied_seat_ids
+        )  # Lista de ids de asientos de primera clase
+        premiun_economic_class = list_of_available_seat_type_ids(
+            2, data, seat_map, occupied_seat_ids
+        )  # Lista de ids de asientos de clase económica premiun
+        economic_class = list_of_available_seat_type_ids(
+            3, data, seat_map, occupied_seat_ids
+        )  # Lista de ids de asientos de clase económica
+
+        # Asientos libres por tipo de asiento, con consulta y eliminación en O(1)
+        available_seats_ids = {
+            1: FreeSeatPool(first_class or []),
+            2: FreeSeatPool(premiun_economic_class or []),
+            3: FreeSeatPool(economic_class or []),
+        }
+
+    get_engine(engine).assign(
+        seat_map, available_seats_ids, PassengerGroups(data["passengers"])
+    )
+
+    return data
+
+
+def load_flight(flight_id: int) -> Tuple[Dict, SeatMap]:
+    """Función que recibe el id de un vuelo y retorna sus datos y el mapa de asientos de su avión, o (None, None) si no existe"""
+    with phase("load_flight"):
+        data = flight_data(flight_id)
+    if not data:
+        return None, None
+    with phase("load_seats"):
+        return data, load_seat_map(data["airplaneId"])
+
+
+def load_flights(flight_ids: List[int]) -> Tuple[Dict[int, Dict], Dict[int, SeatMap]]:
+    """Función que recibe una lista de ids de vuelos y retorna los datos de los vuelos y los mapas de asientos de sus aviones, indexados por id"""
+    with phase("load_flight"):
+        flights = flights_data(flight_ids)
+    with phase("load_seats"):
+        seat_maps = load_seat_maps(list({data["airplaneId"] for data in flights.values()}))
+    return flights, seat_maps
+
+
+def seats_distribution(id: int, engine: str = None, version: str = None) -> Dict:
+    """Función que recibe el id de un vuelo y retorna los mismos datos pero con asientos asignados a cada pasajero.
+
+    ``engine`` es el nombre de la estrategia de asignación; por defecto se usa SEAT_ASSIGNMENT_ENGINE.
+    Con CHECKIN_COALESCE las llamadas simultáneas del mismo vuelo y estrategia en el proceso comparten
+    un solo cálculo (y el mismo resultado, que no se debe modificar). ``version`` es la huella de los
+    datos del vuelo (flight_version) que ya leyó quien llama: solo se comparten cálculos de la misma
+    versión, así una solicitud que ya vio datos nuevos no recibe una simulación de datos anteriores.
+    """
+    engine = engine or settings.SEAT_ASSIGNMENT_ENGINE
+    if settings.CHECKIN_COALESCE:
+        return simulation_calls.call(
+            (id, engine, version), compute_seats_distribution, id, engine
+        )
+    return compute_seats_distribution(id, engine)
+
+
+def compute_seats_distribution(id: int, engine: str) -> Dict:
+    """Función que carga un vuelo y asigna los asientos de sus pasajeros.
+
+    Todas las consultas de la solicitud comparten una sola política de reintentos (database_policy).
+    """
+    data, seat_map = database_policy.call(load_flight, id)
     if not data:
         return None
 
-    seats_data = seats_list()  # Lista de datos de todos los asientos
-
-    first_class = list_of_available_seat_type_ids(
-        1, data
-    )  # Lista de ids de asientos de primera clase
-    premiun_economic_class = list_of_available_seat_type_ids(
-        2, data
-    )  # Lista de ids de asientos de clase económica premiun
-    economic_class = list_of_available_seat_type_ids(
-        3, data
-    )  # Lista de ids de asientos de clase económica
-
-    available_seats_ids = {
-        1: first_class,
-        2: premiun_economic_class,
-        3: economic_class,
+    return assign_seats(data, seat_map, engine)
+
+
+class SeatConflictError(Exception):
+    """Error que indica que otra asignación guardó asientos en el mismo vuelo durante la transacción; no se guarda nada."""
+
+
+def persist_flight_seats(flight_id: int, engine: str = None) -> Dict:
+    """Función que asigna asientos a los pasajeros sin asiento de un vuelo y los guarda en una transacción.
+
+    La fila del vuelo se bloquea con SELECT ... FOR UPDATE, así las asignaciones del mismo vuelo se
+    ejecutan de a una. Los asientos ya guardados se cargan como ocupados y solo se cargan y resuelven
+    los pasajeros con ``seat_id`` nulo, por lo que el trabajo depende de las tarjetas nuevas y no del
+    tamaño del vuelo. Los asientos se escriben con bulk_update solo sobre las tarjetas que siguen sin
+    asiento; si alguna ya lo tiene se lanza SeatConflictError y la transacción se deshace.
+
+    Retorna los datos del vuelo con los pasajeros que recibieron asiento en esta llamada, o None si el
+    vuelo no existe o no tiene pasajeros.
+    """
+    with transaction.atomic():
+        with phase("load_flight"):
+            flight = (
+                Flight.objects.select_for_update()
+                .filter(flight_id=flight_id)
+                .values_list(
+                    "flight_id",
+                    "takeoff_date_time",
+                    "takeoff_airport",
+                    "landing_date_time",
+                    "landing_airport",
+                    "airplane_id",
+                )
+                .first()
+            )
+            if flight is None:
+                return None
+            occupied_seat_ids = list(
+                BoardingPass.objects.filter(
+                    flight_id=flight_id, seat_id__isnull=False
+                ).values_list("seat_id", flat=True)
+            )
+            data = flights_data([flight_id], unassigned_only=True).get(flight_id)
+
+        if data is None:
+            # Todos los pasajeros ya tienen asiento
+            return flight_header(flight) if occupied_seat_ids else None
+
+        with phase("load_seats"):
+            seat_map = load_seat_map(data["airplaneId"])
+        assign_seats(data, seat_map, engine, occupied_seat_ids)
+
+        with phase("persist"):
+            boarding_passes = [
+                BoardingPass(boarding_pass_id=passenger.boarding_pass_id, seat_id=passenger.seat_id)
+                for passenger in data["passengers"]
+                if passenger.seat_id != None
+            ]
+            updated = BoardingPass.objects.filter(seat_id__isnull=True).bulk_update(
+                boarding_passes, ["seat_id"], batch_size=BULK_QUERY_CHUNK_SIZE
+            )
+            if updated != len(boarding_passes):
+                raise SeatConflictError(
+                    f"{len(boarding_passes) - updated} tarjetas de embarque del vuelo {flight_id} ya tenían asiento"
+                )
+
+    data["passengers"] = [
+        passenger for passenger in data["passengers"] if passenger.seat_id != None
+    ]
+    return data
+
+
+def persist_seats_distribution(flight_id: int, engine: str = None) -> Dict:
+    """Función que recibe el id de un vuelo, asigna y guarda los asientos de sus pasajeros sin asiento (persist_flight_seats) y retorna los que se asignaron.
+
+    La transacción completa se reintenta con la política de la base de datos (por ejemplo ante un
+    deadlock de MySQL).
+    """
+    return database_policy.call(persist_flight_seats, flight_id, engine)
+
+
+def assign_seats_payload(payload: Tuple) -> Tuple[Dict, float]:
+    """Función que recibe una tupla (datos del vuelo, mapa de asientos, estrategia), asigna los asientos y retorna los datos y los segundos que tomó; se ejecuta en los procesos del pool."""
+    data, seat_map, engine = payload
+    start = time.perf_counter()
+    data = assign_seats(data, seat_map, engine)
+    return data, time.perf_counter() - start
+
+
+def iter_seats_distributions(
+    flight_ids: Iterable[int],
+    engine: str = None,
+    workers: int = None,
+    chunk_size: int = BULK_QUERY_CHUNK_SIZE,
+) -> Iterator[Tuple[int, Dict, float]]:
+    """Función que recibe un iterable de ids de vuelos y retorna, a medida que terminan, tuplas (id, simulación o None, segundos de asignación).
+
+    Los vuelos se procesan en partes de ``chunk_size``: por cada parte los vuelos, sus pasajeros y los
+    mapas de asientos se cargan con consultas masivas en este proceso, por lo que la memoria usada no
+    depende de la cantidad total de vuelos. Con ``workers`` mayor que 1 la asignación de asientos se
+    reparte en el pool de batch_executor(), que se reutiliza entre llamadas. Los resultados se entregan
+    en el orden de ``flight_ids``.
+    """
+    workers = workers or settings.CHECKIN_WORKERS
+    engine = engine or settings.SEAT_ASSIGNMENT_ENGINE
+    results = None
+
+    try:
+        for flight_ids_chunk in iter_chunks(flight_ids, chunk_size):
+            flights, seat_maps = database_policy.call(load_flights, flight_ids_chunk)
+            # Vuelos sin repetir, en el orden en que se pidieron
+            flight_ids_chunk = list(dict.fromkeys(flight_ids_chunk))
+            payloads = [
+                (flights[flight_id], seat_maps[flights[flight_id]["airplaneId"]], engine)
+                for flight_id in flight_ids_chunk
+                if flight_id in flights
+            ]
+
+            if workers > 1 and len(payloads) > 1:
+                results = batch_executor(workers).map(
+                    assign_seats_payload,
+                    payloads,
+                    chunksize=max(1, len(payloads) // (workers * 4)),
+                )
+            else:
+                results = map(assign_seats_payload, payloads)
+
+            for flight_id in flight_ids_chunk:
+                if flight_id in flights:
+                    data, seconds = next(results)
+                    yield flight_id, data, seconds
+                else:
+                    yield flight_id, None, 0.0
+    finally:
+        # Si se deja de iterar antes de terminar, se cancelan las tareas pendientes del pool compartido
+        if hasattr(results, "close"):
+            results.close()
+
+
+batch_executors_lock = threading.Lock()
+batch_executors: Dict[int, ProcessPoolExecutor] = {}
+
+
+def batch_executor(workers: int) -> ProcessPoolExecutor:
+    """Función que retorna el ProcessPoolExecutor del proceso con ``workers`` procesos para iter_seats_distributions.
+
+    Igual que assignment_executor(), el pool se crea una sola vez y lo reutilizan las solicitudes
+    siguientes: los procesos hijos y su django.setup no se repiten en cada POST /flights/passengers:batch.
+    """
+    with batch_executors_lock:
+        executor = batch_executors.get(workers)
+        if executor is None:
+            # Los procesos hijos no usan la base de datos; se cierran las conexiones para no compartirlas
+            for connection in connections.all():
+                if not connection.in_atomic_block:
+                    connection.close()
+            executor = batch_executors[workers] = ProcessPoolExecutor(
+                max_workers=workers, initializer=django.setup
+            )
+        return executor
+
+
+def seats_distributions(
+    flight_ids: List[int], engine: str = None, workers: int = None
+) -> Dict[int, Dict]:
+    """Función que recibe una lista de ids de vuelos y retorna la simulación de cada uno indexada por id (None si no existe).
+
+    Los vuelos, sus pasajeros y los mapas de asientos de los aviones distintos se cargan con consultas
+    masivas en este proceso. Con ``workers`` mayor que 1 la asignación de asientos se reparte en el
+    pool de batch_executor(); los resultados se reúnen en el orden de ``flight_ids``.
+    """
+    return {
+        flight_id: data
+        for flight_id, data, _ in iter_seats_distributions(
+            flight_ids, engine, workers
+        )
     }
 
-    list_of_empty_seat_ids = []
 
-    passengers = data["passengers"]
+assignment_executor_lock = threading.Lock()
+assignment_executor_instance = None
+
+
+def assignment_executor() -> Executor:
+    """Función que retorna el executor del proceso donde la vista asíncrona ejecuta la asignación de asientos (ASYNC_ASSIGNMENT_EXECUTOR)."""
+    global assignment_executor_instance
+    with assignment_executor_lock:
+        if assignment_executor_instance is None:
+            workers = settings.ASYNC_ASSIGNMENT_WORKERS
+            if settings.ASYNC_ASSIGNMENT_EXECUTOR == "process":
+                assignment_executor_instance = ProcessPoolExecutor(
+                    max_workers=workers, initializer=django.setup
+                )
+            else:
+                assignment_executor_instance = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="seat-assignment"
+                )
+        return assignment_executor_instance
+
+
+def call_in_thread(function: Callable, *args):
+    """Función que ejecuta una carga desde la base de datos con la política de reintentos, desde un hilo del executor de sync_to_async.
+
+    Al terminar se liberan las conexiones del hilo, como hace Django al final de cada solicitud,
+    para devolverlas al pool.
+    """
+    try:
+        return database_policy.call(function, *args)
+    finally:
+        close_old_connections()
+
+
+async def aseats_distribution(id: int, engine: str = None, version: str = None) -> Dict:
+    """Función asíncrona equivalente a seats_distribution, con las llamadas simultáneas agrupadas en el event loop."""
+    engine = engine or settings.SEAT_ASSIGNMENT_ENGINE
+    if settings.CHECKIN_COALESCE:
+        return await async_simulation_calls.call(
+            (id, engine, version), acompute_seats_distribution, id, engine
+        )
+    return await acompute_seats_distribution(id, engine)
 
-    # Distribución de asientos para los menores de edad
-    for passenger in passengers:
 
-        list_of_empty_seat_ids = available_seats_ids[
-            passenger["seatTypeId"]
-        ]  # Id de asientos disponibles segun el tipo de asiento del pasajero
-        assigned = False
+async def acompute_seats_distribution(id: int, engine: str = None) -> Dict:
+    """Función asíncrona equivalente a compute_seats_distribution, sin agrupar llamadas; el resultado es de quien llama.
 
-        if passenger["age"] < 18 and passenger["seatId"] == None:
-            # Lista de datos de acompañantes sin asiento que tiene el menor de edad
-            companions = [
-                companion
-                for companion in passengers
-                if companion.get("purchaseId") == passenger["purchaseId"]
-                and companion.get("seatId") == None
-                and companion.get("passengerId") != passenger["passengerId"]
-                and companion.get("age") >= 18
-            ]
-            for companion in companions:
-                if passengers[passengers.index(companion)]["seatId"] == None:
-                    for seat_id in list_of_empty_seat_ids:
-                        x_left_seat_id = left_seat_id(seat_id, seats_data)
-                        x_right_seat_id = right_seat_id(seat_id, seats_data)
-                        # Si es que existe el asiento vecino izquierdo
-                        if (
-                            x_left_seat_id
-                            and (x_left_seat_id
-                            in list_of_empty_seat_ids)
-                        ):
-
-                            if passenger["seatId"] == None:
-                                # Actualizamos el valor del seatId del pasajero menor de edad
-                                passenger["seatId"] = seat_id
-                                # Eliminamos el id del asiento del menor de edad de la lista de ids de asientos disponibles
-                                list_of_empty_seat_ids.pop(
-                                    list_of_empty_seat_ids.index(seat_id)
-                                )
-                            # Actualizamos el valor del seatId del acompañanate del pasajero menor de edad
-                            passengers[passengers.index(companion)][
-                                "seatId"
-                            ] = x_left_seat_id
-                            # Eliminamos el id del asiento del acompañanate de la lista de id de asientos disponibles
-                            list_of_empty_seat_ids.pop(
-                                list_of_empty_seat_ids.index(
-                                    x_left_seat_id
-                                )
-                            )
-
-                            assigned = True
-                        # Si es que existe el asiento vecino derecho
-                        elif (
-                            x_right_seat_id
-                            and (x_right_seat_id
-                            in list_of_empty_seat_ids)
-                        ):
-
-                            if passenger["seatId"] == None:
-                                # Actualizamos el valor del seatId del pasajero menor de edad
-                                passenger["seatId"] = seat_id
-                                # Eliminamos el id del asiento del menor de edad de la lista de id de asientos disponibles
-                                list_of_empty_seat_ids.pop(
-                                    list_of_empty_seat_ids.index(seat_id)
-                                )
-                            # Actualizamos el valor del seatId del acompañanate del pasajero menor de edad
-                            passengers[passengers.index(companion)][
-                                "seatId"
-                            ] = x_right_seat_id
-                            # Eliminamos el id del asiento del acompañanate de la lista de id de asientos disponibles
-                            list_of_empty_seat_ids.pop(
-                                list_of_empty_seat_ids.index(
-                                    x_right_seat_id
-                                )
-                            )
-
-                            assigned = True
-
-                        if assigned:
-                            break
-                # Actualizo la cantidad de asientos disponibles
-                available_seats_ids[passenger["seatTypeId"]] = list_of_empty_seat_ids
-
-    # Distribución de asientos para adultos que tienen el mismo purchase id
-    for passenger in passengers:
-        # Id de asientos disponibles segun el tipo de asiento del pasajero
-        list_of_empty_seat_ids = available_seats_ids[passenger["seatTypeId"]]
-        assigned = False
-        # Si el pasajero es menor de edad y no tiene asiento
-        if passenger["age"] >= 18 and passenger["seatId"] == None:
-            companions = [
-                companion
-                for companion in passengers
-                if companion.get("purchaseId") == passenger["purchaseId"]
-                and companion.get("seatId") == None
-                and companion.get("passengerId") != passenger["passengerId"]
-            ]
-            if companions != []:
-                for companion in companions:
-                    if passengers[passengers.index(companion)]["seatId"] == None:
-                        for seat_id in list_of_empty_seat_ids:
-                            x_left_seat_id = left_seat_id(seat_id, seats_data)
-                            x_right_seat_id = right_seat_id(seat_id, seats_data)
-                            x_front_seat_id = front_seat_id(seat_id, seats_data)
-                            x_back_seat_id = back_seat_id(seat_id, seats_data)
-                            x_northeast_seat_id = northeast_seat_id(seat_id, seats_data)
-                            x_southeast_seat_id = southeast_seat_id(seat_id, seats_data)
-                            x_northwest_seat_id = northwest_seat_id(seat_id, seats_data)
-                            x_southwest_seat_id = southwest_seat_id(seat_id, seats_data)
-                            # Si es que existe el asiento vecino izquierdo
-                            if (
-                                x_left_seat_id
-                                and (x_left_seat_id
-                                in list_of_empty_seat_ids)
-                            ):
-
-                                if passenger["seatId"] == None:
-                                    # Actualizamos el valor del seatId del pasajero
-                                    passenger["seatId"] = seat_id
-                                    # Eliminamos el id del asiento asignado al pasajero de la lista de asientos disponibles
-                                    list_of_empty_seat_ids.pop(
-                                        list_of_empty_seat_ids.index(seat_id)
-                                    )
-                                # Actualizamos el valor del seatId del acompañanate del pasajero
-                                passengers[passengers.index(companion)][
-                                    "seatId"
-                                ] = x_left_seat_id
-                                # Eliminamos el id del asiento asignado al acompañante del pasajero de la lista de asientos disponibles
-                                list_of_empty_seat_ids.pop(
-                                    list_of_empty_seat_ids.index(
-                                        x_left_seat_id
-                                    )
-                                )
-                                assigned = True
-                            # Si es que existe el asiento vecino derecho
-                            elif (
-                                x_right_seat_id
-                                and (x_right_seat_id
-                                in list_of_empty_seat_ids)
-                            ):
-                                if passenger["seatId"] == None:
-                                    # Actualizamos el valor del seatId del pasajero
-                                    passenger["seatId"] = seat_id
-                                    # Eliminamos el id del asiento asignado al pasajero de la lista de asientos disponibles
-                                    list_of_empty_seat_ids.pop(
-                                        list_of_empty_seat_ids.index(seat_id)
-                                    )
-                                # Actualizamos el valor del seatId del acompañanate del pasajero
-                                passengers[passengers.index(companion)][
-                                    "seatId"
-                                ] = x_right_seat_id
-                                # Eliminamos el id del asiento asignado al acompañante del pasajero de la lista de asientos disponibles
-                                list_of_empty_seat_ids.pop(
-                                    list_of_empty_seat_ids.index(
-                                        x_right_seat_id
-                                    )
-                                )
-                                assigned = True
-                            # Si es que existe el asiento vecino frontal
-                            elif (
-                                x_front_seat_id
-                                and (x_front_seat_id
-                                in list_of_empty_seat_ids)
-                            ):
-                                if passenger["seatId"] == None:
-                                    # Actualizamos el valor del seatId del pasajero
-                                    passenger["seatId"] = seat_id
-                                    # Eliminamos el id del asiento asignado al pasajero de la lista de asientos disponibles
-                                    list_of_empty_seat_ids.pop(
-                                        list_of_empty_seat_ids.index(seat_id)
-                                    )
-                                # Actualizamos el valor del seatId del acompañanate del pasajero
-                                passengers[passengers.index(companion)][
-                                    "seatId"
-                                ] = x_front_seat_id
-                                # Eliminamos el id del asiento asignado al acompañante del pasajero de la lista de asientos disponibles
-                                list_of_empty_seat_ids.pop(
-                                    list_of_empty_seat_ids.index(
-                                        x_front_seat_id
-                                    )
-                                )
-                                assigned = True
-                            # Si es que existe el asiento vecino trasero
-                            elif (
-                                x_back_seat_id
-                                and (x_back_seat_id
-                                in list_of_empty_seat_ids)
-                            ):
-                                if passenger["seatId"] == None:
-                                    # Actualizamos el valor del seatId del pasajero
-                                    passenger["seatId"] = seat_id
-                                    # Eliminamos el id del asiento asignado al pasajero de la lista de asientos disponibles
-                                    list_of_empty_seat_ids.pop(
-                                        list_of_empty_seat_ids.index(seat_id)
-                                    )
-                                # Actualizamos el valor del seatId del acompañanate del pasajero
-                                passengers[passengers.index(companion)][
-                                    "seatId"
-                                ] = x_back_seat_id
-                                # Eliminamos el id del asiento asignado al acompañante del pasajero de la lista de asientos disponibles
-                                list_of_empty_seat_ids.pop(
-                                    list_of_empty_seat_ids.index(
-                                        x_back_seat_id
-                                    )
-                                )
-                                assigned = True
-                            # Si es que existe el asiento vecino noreste
-                            elif (
-                                x_northeast_seat_id
-                                and (x_northeast_seat_id
-                                in list_of_empty_seat_ids)
-                            ):
-                                if passenger["seatId"] == None:
-                                    # Actualizamos el valor del seatId del pasajero
-                                    passenger["seatId"] = seat_id
-                                    # Eliminamos el id del asiento asignado al pasajero de la lista de asientos disponibles
-                                    list_of_empty_seat_ids.pop(
-                                        list_of_empty_seat_ids.index(seat_id)
-                                    )
-                                # Actualizamos el valor del seatId del acompañanate del pasajero
-                                passengers[passengers.index(companion)][
-                                    "seatId"
-                                ] = x_northeast_seat_id
-                                # Eliminamos el id del asiento asignado al acompañante del pasajero de la lista de asientos disponibles
-                                list_of_empty_seat_ids.pop(
-                                    list_of_empty_seat_ids.index(
-                                        x_northeast_seat_id
-                                    )
-                                )
-                                assigned = True
-                            # Si es que existe el asiento vecino sureste
-                            elif (
-                                x_southeast_seat_id
-                                and x_southeast_seat_id
-                                in list_of_empty_seat_ids
-                            ):
-                                if passenger["seatId"] == None:
-                                    # Actualizamos el valor del seatId del pasajero
-                                    passenger["seatId"] = seat_id
-                                    # Eliminamos el id del asiento asignado al pasajero de la lista de asientos disponibles
-                                    list_of_empty_seat_ids.pop(
-                                        list_of_empty_seat_ids.index(seat_id)
-                                    )
-                                # Actualizamos el valor del seatId del acompañanate del pasajero
-                                passengers[passengers.index(companion)][
-                                    "seatId"
-                                ] = x_southeast_seat_id
-                                # Eliminamos el id del asiento asignado al acompañante del pasajero de la lista de asientos disponibles
-                                list_of_empty_seat_ids.pop(
-                                    list_of_empty_seat_ids.index(
-                                        x_southeast_seat_id
-                                    )
-                                )
-                                assigned = True
-                            # Si es que existe el asiento vecino noroeste
-                            elif (
-                                x_northwest_seat_id
-                                and (x_northwest_seat_id
-                                in list_of_empty_seat_ids)
-                            ):
-                                if passenger["seatId"] == None:
-                                    # Actualizamos el valor del seatId del pasajero
-                                    passenger["seatId"] = seat_id
-                                    # Eliminamos el id del asiento asignado al pasajero de la lista de asientos disponibles
-                                    list_of_empty_seat_ids.pop(
-                                        list_of_empty_seat_ids.index(seat_id)
-                                    )
-                                # Actualizamos el valor del seatId del acompañanate del pasajero
-                                passengers[passengers.index(companion)][
-                                    "seatId"
-                                ] = x_northwest_seat_id
-                                # Eliminamos el id del asiento asignado al acompañante del pasajero de la lista de asientos disponibles
-                                list_of_empty_seat_ids.pop(
-                                    list_of_empty_seat_ids.index(
-                                        x_northwest_seat_id
-                                    )
-                                )
-                                assigned = True
-                            elif (
-                                x_southwest_seat_id
-                                and (x_southwest_seat_id
-                                in list_of_empty_seat_ids)
-                            ):
-                                if passenger["seatId"] == None:
-                                    # Actualizamos el valor del seatId del pasajero
-                                    passenger["seatId"] = seat_id
-                                    # Eliminamos el id del asiento asignado al pasajero de la lista de asientos disponibles
-                                    list_of_empty_seat_ids.pop(
-                                        list_of_empty_seat_ids.index(seat_id)
-                                    )
-                                # Actualizamos el valor del seatId del acompañanate del pasajero
-                                passengers[passengers.index(companion)][
-                                    "seatId"
-                                ] = x_southwest_seat_id
-                                # Eliminamos el id del asiento asignado al acompañante del pasajero de la lista de asientos disponibles
-                                list_of_empty_seat_ids.pop(
-                                    list_of_empty_seat_ids.index(
-                                        x_southwest_seat_id
-                                    )
-                                )
-                                assigned = True
-
-                            if assigned:
-                                break
-                # Se actualiza la lista de id de asientos disponibles
-                available_seats_ids[passenger["seatTypeId"]] = list_of_empty_seat_ids
-
-    # Distribución de asientos para los pasajeros restantes
-    for passenger in passengers:
-        # Id de asientos disponibles segun el tipo de asiento del pasajero
-        list_of_empty_seat_ids = available_seats_ids[passenger["seatTypeId"]]
-
-        if passenger["seatId"] == None:
-            passenger["seatId"] = list_of_empty_seat_ids[0]
-            list_of_empty_seat_ids.pop(0)
-            available_seats_ids[passenger["seatTypeId"]] = list_of_empty_seat_ids
-
-    data["passengers"] = passengers
+    La carga desde la base de datos corre en un hilo sin bloquear el event loop, así varias solicitudes
+    esperan a la base de datos al mismo tiempo, y la asignación de asientos corre en assignment_executor().
+    """
+    data, seat_map = await sync_to_async(call_in_thread, thread_sensitive=False)(
+        load_flight, id
+    )
+    if not data:
+        return None
 
+    engine = engine or settings.SEAT_ASSIGNMENT_ENGINE
+    executor = assignment_executor()
+    loop = asyncio.get_running_loop()
+    if isinstance(executor, ProcessPoolExecutor):
+        # Las fases de la asignación no se miden en el otro proceso; se cuenta el total
+        data, seconds = await loop.run_in_executor(
+            executor, assign_seats_payload, (data, seat_map, engine)
+        )
+        record_phase("assign", seconds)
+    else:
+        # run_in_executor no copia el contexto; sin él las fases no llegan a la solicitud
+        data, _ = await loop.run_in_executor(
+            executor,
+            contextvars.copy_context().run,
+            assign_seats_payload,
+            (data, seat_map, engine),
+        )
     return data
@@ -0,0 +1,37 @@
+from typing import Dict, Iterator
+from .renderers import dumps
+
+# Pasajeros que se codifican en cada parte de la respuesta
+STREAM_CHUNK_SIZE = 200
+# Bytes de cada parte al enviar un cuerpo ya codificado
+STREAM_BODY_CHUNK_SIZE = 64 * 1024
+
+
+def stream_body(body: bytes, chunk_size: int = STREAM_BODY_CHUNK_SIZE) -> Iterator[bytes]:
+    """Función que recibe un cuerpo JSON ya codificado (del cache de respuestas) y lo retorna en partes de ``chunk_size`` bytes."""
+    for start in range(0, len(body), chunk_size):
+        yield body[start : start + chunk_size]
+
+
+def stream_simulation(data: Dict, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Función que recibe la simulación de un vuelo, con los asientos ya asignados, y retorna su cuerpo JSON en partes.
+
+    La primera parte tiene los datos del vuelo y luego los pasajeros se codifican de a ``chunk_size``
+    y se liberan, por lo que el cuerpo JSON completo nunca está en memoria. La asignación se hace
+    antes, en la vista, para que sus errores se registren y respondan como en la respuesta sin
+    streaming; por eso todos los pasajeros (``data``) sí están en memoria antes de la primera parte.
+    El JSON es el mismo que el de la respuesta sin streaming.
+    """
+    header = {key: value for key, value in data.items() if key != "passengers"}
+    yield b'{"code":200,"data":' + dumps(header)[:-1] + (b"," if header else b"") + b'"passengers":['
+
+    passengers = data.pop("passengers")
+    for start in range(0, len(passengers), chunk_size):
+        end = min(start + chunk_size, len(passengers))
+        # Se codifica la parte como lista y se quitan los corchetes
+        chunk = dumps(passengers[start:end])[1:-1]
+        yield (b"," if start else b"") + chunk
+        # Los pasajeros ya enviados no se vuelven a usar
+        passengers[start:end] = [None] * (end - start)
+
+    yield b"]}}"
@@ -1,3 +1,1199 @@
-from django.test import TestCase
+import asyncio
+import copy
+import importlib
+import io
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from unittest import mock, skipIf
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import clear_url_caches, resolve, reverse
+from checkin.db_pool import PoolStatsMixin, pool_statistics
+from checkin.views import MetricsView
+from .models import Airplane, Flight, Passenger, Purchase, SeatType, Seat, BoardingPass
+from django.db.utils import OperationalError
+from .records import PassengerRecord, simulation_dict
+from .renderers import FastJSONRenderer, dumps, plain
+from .resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, database_breaker
+from .coalescing import AsyncSingleFlight, CoalescingStats, SingleFlight, simulation_calls
+from .docs import schema_ui_view
+from .engine import ReferenceEngine
+from .instrumentation import phase_metrics
+from .seat_map import RIGHT, FreeSeatPool, SeatMap, SeatMapCache, SeatRecord, numpy
+from .seat_map_store import SeatMapStore, StoredSeatMap, write_seat_map_store
+from django.core.management import CommandError, call_command
+from .views import AsyncAirlineCheckInView
+from .streaming import stream_body, stream_simulation
+from .response_cache import cached_simulation_body
+from .service import (
+    ALL_AIRPLANES_MARKER,
+    airplane_seats,
+    assign_seats,
+    batch_executor,
+    flight_data,
+    SeatConflictError,
+    load_flight,
+    load_seat_map,
+    persist_seats_distribution,
+    seats_distribution,
+    seats_distributions,
+    seat_map_cache,
+    seat_map_generation,
+    touch_marker,
+)
 
-# Create your tests here.
+
+def create_flight_fixture():
+    """Función que crea un avión de 3 filas por 4 columnas, un vuelo y sus tarjetas de embarque."""
+    for seat_type_id, name in [(1, "first"), (2, "premium"), (3, "economy")]:
+        SeatType.objects.create(seat_type_id=seat_type_id, name=name)
+
+    Airplane.objects.create(airplane_id=1, name="AirNova-660")
+    seat_id = 1
+    for seat_row, seat_type_id in [(1, 1), (2, 3), (3, 3)]:
+        for seat_column in "ABCD":
+            Seat.objects.create(
+                seat_id=seat_id,
+                seat_column=seat_column,
+                seat_row=seat_row,
+                seat_type_id=seat_type_id,
+                airplane_id=1,
+            )
+            seat_id += 1
+
+    Flight.objects.create(
+        flight_id=1,
+        takeoff_date_time=1688207580,
+        takeoff_airport="Aeropuerto Internacional Arturo Merino Benitez, Chile",
+        landing_date_time=1688221980,
+        landing_airport="Aeropuerto Internacional Jorge Cháve, Perú",
+        airplane_id=1,
+    )
+
+    # (id de compra, edad, tipo de asiento, asiento ya asignado)
+    boarding_passes = [
+        (1, 40, 1, None),
+        (1, 8, 1, None),
+        (2, 35, 3, None),
+        (2, 33, 3, None),
+        (2, 5, 3, None),
+        (3, 60, 3, 12),
+        (4, 22, 3, None),
+    ]
+    for index, (purchase_id, age, seat_type_id, seat_id) in enumerate(
+        boarding_passes, start=1
+    ):
+        Purchase.objects.get_or_create(purchase_id=purchase_id, purchase_date=1)
+        Passenger.objects.create(
+            passenger_id=index,
+            dni=str(10000000 + index),
+            name=f"Pasajero {index}",
+            age=age,
+            country="Chile",
+        )
+        BoardingPass.objects.create(
+            boarding_pass_id=index,
+            purchase_id=purchase_id,
+            passenger_id=index,
+            seat_type_id=seat_type_id,
+            seat_id=seat_id,
+            flight_id=1,
+        )
+
+
+class SeatMapTest(TestCase):
+    def test_neighbors(self):
+        seat_map = SeatMap(
+            1,
+            [
+                SeatRecord(10, 1, "A", 1),
+                SeatRecord(11, 1, "B", 1),
+                SeatRecord(20, 2, "A", 3),
+                SeatRecord(21, 2, "B", 3),
+            ],
+        )
+
+        self.assertEqual(seat_map.seat_id(2, "B"), 21)
+        self.assertEqual(seat_map.right(10), 11)
+        self.assertEqual(seat_map.back(10), 20)
+        self.assertEqual(seat_map.southeast(10), 21)
+        self.assertIsNone(seat_map.left(10))
+        self.assertIsNone(seat_map.front(10))
+        self.assertEqual(seat_map.seat_ids_by_type, {1: [10, 11], 3: [20, 21]})
+
+    def test_neighbor_directions(self):
+        # Filas 1 a 3 con columnas A B C _ E (pasillo en D); el id es fila * 10 + columna
+        columns = {"A": 1, "B": 2, "C": 3, "E": 5}
+        seat_map = SeatMap(
+            1,
+            [
+                SeatRecord(row * 10 + index, row, column, 1)
+                for row in range(1, 4)
+                for column, index in columns.items()
+            ],
+        )
+
+        # Los ocho vecinos del asiento del centro (2B)
+        self.assertEqual(
+            [
+                seat_map.front(22),
+                seat_map.back(22),
+                seat_map.left(22),
+                seat_map.right(22),
+                seat_map.northwest(22),
+                seat_map.northeast(22),
+                seat_map.southwest(22),
+                seat_map.southeast(22),
+            ],
+            [12, 32, 21, 23, 11, 13, 31, 33],
+        )
+        # En las esquinas los vecinos fuera del avión no existen
+        self.assertEqual(seat_map.neighbor(11, RIGHT), 12)
+        self.assertIsNone(seat_map.northwest(11))
+        self.assertIsNone(seat_map.southwest(31))
+        self.assertIsNone(seat_map.back(33))
+        # El pasillo separa los asientos: C y E no son vecinos
+        self.assertIsNone(seat_map.right(23))
+        self.assertIsNone(seat_map.left(25))
+        self.assertIsNone(seat_map.southeast(13))
+        self.assertEqual(seat_map.back(15), 25)
+        self.assertEqual(seat_map.seat_id(3, "E"), 35)
+        self.assertIsNone(seat_map.seat_id(3, "D"))
+
+    def test_cache_lru_and_ttl(self):
+        now = [0]
+        loads = []
+
+        def loader(airplane_id):
+            loads.append(airplane_id)
+            return SeatMap(airplane_id, [])
+
+        cache = SeatMapCache(max_size=2, ttl=10, clock=lambda: now[0])
+        cache.get(1, loader)
+        cache.get(2, loader)
+        cache.get(1, loader)
+        cache.get(3, loader)  # desaloja el avión 2
+        cache.get(2, loader)
+        now[0] = 10
+        cache.get(3, loader)  # expirado
+
+        self.assertEqual(loads, [1, 2, 3, 2, 3])
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["evictions"], 2)
+
+    def test_cache_lru_order(self):
+        now = [0]
+        loads = []
+
+        def loader(airplane_id):
+            loads.append(airplane_id)
+            return SeatMap(airplane_id, [])
+
+        cache = SeatMapCache(max_size=3, ttl=10, clock=lambda: now[0])
+        for airplane_id in (1, 2, 3):
+            cache.get(airplane_id, loader)
+        # Un acierto mueve el avión al final: se desaloja el menos usado (2), no el más antiguo (1)
+        seat_map = cache.get(1, loader)
+        self.assertIs(cache.get(1, loader), seat_map)
+        cache.get(4, loader)
+        self.assertIsNone(cache.lookup(2))
+        self.assertIs(cache.lookup(1), seat_map)
+
+        # El TTL se cuenta desde la carga: antes de cumplirse sigue siendo un acierto
+        now[0] = 9.5
+        self.assertIs(cache.get(1, loader), seat_map)
+        now[0] = 10
+        self.assertIsNot(cache.get(1, loader), seat_map)
+
+        self.assertEqual(loads, [1, 2, 3, 4, 1])
+        self.assertEqual(
+            cache.stats(),
+            {"size": 3, "maxSize": 3, "hits": 4, "misses": 6, "evictions": 1},
+        )
+
+        # Sin TTL los mapas no expiran
+        cache = SeatMapCache(max_size=1, clock=lambda: now[0])
+        seat_map = cache.get(1, loader)
+        now[0] = 10**6
+        self.assertIs(cache.get(1, loader), seat_map)
+
+    def test_cache_get_many(self):
+        loads = []
+
+        def loader(airplane_ids):
+            loads.append(airplane_ids)
+            return {airplane_id: SeatMap(airplane_id, []) for airplane_id in airplane_ids}
+
+        cache = SeatMapCache(max_size=2)
+        cache.get_many([1], loader)
+        # Solo se cargan los aviones que faltan, todos en una llamada, y se desaloja el menos usado
+        seat_maps = cache.get_many([1, 2, 3], loader)
+
+        self.assertEqual(sorted(seat_maps), [1, 2, 3])
+        self.assertEqual(loads, [[1], [2, 3]])
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertIsNone(cache.lookup(1))
+        self.assertIs(cache.lookup(3), seat_maps[3])
+
+        cache.invalidate(3)
+        self.assertIsNone(cache.lookup(3))
+        cache.invalidate()
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_cache_generation(self):
+        generations = {1: 0, 2: 0}
+        loads = []
+
+        def loader(airplane_id):
+            loads.append(airplane_id)
+            return SeatMap(airplane_id, [])
+
+        def load_many(airplane_ids):
+            return {airplane_id: loader(airplane_id) for airplane_id in airplane_ids}
+
+        cache = SeatMapCache(generation=generations.get)
+        seat_map = cache.get(1, loader)
+        self.assertIs(cache.get(1, loader), seat_map)
+
+        # Otro proceso cambia la generación del avión 1: su mapa se descarta y se vuelve a cargar
+        generations[1] += 1
+        reloaded = cache.get(1, loader)
+        self.assertIsNot(reloaded, seat_map)
+        self.assertIs(cache.get(1, loader), reloaded)
+
+        # get_many también compara la generación de cada avión
+        cache.get(2, loader)
+        generations[2] += 1
+        seat_maps = cache.get_many([1, 2], load_many)
+        self.assertIs(seat_maps[1], reloaded)
+        self.assertEqual(loads, [1, 1, 2, 2])
+        self.assertIsNone(cache.lookup(2, generation=0))
+
+    def test_free_seat_pool(self):
+        pool = FreeSeatPool([7, 3, 9, 1])
+        pool.remove(7)
+        pool.remove(9)
+
+        self.assertNotIn(7, pool)
+        self.assertIn(3, pool)
+        self.assertEqual(list(pool), [3, 1])
+        self.assertEqual(pool.first(), 3)
+        self.assertEqual(len(pool), 2)
+        with self.assertRaises(KeyError):
+            pool.remove(9)
+
+    def test_seat_map_store(self):
+        seats = [
+            SeatRecord(10, 1, "A", 1),
+            SeatRecord(11, 1, "B", 1),
+            SeatRecord(20, 2, "A", 3),
+            SeatRecord(21, 2, "B", 3),
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "seat-maps.bin")
+            store = SeatMapStore(path)
+            self.assertIsNone(store.seat_map(1))
+
+            self.assertEqual(write_seat_map_store(path, [(2, seats[2:]), (1, seats)]), (2, 6))
+            expected = SeatMap(1, seats)
+            seat_map = store.seat_map(1)
+            # Los asientos se leen de los registros del archivo, sin copiarlos a diccionarios
+            self.assertIsInstance(seat_map, StoredSeatMap)
+            self.assertEqual(seat_map.neighbors, expected.neighbors)
+            self.assertEqual(seat_map.positions, expected.positions)
+            self.assertEqual(seat_map.seat_ids_by_type, expected.seat_ids_by_type)
+            self.assertEqual(seat_map.type_positions(3), expected.type_positions(3))
+            self.assertEqual(seat_map.right(20), 21)
+            self.assertEqual(seat_map.seat_types[21], 3)
+            self.assertNotIn(12, seat_map)
+            # A los procesos del pool se envía un SeatMap con los asientos copiados
+            self.assertEqual(pickle.loads(pickle.dumps(seat_map)).neighbors, expected.neighbors)
+            self.assertIsNone(store.seat_map(3))
+
+            # Los aviones con valores que no caben en su campo del registro no se escriben
+            self.assertEqual(
+                write_seat_map_store(
+                    path,
+                    [(1, seats), (2, [SeatRecord(30, 70000, "A", 1)]), (3, [SeatRecord(40, 1, "A", 300)])],
+                ),
+                (1, 4),
+            )
+            self.assertEqual(store.airplane_ids(), [1])
+
+            # Al regenerar el archivo se lee el nuevo
+            write_seat_map_store(path, [(3, seats[:1])])
+            self.assertEqual(store.airplane_ids(), [3])
+            self.assertEqual(store.seat_map(3).neighbors, {10: (None,) * 8})
+            self.assertEqual(os.listdir(directory), ["seat-maps.bin"])
+
+    def test_two_letter_column(self):
+        seats = [
+            SeatRecord(10, 1, "A", 1),
+            SeatRecord(11, 1, "AA", 1),
+            SeatRecord(12, 1, "B", 1),
+        ]
+        seat_map = SeatMap(1, seats)
+
+        # El asiento de dos letras se puede asignar, pero no tiene posición ni vecinos
+        self.assertEqual(seat_map.seat_ids_by_type, {1: [10, 11, 12]})
+        self.assertEqual(seat_map.neighbors[11], (None,) * 8)
+        self.assertEqual(seat_map.right(10), 12)
+        self.assertIsNone(seat_map.seat_id(1, "AA"))
+        self.assertIsNone(seat_map.grid)
+
+        # El avión no se guarda en el archivo y se sigue cargando desde la base de datos
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "seat-maps.bin")
+            self.assertEqual(write_seat_map_store(path, [(1, seats), (2, seats[:1])]), (1, 1))
+            self.assertIsNone(SeatMapStore(path).seat_map(1))
+
+    @skipIf(numpy is None, "NumPy no está instalado")
+    def test_seat_grid(self):
+        # Fila 1: A B _ D (pasillo en C), fila 2: A
+        seat_map = SeatMap(
+            1,
+            [
+                SeatRecord(10, 1, "A", 3),
+                SeatRecord(11, 1, "B", 3),
+                SeatRecord(12, 1, "D", 3),
+                SeatRecord(20, 2, "A", 3),
+            ],
+        )
+        pool = FreeSeatPool([12, 10, 11, 20])
+
+        self.assertEqual(seat_map.grid.free_pair(pool, ReferenceEngine.MINOR_DIRECTIONS), (10, 11))
+        self.assertEqual(seat_map.grid.longest_free_runs(pool, [[10, 11], [12], [20]]), [2, 1, 1])
+        pool.remove(11)
+        # El asiento 12 no tiene vecinos por el pasillo; el 10 tiene libre al 20 atrás
+        self.assertIsNone(seat_map.grid.free_pair(pool, ReferenceEngine.MINOR_DIRECTIONS))
+        self.assertEqual(seat_map.grid.free_pair(pool, ReferenceEngine.ADULT_DIRECTIONS), (10, 20))
+
+
+class RendererTest(TestCase):
+    def test_fast_json_renderer(self):
+        body = {"code": 200, "data": {"landingAirport": "Jorge Cháve, Perú", "passengers": [{"seatId": None}]}}
+        encoded = FastJSONRenderer().render(body)
+
+        # Mismo formato que el JSONRenderer de DRF: UTF-8 y sin espacios
+        self.assertEqual(encoded, json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode())
+        # Un cuerpo ya codificado se envía tal cual
+        self.assertIs(type(FastJSONRenderer().render(dumps(body))), bytes)
+        self.assertEqual(FastJSONRenderer().render(encoded), encoded)
+
+    def test_passenger_record(self):
+        passenger = PassengerRecord(1, 10000001, "Pasajero 1", 40, "Chile", 1, 1, 1, None)
+
+        # Los pasajeros se codifican en formato CamelCase y viajan a los procesos del pool como tuplas
+        self.assertEqual(dumps([passenger]), dumps([passenger.as_dict()]))
+        self.assertEqual(pickle.loads(pickle.dumps(passenger)).as_dict(), passenger.as_dict())
+
+        # Las listas de pasajeros se convierten antes de codificar, sin el hook por objeto
+        body = {"code": 200, "data": {"flightId": 1, "passengers": [passenger, passenger]}}
+        with mock.patch("flight.renderers.encode_record", side_effect=AssertionError) as encode_record:
+            encoded = dumps(body)
+        encode_record.assert_not_called()
+        self.assertEqual(json.loads(encoded)["data"]["passengers"], [passenger.as_dict()] * 2)
+        self.assertEqual(plain(body["data"]), simulation_dict(body["data"]))
+
+
+class CoalescingTest(TestCase):
+    def test_single_flight(self):
+        stats = CoalescingStats()
+        single_flight = SingleFlight(stats)
+        started, release = threading.Event(), threading.Event()
+        calls, results = [], []
+
+        def simulation(flight_id):
+            calls.append(flight_id)
+            started.set()
+            release.wait(5)
+            return {"flightId": flight_id}
+
+        def request():
+            results.append(single_flight.call(1, simulation, 1))
+
+        threads = [threading.Thread(target=request) for _ in range(4)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        # Las solicitudes que llegan durante el cálculo esperan su resultado
+        deadline = time.monotonic() + 5
+        while stats.coalesced < 3 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(stats.snapshot(), {"computed": 1, "coalesced": 3})
+
+        # Sin llamadas en curso se vuelve a calcular, y los errores llegan a quien llama
+        with self.assertRaises(OperationalError):
+            single_flight.call(1, mock.Mock(side_effect=OperationalError("server has gone away")))
+        self.assertEqual(single_flight.call(1, simulation, 1), {"flightId": 1})
+        self.assertEqual(stats.computed, 3)
+
+    def test_async_single_flight(self):
+        stats = CoalescingStats()
+        single_flight = AsyncSingleFlight(stats)
+        calls = []
+
+        async def simulation(flight_id):
+            calls.append(flight_id)
+            await asyncio.sleep(0.01)
+            return {"flightId": flight_id}
+
+        async def requests():
+            return await asyncio.gather(
+                single_flight.call(1, simulation, 1),
+                single_flight.call(1, simulation, 1),
+                single_flight.call(2, simulation, 2),
+            )
+
+        results = async_to_sync(requests)()
+
+        self.assertEqual(calls, [1, 2])
+        self.assertIs(results[0], results[1])
+        self.assertEqual(results[2], {"flightId": 2})
+        self.assertEqual(stats.snapshot(), {"computed": 2, "coalesced": 1})
+
+    @override_settings(CHECKIN_COALESCE=True, SEAT_ASSIGNMENT_ENGINE="reference")
+    def test_cached_body_coalesces_by_version(self):
+        cache.clear()
+        with mock.patch.object(simulation_calls, "call", return_value={"flightId": 1}) as call:
+            cached_simulation_body(1, "v1")
+            cached_simulation_body(1, "v2")
+
+        # Una solicitud que ya leyó la versión nueva no se une al cálculo de la versión anterior
+        self.assertEqual(
+            [arguments[0] for arguments, _ in call.call_args_list],
+            [(1, "reference", "v1"), (1, "reference", "v2")],
+        )
+
+
+class ResilienceTest(TestCase):
+    def test_retry_policy(self):
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError("server has gone away")
+            return "ok"
+
+        policy = RetryPolicy(CircuitBreaker(), max_attempts=5, initial_wait=0.001, max_wait=0.001)
+
+        self.assertEqual(policy.call(flaky), "ok")
+        self.assertEqual(len(calls), 3)
+
+    def test_retry_policy_gives_up(self):
+        def down():
+            raise OperationalError("server has gone away")
+
+        policy = RetryPolicy(CircuitBreaker(failure_threshold=10), max_attempts=2, initial_wait=0.001)
+
+        with self.assertRaises(OperationalError):
+            policy.call(down)
+
+    def test_retry_budget_is_shared_by_the_request(self):
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError("server has gone away")
+            return "ok"
+
+        def down():
+            calls.append(1)
+            raise OperationalError("server has gone away")
+
+        policy = RetryPolicy(CircuitBreaker(failure_threshold=10), max_attempts=4, initial_wait=0.001, max_wait=0.001)
+
+        # La primera llamada gasta dos intentos fallidos; a la segunda solo le quedan otros dos
+        with policy.request_budget():
+            self.assertEqual(policy.call(flaky), "ok")
+            with self.assertRaises(OperationalError):
+                policy.call(down)
+        self.assertEqual(len(calls), 5)
+
+        # Las consultas que funcionan no gastan intentos y el plazo empieza con el primer error
+        calls.clear()
+        policy.deadline = 0.05
+        with policy.request_budget():
+            for _ in range(5):
+                policy.call(lambda: "ok")
+            time.sleep(0.1)
+            self.assertEqual(policy.call(flaky), "ok")
+        self.assertEqual(len(calls), 3)
+
+        # Fuera de una solicitud cada llamada tiene sus propios intentos
+        calls.clear()
+        with self.assertRaises(OperationalError):
+            policy.call(down)
+        self.assertEqual(len(calls), 4)
+
+    def test_circuit_breaker(self):
+        now = [0]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=lambda: now[0])
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+
+        with self.assertRaises(CircuitOpenError) as error:
+            breaker.before_call()
+        self.assertEqual(error.exception.retry_after, 30)
+
+        # Pasado el tiempo de espera se deja pasar una llamada de prueba
+        now[0] = 30
+        breaker.before_call()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        now[0] = 60
+        breaker.before_call()
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_circuit_breaker_probe_errors(self):
+        now = [0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=lambda: now[0])
+        policy = RetryPolicy(breaker, max_attempts=1)
+
+        def bug():
+            raise SeatConflictError("conflict")
+
+        def cancelled():
+            raise KeyboardInterrupt
+
+        # Una llamada de prueba que falla por otro motivo no deja el circuito medio abierto para siempre
+        breaker.record_failure()
+        now[0] = 30
+        with self.assertRaises(SeatConflictError):
+            policy.call(bug)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+        breaker.record_failure()
+        now[0] = 60
+        with self.assertRaises(KeyboardInterrupt):
+            policy.call(cancelled)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(policy.call(lambda: "ok"), "ok")
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_view_fails_fast_when_circuit_is_open(self):
+        for _ in range(database_breaker.failure_threshold):
+            database_breaker.record_failure()
+        try:
+            response = self.client.get(reverse("flight-passengers", kwargs={"id": 1}))
+        finally:
+            database_breaker.record_success()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["code"], 503)
+        self.assertIn("Retry-After", response)
+
+
+class PoolStatsTest(TestCase):
+    def test_pool_stats_mixin(self):
+        class PooledWrapper:
+            alias = "pool-test"
+
+            def get_new_connection(self, conn_params):
+                return self._get_new_connection(conn_params)
+
+            def _get_new_connection(self, conn_params):
+                return "connection"
+
+        class Wrapper(PoolStatsMixin, PooledWrapper):
+            pass
+
+        Wrapper().get_new_connection({})
+        stats = pool_statistics.snapshot()["pool-test"]
+
+        self.assertEqual(stats["checkouts"], 1)
+        self.assertEqual(stats["connects"], 1)
+        self.assertGreaterEqual(stats["maxCheckoutWaitSeconds"], stats["connectSeconds"])
+
+
+class FlightDataTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_flight_fixture()
+
+    def setUp(self):
+        seat_map_cache.invalidate()
+        cache.clear()
+
+    def test_flight_data(self):
+        data = flight_data(1)
+
+        self.assertEqual(data["airplaneId"], 1)
+        self.assertEqual(len(data["passengers"]), 7)
+        self.assertEqual(
+            data["passengers"][0].as_dict(),
+            {
+                "passengerId": 1,
+                "dni": 10000001,
+                "name": "Pasajero 1",
+                "age": 40,
+                "country": "Chile",
+                "boardingPassId": 1,
+                "purchaseId": 1,
+                "seatTypeId": 1,
+                "seatId": None,
+            },
+        )
+
+    def test_flight_not_found(self):
+        self.assertIsNone(flight_data(2))
+        self.assertIsNone(seats_distribution(2))
+
+    def test_seats_distribution_query_count(self):
+        # Vuelo con pasajeros y asientos del avión
+        with self.assertNumQueries(2):
+            seats_distribution(1)
+        # Con el mapa de asientos en cache no se consulta la tabla seat
+        with self.assertNumQueries(1):
+            seats_distribution(1)
+
+    def test_seat_map_store_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "seat-maps.bin")
+            call_command("build_seat_map_store", output=path, stdout=io.StringIO())
+
+            # Con el archivo no se consulta la tabla seat
+            with mock.patch("flight.service.seat_map_store", SeatMapStore(path)):
+                with self.assertNumQueries(1):
+                    data = seats_distribution(1)
+            self.assertEqual(simulation_dict(data), simulation_dict(seats_distribution(1)))
+
+            # Un archivo regenerado reemplaza los mapas en cache sin depender de las marcas de invalidación
+            # (sin esperar el intervalo entre lecturas de las marcas)
+            with mock.patch("flight.service.seat_map_store", SeatMapStore(path)), override_settings(
+                SEAT_MAP_GENERATION_CHECK_INTERVAL=0
+            ):
+                self.assertIn(11, load_seat_map(1).seat_types)
+                Seat.objects.filter(seat_id=11).delete()
+                call_command("build_seat_map_store", output=path, no_invalidate=True, stdout=io.StringIO())
+                self.assertNotIn(11, load_seat_map(1).seat_types)
+
+    def test_invalidate_seat_maps_command(self):
+        # Sin archivos de marca y con el cache locmem de las pruebas los workers no se enterarían
+        with override_settings(SEAT_MAP_GENERATION_DIR=""), self.assertRaises(CommandError):
+            call_command("invalidate_seat_maps", all=True, stdout=io.StringIO())
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            SEAT_MAP_GENERATION_DIR=directory
+        ):
+            load_seat_map(1)
+            call_command("invalidate_seat_maps", "1", stdout=io.StringIO())
+            self.assertIsNone(seat_map_cache.lookup(1, seat_map_generation(1)))
+            self.assertEqual(os.listdir(directory), ["1"])
+
+            # Una invalidación desde otro proceso solo reemplaza el archivo de marca: este worker
+            # la nota en la siguiente lectura de las marcas, no en cada consulta
+            generation = seat_map_generation(1)
+            touch_marker(ALL_AIRPLANES_MARKER)
+            self.assertEqual(seat_map_generation(1), generation)
+            with override_settings(SEAT_MAP_GENERATION_CHECK_INTERVAL=0):
+                self.assertNotEqual(seat_map_generation(1), generation)
+
+    def test_seats_distribution(self):
+        data = seats_distribution(1)
+        seat_ids = [passenger.seat_id for passenger in data["passengers"]]
+
+        self.assertNotIn(None, seat_ids)
+        self.assertEqual(len(set(seat_ids)), len(seat_ids))
+        self.assertEqual(seat_ids[:2], [2, 1])
+
+    def test_block_engine(self):
+        data = seats_distribution(1, engine="block")
+        seat_ids = {
+            passenger.boarding_pass_id: passenger.seat_id
+            for passenger in data["passengers"]
+        }
+
+        self.assertEqual(len(set(seat_ids.values())), 7)
+        # La compra 2 (dos adultos y un menor) ocupa el tramo libre más ajustado, la fila 3: M, A, A
+        self.assertEqual([seat_ids[5], seat_ids[3], seat_ids[4]], [9, 10, 11])
+        self.assertEqual(seat_ids[6], 12)
+
+    @skipIf(numpy is None, "NumPy no está instalado")
+    def test_seat_grid_matches_python(self):
+        data, seat_map = load_flight(1)
+        without_grid = SeatMap(1, airplane_seats(1))
+        without_grid.grid = None
+
+        for engine in ("reference", "block"):
+            with mock.patch.object(ReferenceEngine, "GRID_MIN_FREE_SEATS", 0):
+                with_numpy = assign_seats(copy.deepcopy(data), seat_map, engine)
+            with_python = assign_seats(copy.deepcopy(data), without_grid, engine)
+            self.assertEqual(simulation_dict(with_numpy), simulation_dict(with_python))
+
+    def test_two_letter_column_flight(self):
+        # Un asiento de dos letras no impide simular los vuelos del avión
+        Seat.objects.filter(seat_id=4).update(seat_column="DD")
+        seat_map_cache.invalidate()
+
+        for engine in ("reference", "block"):
+            seat_ids = [
+                passenger.seat_id
+                for passenger in seats_distribution(1, engine=engine)["passengers"]
+            ]
+            self.assertNotIn(None, seat_ids)
+            self.assertEqual(len(set(seat_ids)), len(seat_ids))
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            seats_distribution(1, engine="unknown")
+
+    def test_seats_distributions(self):
+        with self.assertNumQueries(2):
+            simulations = seats_distributions([2, 1])
+
+        self.assertEqual(list(simulations), [2, 1])
+        self.assertIsNone(simulations[2])
+        self.assertEqual(simulation_dict(simulations[1]), simulation_dict(seats_distribution(1)))
+
+    def test_batch_view(self):
+        response = self.client.post(
+            reverse("flight-passengers-batch"),
+            {"flightIds": [1, 2]},
+            content_type="application/json",
+        )
+        body = response.json()
+
+        self.assertEqual(body["code"], 200)
+        self.assertEqual(body["data"]["2"], {})
+        self.assertEqual(len(body["data"]["1"]["passengers"]), 7)
+
+    def test_batch_view_invalid(self):
+        response = self.client.post(
+            reverse("flight-passengers-batch"),
+            {"flightIds": "1"},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.json()["code"], 400)
+
+    def test_response_cache_etag(self):
+        url = reverse("flight-passengers", kwargs={"id": 1})
+        response = self.client.get(url)
+        etag = response["ETag"]
+
+        self.assertEqual(response.json()["data"], simulation_dict(seats_distribution(1)))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Con la simulación en cache solo se consulta la versión del vuelo
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response["ETag"], etag)
+
+        # Al asignar un asiento cambia la versión y se vuelve a calcular la simulación
+        BoardingPass.objects.filter(boarding_pass_id=7).update(seat_id=11)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        seat_ids = {
+            passenger["boardingPassId"]: passenger["seatId"]
+            for passenger in response.json()["data"]["passengers"]
+        }
+        self.assertEqual(seat_ids[7], 11)
+
+    def test_stream(self):
+        response = self.client.get(reverse("flight-passengers", kwargs={"id": 1}), {"stream": 1})
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            json.loads(b"".join(response.streaming_content)),
+            {"code": 200, "data": simulation_dict(seats_distribution(1))},
+        )
+
+        response = self.client.get(reverse("flight-passengers", kwargs={"id": 2}), {"stream": 1})
+        self.assertEqual(response.json(), {"code": 404, "data": {}})
+
+    def test_stream_cached_body(self):
+        url = reverse("flight-passengers", kwargs={"id": 1})
+        response = self.client.get(url)
+        etag = response["ETag"]
+
+        # Con el cuerpo de la versión actual en el cache se envía ese cuerpo, con su ETag
+        with self.assertNumQueries(1), mock.patch(
+            "flight.views.compute_seats_distribution", side_effect=AssertionError
+        ):
+            streamed = self.client.get(url, {"stream": 1})
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(streamed["ETag"], etag)
+        self.assertEqual(b"".join(streamed.streaming_content), response.content)
+        self.assertEqual(self.client.get(url, {"stream": 1}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Sin el cuerpo en el cache se calcula la simulación, sin ETag
+        cache.clear()
+        streamed = self.client.get(url, {"stream": 1})
+        self.assertFalse(streamed.has_header("ETag"))
+        self.assertEqual(json.loads(b"".join(streamed.streaming_content)), response.json())
+
+    def test_stream_assignment_error(self):
+        # Un error en la asignación se registra y responde antes de empezar el cuerpo en partes
+        with mock.patch(
+            "flight.service.assign_seats", side_effect=IndexError("pop from empty list")
+        ), self.assertLogs("flight.views", "ERROR"):
+            response = self.client.get(
+                reverse("flight-passengers", kwargs={"id": 1}), {"stream": 1}
+            )
+
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.json()["code"], 400)
+
+    def test_stream_chunks(self):
+        data = seats_distribution(1)
+        expected = {"code": 200, "data": simulation_dict(seats_distribution(1))}
+        chunks = list(stream_simulation(data, chunk_size=3))
+
+        # Datos del vuelo, tres partes de pasajeros (3, 3 y 1) y el cierre
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(json.loads(b"".join(chunks)), expected)
+        # Un cuerpo ya codificado se envía en partes de chunk_size bytes
+        self.assertEqual(list(stream_body(b"abcde", chunk_size=2)), [b"ab", b"cd", b"e"])
+
+    def test_persist_seats_distribution(self):
+        expected = {
+            passenger.boarding_pass_id: passenger.seat_id
+            for passenger in seats_distribution(1)["passengers"]
+        }
+        data = persist_seats_distribution(1)
+
+        # Solo se devuelven y guardan los pasajeros que no tenían asiento
+        self.assertEqual(len(data["passengers"]), 6)
+        self.assertEqual(
+            dict(BoardingPass.objects.values_list("boarding_pass_id", "seat_id")), expected
+        )
+        self.assertEqual(persist_seats_distribution(1)["passengers"], [])
+        self.assertIsNone(persist_seats_distribution(2))
+
+        # Una tarjeta nueva se resuelve sola, con los asientos guardados como ocupados
+        Purchase.objects.create(purchase_id=5, purchase_date=1)
+        Passenger.objects.create(passenger_id=8, dni="10000008", name="Pasajero 8", age=30, country="Chile")
+        BoardingPass.objects.create(
+            boarding_pass_id=8, purchase_id=5, passenger_id=8, seat_type_id=3, flight_id=1
+        )
+        # Bloqueo del vuelo, asientos ocupados, pasajeros sin asiento y bulk_update (más el savepoint de la prueba)
+        with self.assertNumQueries(6):
+            data = persist_seats_distribution(1)
+        [passenger] = data["passengers"]
+        self.assertEqual(passenger.boarding_pass_id, 8)
+        self.assertNotIn(passenger.seat_id, expected.values())
+
+    def test_persist_seats_distribution_conflict(self):
+        real_assign_seats = assign_seats
+
+        def assign_seats_concurrently(*args):
+            # Otra asignación guarda un asiento mientras se resuelve el vuelo
+            BoardingPass.objects.filter(boarding_pass_id=7).update(seat_id=9)
+            return real_assign_seats(*args)
+
+        with mock.patch("flight.service.assign_seats", assign_seats_concurrently):
+            with self.assertRaises(SeatConflictError):
+                persist_seats_distribution(1)
+
+        # La transacción se deshizo completa
+        self.assertEqual(BoardingPass.objects.filter(seat_id__isnull=True).count(), 6)
+
+    def test_persist_view(self):
+        url = reverse("flight-passengers", kwargs={"id": 1})
+        # Solo el personal guarda asientos
+        self.assertEqual(self.client.post(url).status_code, 403)
+        self.assertEqual(BoardingPass.objects.filter(seat_id__isnull=True).count(), 6)
+        if settings.CHECKIN_PROFILE == "api":
+            self.skipTest("El perfil api no autentica usuarios ni guarda asientos")
+
+        from django.contrib.auth.models import User
+
+        self.client.force_login(User.objects.create(username="staff", is_staff=True))
+        body = self.client.post(url).json()
+
+        self.assertEqual(body["code"], 200)
+        self.assertEqual(len(body["data"]["passengers"]), 6)
+        self.assertEqual(self.client.post(url).json()["data"]["passengers"], [])
+        # La simulación guardada es la que responde GET
+        self.assertEqual(
+            {passenger["boardingPassId"]: passenger["seatId"] for passenger in self.client.get(url).json()["data"]["passengers"]},
+            dict(BoardingPass.objects.values_list("boarding_pass_id", "seat_id")),
+        )
+        self.assertEqual(
+            self.client.post(reverse("flight-passengers", kwargs={"id": 2})).json(),
+            {"code": 404, "data": {}},
+        )
+
+    @override_settings(RESPONSE_CACHE=False, CHECKIN_METRICS=True)
+    def test_timing(self):
+        url = reverse("flight-passengers", kwargs={"id": 1})
+        phase_metrics.reset()
+        real_flight_data = flight_data
+
+        # El primer intento de cargar el vuelo falla y se reintenta
+        with mock.patch(
+            "flight.service.flight_data",
+            side_effect=[OperationalError("server has gone away"), real_flight_data(1)],
+        ), self.assertLogs("flight.timing", "INFO") as logs:
+            response = self.client.get(url)
+
+        phases = [entry.split(";")[0] for entry in response["Server-Timing"].split(", ")]
+        self.assertEqual(
+            phases,
+            ["load_flight", "load_seats", "availability", "minors", "adults", "fill", "render", "total"],
+        )
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["status"], 200)
+        self.assertEqual(line["retries"], 1)
+        self.assertEqual(line["phases"]["load_flight"]["retries"], 1)
+        self.assertEqual(line["phases"]["load_seats"]["queries"], 1)
+        self.assertEqual(line["phases"]["minors"]["queries"], 0)
+
+        metrics = MetricsView.as_view()(RequestFactory().get("/metrics")).content.decode()
+        self.assertIn('checkin_phase_retries_total{phase="load_flight"} 1', metrics)
+        self.assertIn('checkin_phase_duration_seconds_count{phase="fill"} 1', metrics)
+        self.assertIn('checkin_request_duration_seconds_count{status="200"} 1', metrics)
+
+    @skipIf(not settings.CHECKIN_API_DOCS, "La documentación Swagger no está montada (CHECKIN_API_DOCS)")
+    def test_api_docs(self):
+        self.assertRedirects(
+            self.client.get("/"), reverse("flight-passengers", kwargs={"id": 1}), fetch_redirect_response=False
+        )
+
+        from drf_yasg.generators import OpenAPISchemaGenerator
+
+        schema_ui_view.cache_clear()
+        with mock.patch.object(
+            OpenAPISchemaGenerator, "get_endpoints", autospec=True, side_effect=OpenAPISchemaGenerator.get_endpoints
+        ) as get_endpoints:
+            first = self.client.get("/swagger/", {"format": "openapi"})
+            second = self.client.get("/swagger/", {"format": "openapi"})
+        self.assertEqual(get_endpoints.call_count, 1)
+        self.assertEqual(first.content, second.content)
+        parameters = json.loads(first.content)["paths"]["/flights/{id}/passengers"]["get"]["parameters"]
+        self.assertEqual([parameter["name"] for parameter in parameters], ["id", "stream"])
+
+    def test_seats_distributions_process_pool(self):
+        Flight.objects.create(
+            flight_id=3,
+            takeoff_date_time=1688207580,
+            takeoff_airport="Aeropuerto Internacional Jorge Cháve, Perú",
+            landing_date_time=1688221980,
+            landing_airport="Aeropuerto Internacional Arturo Merino Benitez, Chile",
+            airplane_id=1,
+        )
+        BoardingPass.objects.create(
+            boarding_pass_id=8, purchase_id=4, passenger_id=7, seat_type_id=1, flight_id=3
+        )
+
+        simulations = seats_distributions([3, 2, 1, 3], workers=2)
+
+        self.assertEqual(list(simulations), [3, 2, 1])
+        self.assertEqual(simulation_dict(simulations[1]), simulation_dict(seats_distribution(1)))
+        self.assertEqual(simulations[3]["passengers"][0].seat_id, 1)
+
+        # El pool de procesos se reutiliza en las llamadas siguientes
+        executor = batch_executor(2)
+        seats_distributions([1, 2], workers=2)
+        self.assertIs(batch_executor(2), executor)
+
+
+class SimulateCheckinsCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_flight_fixture()
+        # Vuelo del día siguiente (2023-07-02 UTC) en el mismo avión, con un pasajero
+        Flight.objects.create(
+            flight_id=3,
+            takeoff_date_time=1688295600,
+            takeoff_airport="Aeropuerto Internacional Jorge Cháve, Perú",
+            landing_date_time=1688310000,
+            landing_airport="Aeropuerto Internacional Arturo Merino Benitez, Chile",
+            airplane_id=1,
+        )
+        BoardingPass.objects.create(
+            boarding_pass_id=8, purchase_id=4, passenger_id=7, seat_type_id=1, flight_id=3
+        )
+
+    def setUp(self):
+        seat_map_cache.invalidate()
+
+    def simulate(self, *args, **options):
+        """Método que ejecuta simulate_checkins y retorna lo escrito en la salida estándar y en la de errores."""
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command("simulate_checkins", *args, stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def flight_lines(self, output: str):
+        return [json.loads(line) for line in output.splitlines()]
+
+    def test_single_flight(self):
+        output, errors = self.simulate("1")
+
+        # Una línea JSON por vuelo, con el mismo cuerpo que GET /flights/<id>/passengers
+        self.assertEqual(
+            self.flight_lines(output),
+            [{"flightId": 1, "code": 200, "data": simulation_dict(seats_distribution(1))}],
+        )
+        self.assertIn("1/1 vuelos procesados", errors)
+
+    def test_range(self):
+        output, errors = self.simulate(flight_range="1-3")
+
+        lines = self.flight_lines(output)
+        self.assertEqual([line["flightId"] for line in lines], [1, 2, 3])
+        self.assertEqual([line["code"] for line in lines], [200, 404, 200])
+        self.assertEqual(lines[1]["data"], {})
+        self.assertIn("1 vuelos no encontrados.", errors)
+
+    def test_ids_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "ids.txt")
+            with open(path, "w", encoding="utf-8") as ids_file:
+                ids_file.write("# vuelos de prueba\n3\n\n1\n")
+            output, errors = self.simulate(ids_file=path)
+
+        self.assertEqual([line["flightId"] for line in self.flight_lines(output)], [3, 1])
+        # Con un archivo la cantidad total no se conoce de antemano
+        self.assertIn("2 vuelos procesados", errors)
+
+    def test_date_window(self):
+        output, _ = self.simulate(from_date="2023-07-02")
+        self.assertEqual([line["flightId"] for line in self.flight_lines(output)], [3])
+
+        output, _ = self.simulate(to_date="2023-07-01")
+        self.assertEqual([line["flightId"] for line in self.flight_lines(output)], [1])
+
+        output, _ = self.simulate(from_date="2023-07-01", to_date="2023-07-02")
+        self.assertEqual([line["flightId"] for line in self.flight_lines(output)], [1, 3])
+
+    def test_output_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "simulations.jsonl")
+            output, _ = self.simulate("1", "3", output=path)
+            with open(path, encoding="utf-8") as output_file:
+                lines = self.flight_lines(output_file.read())
+
+        self.assertEqual(output, "")
+        self.assertEqual([line["flightId"] for line in lines], [1, 3])
+
+    def test_dry_run(self):
+        output, errors = self.simulate("1", "2", dry_run=True)
+
+        # Solo la latencia de los vuelos encontrados: id, pasajeros y milisegundos
+        lines = output.splitlines()
+        self.assertEqual(len(lines), 1)
+        flight_id, passengers, latency = lines[0].split("\t")
+        self.assertEqual((flight_id, passengers), ("1", "7"))
+        self.assertRegex(latency, r"^\d+\.\d{3} ms$")
+        self.assertIn("Latencia de asignación: p50", errors)
+
+    def test_progress(self):
+        output, errors = self.simulate("1", "3", progress_every=1)
+
+        # El avance va a la salida de errores, así la salida estándar solo tiene las líneas JSON
+        self.assertEqual(len(self.flight_lines(output)), 2)
+        self.assertIn("1/2 vuelos procesados", errors)
+        self.assertIn("2/2 vuelos procesados", errors)
+
+        _, errors = self.simulate("1", progress_every=0)
+        self.assertEqual(errors, "")
+
+    def test_invalid_arguments(self):
+        invalid = [
+            ((), {}),
+            (("1",), {"flight_range": "1-3"}),
+            ((), {"flight_range": "3-1"}),
+            ((), {"flight_range": "a-b"}),
+            ((), {"from_date": "2023-13-01"}),
+            (("1",), {"workers": 0}),
+            (("1",), {"chunk_size": 0}),
+            (("1",), {"persist": True, "dry_run": True}),
+        ]
+        for args, options in invalid:
+            with self.subTest(args=args, options=options), self.assertRaises(CommandError):
+                self.simulate(*args, **options)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "ids.txt")
+            with open(path, "w", encoding="utf-8") as ids_file:
+                ids_file.write("1\nvuelo\n")
+            with self.assertRaisesMessage(CommandError, "ids.txt:2: id de vuelo inválido: vuelo"):
+                self.simulate(ids_file=path)
+
+
+class AsyncViewTest(TransactionTestCase):
+    # La carga corre en otro hilo (otra conexión), por eso los datos se confirman en la base de datos
+
+    def setUp(self):
+        create_flight_fixture()
+        seat_map_cache.invalidate()
+        cache.clear()
+
+    def test_async_view(self):
+        view = AsyncAirlineCheckInView.as_view()
+        response = async_to_sync(view)(RequestFactory().get("/flights/1/passengers"), id=1)
+        body = json.loads(response.content)
+
+        self.assertEqual(body["code"], 200)
+        self.assertEqual(body["data"], simulation_dict(seats_distribution(1)))
+
+        response = async_to_sync(view)(
+            RequestFactory().get("/flights/1/passengers", HTTP_IF_NONE_MATCH=response["ETag"]),
+            id=1,
+        )
+        self.assertEqual(response.status_code, 304)
+
+        response = async_to_sync(view)(RequestFactory().get("/flights/2/passengers"), id=2)
+        self.assertEqual(json.loads(response.content), {"code": 404, "data": {}})
+
+        # ?stream=1 envía en partes el cuerpo que ya está en el cache
+        response = async_to_sync(view)(RequestFactory().get("/flights/1/passengers?stream=1"), id=1)
+        self.assertTrue(response.streaming)
+        self.assertIn("ETag", response)
+        self.assertEqual(json.loads(b"".join(response.streaming_content))["data"], body["data"])
+
+        # El POST usa los permisos de la vista síncrona: sin usuario del personal no se guarda nada
+        response = async_to_sync(view)(RequestFactory().post("/flights/1/passengers"), id=1)
+        response.render()
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(BoardingPass.objects.filter(seat_id__isnull=True).count(), 6)
+
+    def test_async_client(self):
+        # Las rutas se arman al importar flight.urls: se vuelven a cargar con CHECKIN_ASYNC y al terminar
+        def reload_urlconf():
+            importlib.reload(importlib.import_module("flight.urls"))
+            importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+            clear_url_caches()
+
+        self.addCleanup(reload_urlconf)
+        with override_settings(CHECKIN_ASYNC=True, RESPONSE_CACHE=False, CHECKIN_SERVER_TIMING=True):
+            reload_urlconf()
+            url = reverse("flight-passengers", kwargs={"id": 1})
+            self.assertIs(resolve(url).func.view_class, AsyncAirlineCheckInView)
+
+            async def get():
+                return await self.async_client.get(url)
+
+            # La solicitud pasa por la URLconf y los middleware del despliegue ASGI
+            response = async_to_sync(get)()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"], simulation_dict(seats_distribution(1)))
+        phases = [entry.split(";")[0] for entry in response["Server-Timing"].split(", ")]
+        self.assertEqual(
+            phases,
+            ["load_flight", "load_seats", "availability", "minors", "adults", "fill", "render", "total"],
+        )
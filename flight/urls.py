@@ -1,10 +1,26 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# En el despliegue ASGI la ruta de pasajeros la atiende la vista asíncrona
+passengers_view = (
+    views.AsyncAirlineCheckInView if settings.CHECKIN_ASYNC else views.AirlineCheckInView
+)
+
+# El perfil "api" no autentica usuarios: el POST que guarda asientos solo se sirve con el perfil "full"
+passengers_methods = (
+    {"http_method_names": ["get", "options"]} if settings.CHECKIN_PROFILE == "api" else {}
+)
+
 urlpatterns = [
     path(
         "<int:id>/passengers",
-        views.AirlineCheckInView.as_view(),
+        passengers_view.as_view(**passengers_methods),
         name="flight-passengers",
     ),
+    path(
+        "passengers:batch",
+        views.AirlineCheckInBatchView.as_view(),
+        name="flight-passengers-batch",
+    ),
 ]
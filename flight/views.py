@@ -1,21 +1,82 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from .service import seats_distribution
-import traceback
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from rest_framework.permissions import IsAdminUser
+from .service import (
+    SeatConflictError,
+    acompute_seats_distribution,
+    aseats_distribution,
+    compute_seats_distribution,
+    persist_seats_distribution,
+    seats_distribution,
+    seats_distributions,
+)
+from .renderers import FastJSONRenderer
+from .streaming import stream_body, stream_simulation
+from .resilience import CircuitOpenError, database_policy
+from .response_cache import (
+    acached_simulation_body,
+    aflight_version,
+    astored_simulation_body,
+    cached_simulation_body,
+    etag,
+    flight_version,
+    not_modified,
+    stored_simulation_body,
+)
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.views import View
+import logging
+import math
+from .docs import swagger_auto_schema
+
+
+logger = logging.getLogger(__name__)
+
+
+def database_unavailable(error: CircuitOpenError) -> Response:
+    """Función que retorna la respuesta 503 cuando el circuito de la base de datos está abierto."""
+    return Response(
+        {"code": 503, "errors": "database unavailable"},
+        status=503,
+        headers={"Retry-After": str(math.ceil(error.retry_after))},
+    )
+
+
+def seat_conflict() -> Response:
+    """Función que retorna la respuesta 409 cuando otra asignación guardó asientos del vuelo al mismo tiempo."""
+    return Response(
+        {"code": 409, "errors": "seats changed during the check-in, retry"}, status=409
+    )
 
 
 class AirlineCheckInView(APIView):
+    # Solo JSON: se evita la negociación con la API navegable de DRF en cada llamada
+    renderer_classes = [FastJSONRenderer]
+
+    def dispatch(self, request, *args, **kwargs):
+        # Las consultas de la solicitud (versión, vuelo, asientos) comparten un solo plazo y máximo de intentos
+        with database_policy.request_budget():
+            return super().dispatch(request, *args, **kwargs)
+
+    def get_permissions(self):
+        # La simulación es pública; guardar los asientos (POST) es solo para usuarios del personal (is_staff)
+        if self.request.method == "POST":
+            return [IsAdminUser()]
+        return super().get_permissions()
+
     @swagger_auto_schema(
         operation_description="Get information about passengers on a flight by ID.",
         responses={
             200: "Successful response",
+            304: "Not modified, the If-None-Match ETag is still current",
             404: "Flight not found",
             400: "Error connecting to the database",
+            503: "Database unavailable, retry later",
         },
         tags=["Flights"],
-        manual_parameters=[
+        manual_parameters=lambda openapi: [
             openapi.Parameter(
                 "id",
                 openapi.IN_PATH,
@@ -23,21 +84,300 @@ class AirlineCheckInView(APIView):
                 description="ID of the flight to get passengers from",
                 required=True,
             ),
+            openapi.Parameter(
+                "stream",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_INTEGER,
+                enum=[1],
+                description="Send the response in chunks. If the response cache already holds the body for the "
+                "current version of the flight, that body is streamed with its ETag. Otherwise the seats are "
+                "assigned for every passenger before the first byte, without the response cache, ETag or "
+                "request coalescing: only the encoding is chunked, so peak memory still grows with the "
+                "size of the flight",
+                required=False,
+            ),
         ],
     )
     def get(self, request, id):
 
         try:
 
-            simulation_data = seats_distribution(id)
+            if request.query_params.get("stream") == "1":
+                if settings.RESPONSE_CACHE:
+                    version = database_policy.call(flight_version, id)
+
+                    if version == None:
+                        return Response({"code": 404, "data": {}})
+
+                    headers = {"ETag": etag(version)}
+                    if not_modified(request, version):
+                        return Response(status=304, headers=headers)
+
+                    # Si el cuerpo de esta versión ya está en el cache se envía en partes, sin calcularlo
+                    body = stored_simulation_body(id, version)
+
+                    if body != None:
+                        return StreamingHttpResponse(
+                            stream_body(body), content_type="application/json", headers=headers
+                        )
+
+                # La asignación se hace antes de responder, así sus errores se registran aquí;
+                # solo la codificación va en partes. stream_simulation libera los pasajeros
+                simulation_data = compute_seats_distribution(
+                    id, settings.SEAT_ASSIGNMENT_ENGINE
+                )
+
+                if simulation_data == None:
+                    return Response({"code": 404, "data": {}})
+
+                return StreamingHttpResponse(
+                    stream_simulation(simulation_data), content_type="application/json"
+                )
+
+            if not settings.RESPONSE_CACHE:
+                simulation_data = seats_distribution(id)
+
+                if simulation_data == None:
+                    return Response({"code": 404, "data": {}})
+
+                return Response({"code": 200, "data": simulation_data})
+
+            version = database_policy.call(flight_version, id)
+
+            if version == None:
+                return Response({"code": 404, "data": {}})
+
+            headers = {"ETag": etag(version)}
+            if not_modified(request, version):
+                return Response(status=304, headers=headers)
+
+            # Cuerpo ya codificado: FastJSONRenderer lo envía sin volver a serializarlo
+            body = cached_simulation_body(id, version)
+
+            if body == None:
+                return Response({"code": 404, "data": {}})
+
+            return Response(body, headers=headers)
+
+        except CircuitOpenError as e:
+            return database_unavailable(e)
+
+        except Exception:
+            logger.exception("Ocurrió un error en la simulación de check-in")
+            return Response({"code": 400, "errors": "could not connect to db"})
+
+    @swagger_auto_schema(
+        operation_description="Assign seats to the passengers of the flight that do not have one and save them. "
+        "Passengers that already have a seat keep it; the response only contains the passengers seated by this call.",
+        responses={
+            200: "Successful response",
+            404: "Flight not found",
+            400: "Error connecting to the database",
+            409: "Another check-in saved seats of the flight at the same time, retry",
+            503: "Database unavailable, retry later",
+        },
+        tags=["Flights"],
+    )
+    def post(self, request, id):
+
+        try:
+
+            assigned_data = persist_seats_distribution(id)
 
-            if simulation_data == None:
+            if assigned_data == None:
                 return Response({"code": 404, "data": {}})
 
-            return Response({"code": 200, "data": simulation_data})
+            return Response({"code": 200, "data": assigned_data})
+
+        except SeatConflictError:
+            return seat_conflict()
+
+        except CircuitOpenError as e:
+            return database_unavailable(e)
+
+        except Exception:
+            logger.exception("Ocurrió un error al guardar los asientos")
+            return Response({"code": 400, "errors": "could not connect to db"})
+
+
+def json_response(body, status: int = 200, headers: dict = None) -> HttpResponse:
+    """Función que retorna una respuesta JSON con el mismo formato que FastJSONRenderer; ``body`` puede ser un cuerpo ya codificado."""
+    return HttpResponse(
+        FastJSONRenderer().render(body),
+        status=status,
+        headers=headers,
+        content_type="application/json",
+    )
+
+
+class AsyncAirlineCheckInView(View):
+    """Versión asíncrona de AirlineCheckInView para el despliegue ASGI (CHECKIN_ASYNC)."""
+
+    http_method_names = ["get", "post", "options"]
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Como APIView, sin el CSRF de Django: el POST lo atiende AirlineCheckInView, donde DRF exige el token
+        # CSRF a los usuarios autenticados por sesión. csrf_exempt de Django 4.1 no conserva las vistas asíncronas
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Como AirlineCheckInView.dispatch; sync_to_async copia el contexto, así los hilos usan el mismo plazo
+        with database_policy.request_budget():
+            return await super().dispatch(request, *args, **kwargs)
+
+    async def get(self, request, id):
+
+        try:
+
+            if request.GET.get("stream") == "1":
+                if settings.RESPONSE_CACHE:
+                    version = await aflight_version(id)
+
+                    if version == None:
+                        return json_response({"code": 404, "data": {}})
+
+                    headers = {"ETag": etag(version)}
+                    if not_modified(request, version):
+                        return HttpResponseNotModified(headers=headers)
+
+                    body = await astored_simulation_body(id, version)
+
+                    if body != None:
+                        return StreamingHttpResponse(
+                            stream_body(body), content_type="application/json", headers=headers
+                        )
+
+                # Con Django 4.1 el servidor ASGI recorre el iterador en el event loop,
+                # por eso la asignación se hace antes y solo la codificación va en partes.
+                # stream_simulation libera los pasajeros, así que no se comparte el resultado
+                simulation_data = await acompute_seats_distribution(id)
+
+                if simulation_data == None:
+                    return json_response({"code": 404, "data": {}})
+
+                return StreamingHttpResponse(
+                    stream_simulation(simulation_data), content_type="application/json"
+                )
+
+            if not settings.RESPONSE_CACHE:
+                simulation_data = await aseats_distribution(id)
+
+                if simulation_data == None:
+                    return json_response({"code": 404, "data": {}})
+
+                return json_response({"code": 200, "data": simulation_data})
+
+            version = await aflight_version(id)
+
+            if version == None:
+                return json_response({"code": 404, "data": {}})
+
+            headers = {"ETag": etag(version)}
+            if not_modified(request, version):
+                return HttpResponseNotModified(headers=headers)
+
+            body = await acached_simulation_body(id, version)
+
+            if body == None:
+                return json_response({"code": 404, "data": {}})
+
+            return json_response(body, headers=headers)
+
+        except CircuitOpenError as e:
+            return json_response(
+                {"code": 503, "errors": "database unavailable"},
+                status=503,
+                headers={"Retry-After": str(math.ceil(e.retry_after))},
+            )
+
+        except Exception:
+            logger.exception("Ocurrió un error en la simulación de check-in")
+            return json_response({"code": 400, "errors": "could not connect to db"})
+
+    async def post(self, request, id):
+        # La autenticación, los permisos y la transacción son los de la vista síncrona
+        return await sync_to_async(AirlineCheckInView.as_view())(request, id=id)
+
+
+class AirlineCheckInBatchView(AirlineCheckInView):
+    http_method_names = ["post", "options"]
+
+    def get_permissions(self):
+        # El POST de varios vuelos solo simula, no guarda asientos
+        return APIView.get_permissions(self)
+
+    @swagger_auto_schema(
+        operation_description="Run the check-in simulation of several flights in one call. Flights that do not exist return an empty object.",
+        request_body=lambda openapi: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=["flightIds"],
+            properties={
+                "flightIds": openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(type=openapi.TYPE_INTEGER),
+                    description="IDs of the flights to simulate",
+                ),
+                "workers": openapi.Schema(
+                    type=openapi.TYPE_INTEGER,
+                    description="Number of processes used to assign the seats (default CHECKIN_WORKERS)",
+                ),
+            },
+        ),
+        responses={
+            200: "Successful response, keyed by flight ID",
+            400: "Invalid flight IDs or error connecting to the database",
+            503: "Database unavailable, retry later",
+        },
+        tags=["Flights"],
+    )
+    def post(self, request):
+        body = request.data if isinstance(request.data, dict) else {}
+        flight_ids = body.get("flightIds")
+        workers = body.get("workers", settings.CHECKIN_WORKERS)
+
+        if (
+            not isinstance(flight_ids, list)
+            or not flight_ids
+            or not all(type(flight_id) is int for flight_id in flight_ids)
+        ):
+            return Response({"code": 400, "errors": "flightIds must be a non-empty list of integers"})
+
+        if len(flight_ids) > settings.CHECKIN_BATCH_MAX_FLIGHTS:
+            return Response(
+                {
+                    "code": 400,
+                    "errors": f"at most {settings.CHECKIN_BATCH_MAX_FLIGHTS} flights per batch",
+                }
+            )
+
+        if type(workers) is not int or not 1 <= workers <= settings.CHECKIN_MAX_WORKERS:
+            return Response(
+                {
+                    "code": 400,
+                    "errors": f"workers must be an integer between 1 and {settings.CHECKIN_MAX_WORKERS}",
+                }
+            )
+
+        try:
+
+            simulations = seats_distributions(flight_ids, workers=workers)
+
+            return Response(
+                {
+                    "code": 200,
+                    "data": {
+                        str(flight_id): simulation_data or {}
+                        for flight_id, simulation_data in simulations.items()
+                    },
+                }
+            )
+
+        except CircuitOpenError as e:
+            return database_unavailable(e)
 
-        except Exception as e:
-            print("Ocurrió un error:", e)
-            print("Traceback completo:")
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Ocurrió un error en la simulación de check-in")
             return Response({"code": 400, "errors": "could not connect to db"})